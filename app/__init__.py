@@ -1,9 +1,27 @@
 """Network Bounty Hunter Agent - Connector Matchmaking System.
 
 Monitors LinkedIn posts for needs and matches them with your contacts.
+
+Exports are resolved lazily, so ``import app.<module>`` never pulls in the
+ADK, Google auth or pydantic unless that module needs them.
 """
+from importlib import import_module
+
+_EXPORTS = {
+    'app': 'app.agent',
+    'root_agent': 'app.agent',
+    'Contact': 'app.models',
+    'NeedSpec': 'app.models',
+    'RankedContact': 'app.models',
+    'MessageDraft': 'app.models',
+    'ConnectorPipeline': 'app.pipeline',
+}
+
+__all__ = list(_EXPORTS)
 
-from app.agent import app
-from app.models import Contact, Need, OpportunitySummary
 
-__all__ = ['app', 'Contact', 'Need', 'OpportunitySummary']
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module), name)
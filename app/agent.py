@@ -1,24 +1,30 @@
 """Network Bounty Hunter Agent - Connector Matchmaking System.
 
 Monitors LinkedIn posts for needs, matches them with your contacts, facilitates intros.
+
+Importing this module has no side effects: the tools and the contact index
+work without Google Cloud credentials or the ADK. The contact index is built
+on first tool call, and GCP configuration plus the ADK ``root_agent`` / ``app``
+are only created when those attributes are first accessed.
 """
 import os
 import json
 import uuid
 from datetime import datetime
-from typing import List
-import google.auth
-
-from google.adk.agents import Agent
-from google.adk.apps.app import App
+from typing import List, Optional
 
-from models import Contact
-
-# Configure GCP
-_, project_id = google.auth.default()
-os.environ["GOOGLE_CLOUD_PROJECT"] = project_id
-os.environ["GOOGLE_CLOUD_LOCATION"] = "global"
-os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "True"
+from app.models import Contact
+from app.contact_index import ContactIndex
+from app.contact_store import ContactStore
+from app.need_extractor import NEED_EXTRACTOR
+from app.pipeline import (
+    ConnectorPipeline,
+    drafts_to_payload,
+    need_from_payload,
+    need_to_payload,
+    ranked_from_payload,
+    ranking_to_payload,
+)
 
 # ============================================================================
 # MOCK DATA - YOUR CONTACT DATABASE
@@ -77,6 +83,36 @@ MY_CONTACTS = [
     ),
 ]
 
+# Load the real network when a contacts file (JSON array, JSONL or snapshot) is configured
+CONTACTS_FILE = os.getenv("CONTACTS_FILE")
+
+# Semantic matching mode: directory built by `python -m app.semantic_index` for the same contacts
+SEMANTIC_INDEX_DIR = os.getenv("SEMANTIC_INDEX_DIR")
+
+# Typed in-process pipeline; the tools below only convert JSON at the edge
+_PIPELINE: Optional[ConnectorPipeline] = None
+
+
+def get_pipeline() -> ConnectorPipeline:
+    """The pipeline over CONTACTS_FILE (or MY_CONTACTS), built on first use."""
+    global _PIPELINE
+    if _PIPELINE is None:
+        contacts = ContactStore.open(CONTACTS_FILE) if CONTACTS_FILE else MY_CONTACTS
+        index = ContactIndex(contacts)
+        index.precompute(NEED_EXTRACTOR.keywords)
+        semantic = None
+        if SEMANTIC_INDEX_DIR:
+            from app.semantic_index import SemanticIndex
+            semantic = SemanticIndex.open(SEMANTIC_INDEX_DIR, contacts)
+        _PIPELINE = ConnectorPipeline(index, semantic=semantic)
+    return _PIPELINE
+
+
+def set_pipeline(pipeline: Optional[ConnectorPipeline]) -> None:
+    """Serve the tools from another pipeline (None rebuilds from the contacts on next use)."""
+    global _PIPELINE
+    _PIPELINE = pipeline
+
 # ============================================================================
 # AGENT TOOLS
 # ============================================================================
@@ -90,59 +126,12 @@ def extract_need_from_post(post_text: str, author_name: str = "someone") -> str:
         author_name: Name of the person who posted
         
     Returns:
-        JSON with extracted need: {"author", "need_type", "keywords", "context"}
+        JSON with extracted need: {"need_id", "author", "need_type", "keywords", "context"},
+        plus the whole "post_text" when the post is longer than "context"
     """
-    post_lower = post_text.lower()
-    
-    # Detect need patterns
-    keywords = []
-    need_type = "unknown"
-    
-    # Common patterns
-    if "looking for" in post_lower or "need" in post_lower or "seeking" in post_lower:
-        if "packaging" in post_lower:
-            keywords.append("packaging")
-        if "bioplastic" in post_lower or "bio-plastic" in post_lower:
-            keywords.append("bioplastics")
-        if "sustainable" in post_lower or "sustainability" in post_lower:
-            keywords.append("sustainability")
-        if "material" in post_lower:
-            keywords.append("materials")
-        if "engineer" in post_lower:
-            keywords.append("engineer")
-        if "supplier" in post_lower or "vendor" in post_lower:
-            keywords.append("supplier")
-        if "investor" in post_lower or "funding" in post_lower:
-            keywords.append("investment")
-        if "partner" in post_lower:
-            keywords.append("partnerships")
-        if "advice" in post_lower or "help" in post_lower:
-            keywords.append("advice")
-        if "certification" in post_lower or "certified" in post_lower:
-            keywords.append("certification")
-        if "food" in post_lower:
-            keywords.append("food-packaging")
-            
-        # Determine need type
-        if "hire" in post_lower or "hiring" in post_lower:
-            need_type = "hire"
-        elif "invest" in post_lower or "funding" in post_lower:
-            need_type = "investment"
-        elif "partner" in post_lower:
-            need_type = "partnership"
-        elif "supplier" in post_lower or "vendor" in post_lower:
-            need_type = "supplier"
-        else:
-            need_type = "advice/intro"
-    
-    result = {
-        "author": author_name,
-        "need_type": need_type,
-        "keywords": keywords,
-        "context": post_text[:200]  # First 200 chars for context
-    }
+    need = get_pipeline().extract(post_text, author_name)
     
-    return json.dumps(result)
+    return json.dumps(need_to_payload(need))
 
 
 def find_matching_contacts(need_json: str, top_n: int = 3) -> str:
@@ -156,51 +145,26 @@ def find_matching_contacts(need_json: str, top_n: int = 3) -> str:
     Returns:
         JSON with matched contacts and match scores
     """
-    need = json.loads(need_json)
-    keywords = need.get("keywords", [])
+    need = need_from_payload(json.loads(need_json))
+    ranking = get_pipeline().rank(need, top_n)
     
-    if not keywords:
-        return json.dumps({"matches": [], "message": "No clear need detected in post"})
-    
-    matches = []
+    return json.dumps(ranking_to_payload(need, ranking), default=str)
+
+
+def match_batch(needs: List[dict], top_n: int = 3) -> List[dict]:
+    """
+    Score a whole batch of extracted needs against all contacts at once.
     
-    for contact in MY_CONTACTS:
-        # Calculate match score
-        relevance = 0
-        matching_tags = []
-        
-        for keyword in keywords:
-            for tag in contact.tags:
-                if keyword.lower() in tag.lower() or tag.lower() in keyword.lower():
-                    relevance += 0.25
-                    matching_tags.append(tag)
-        
-        relevance = min(relevance, 1.0)
-        
-        # Boost by relationship strength (you know them well = better intro)
-        final_score = (0.7 * relevance) + (0.3 * contact.relationship_strength)
+    Args:
+        needs: Need dicts as produced by extract_need_from_post
+        top_n: Number of top matches to return per need
         
-        if relevance > 0.2:  # Only include if somewhat relevant
-            matches.append({
-                "contact": contact.model_dump(),
-                "match_score": round(final_score, 2),
-                "relevance": round(relevance, 2),
-                "matching_expertise": list(set(matching_tags)),
-                "why_good_match": f"{contact.name} has expertise in {', '.join(list(set(matching_tags))[:3])}"
-            })
-    
-    # Sort by score
-    matches.sort(key=lambda x: x["match_score"], reverse=True)
-    matches = matches[:top_n]
-    
-    result = {
-        "author_need": need.get("author", "someone") + " needs " + need.get("need_type", "help"),
-        "keywords": keywords,
-        "matches": matches,
-        "total_found": len(matches)
-    }
-    
-    return json.dumps(result, default=str)
+    Returns:
+        One result dict per need, equal to the parsed find_matching_contacts output
+    """
+    specs = [need_from_payload(need) for need in needs]
+    rankings = get_pipeline().rank_batch(specs, top_n)
+    return [ranking_to_payload(spec, ranking) for spec, ranking in zip(specs, rankings)]
 
 
 def generate_intro_message(match_json: str, to_poster: bool = True) -> str:
@@ -222,26 +186,27 @@ def generate_intro_message(match_json: str, to_poster: bool = True) -> str:
             return "No matches found to introduce"
         match = match["matches"][0]
     
-    contact = match["contact"]
-    expertise = match.get("matching_expertise", [])
+    return get_pipeline().draft(ranked_from_payload(match), to_poster).body
+
+
+def generate_intro_messages(matches_json: str, channel: str = "linkedin_dm", author_name: str = "") -> str:
+    """
+    Generate introduction messages for every match, in both directions.
     
-    if to_poster:
-        # Message to the person who posted the need
-        message = f"Hi! Saw your post and thought I could help connect you with someone perfect.\n\n"
-        message += f"I'd like to introduce you to {contact['name']}, {contact['title']} at {contact['company']}. "
-        message += f"They have deep expertise in {', '.join(expertise[:2])} which aligns directly with what you're looking for.\n\n"
-        message += f"Notes: {contact.get('notes', 'They are excellent in their field.')}\n\n"
-        message += f"Would you be open to a quick intro call? Happy to facilitate."
-    else:
-        # Message to your contact asking if they're interested
-        message = f"Hi {contact['name'].split()[0]},\n\n"
-        message += f"I came across someone on LinkedIn who's looking for help with {', '.join(expertise[:2])} - "
-        message += f"right up your alley!\n\n"
-        message += f"They seem like a great fit for your expertise. Would you be open to a quick intro? "
-        message += f"Happy to connect you if you have 15-20 mins to chat with them.\n\n"
-        message += f"Let me know!"
+    Args:
+        matches_json: JSON from find_matching_contacts
+        channel: "linkedin_dm", "email" or "warm_intro"
+        author_name: Name of the person who posted (used by email and warm_intro drafts)
+        
+    Returns:
+        JSON list with, per match, the contact and the drafts to the poster and to the contact
+    """
+    data = json.loads(matches_json)
+    ranked = [ranked_from_payload(match) for match in data.get("matches", [])]
+    need = need_from_payload({"author": author_name}) if author_name else None
     
-    return message
+    responses = get_pipeline().draft_batch(ranked, need, channels=(channel,))
+    return json.dumps(drafts_to_payload(ranked, responses), indent=2)
 
 
 def create_opportunity_summary(matches_json: str) -> str:
@@ -255,47 +220,23 @@ def create_opportunity_summary(matches_json: str) -> str:
         Human-readable summary
     """
     data = json.loads(matches_json)
-    matches = data.get("matches", [])
-    
-    if not matches:
-        return "No connector opportunities found. Keep monitoring for posts that match your network's expertise."
-    
-    summary = f"**CONNECTOR OPPORTUNITY**\n\n"
-    summary += f"Someone needs: {', '.join(data.get('keywords', []))}\n\n"
-    summary += f"Found {len(matches)} contacts from your network who could help:\n\n"
-    
-    for i, match in enumerate(matches, 1):
-        contact = match["contact"]
-        summary += f"{i}. **{contact['name']}** ({contact['title']}) - Match: {match['match_score']}\n"
-        summary += f"   Expertise: {', '.join(match['matching_expertise'])}\n"
-        summary += f"   Why: {match['why_good_match']}\n\n"
+    ranked = [ranked_from_payload(match) for match in data.get("matches", [])]
     
-    summary += f"\n**NEXT ACTIONS:**\n"
-    summary += f"1. Message your top contact ({matches[0]['contact']['name']}) to gauge interest\n"
-    summary += f"2. If interested, intro them to the person who posted\n"
-    summary += f"3. Track outcome - successful intros build your connector reputation\n\n"
-    summary += f"**VALUE**: By facilitating this intro, you:\n"
-    summary += f"- Help someone in your network find what they need\n"
-    summary += f"- Strengthen relationship with your contact by sending them opportunities\n"
-    summary += f"- Build reputation as a valuable connector\n"
-    
-    return summary
+    return get_pipeline().summarize(data.get("keywords", []), ranked)
 
 
 # ============================================================================
 # AGENT DEFINITION  
 # ============================================================================
 
-root_agent = Agent(
-    name="connector_agent",
-    model="gemini-2.5-flash",
-    instruction="""
+AGENT_INSTRUCTION = """
     You are a Connector Agent that helps people facilitate valuable introductions.
     
     Your workflow:
     1. When you see a LinkedIn post expressing a need, use extract_need_from_post
     2. Find matching contacts from the user's network using find_matching_contacts
-    3. Generate intro messages using generate_intro_message
+    3. Generate intro messages using generate_intro_message, or generate_intro_messages
+       to draft for every match at once (optionally as an email or a warm intro)
     4. Provide an opportunity summary with clear next actions
     
     You create VALUE by:
@@ -305,13 +246,56 @@ root_agent = Agent(
     
     Always explain WHY each match is good and what the user should do next.
     Be enthusiastic about connector opportunities - they're valuable for everyone!
-    """,
-    tools=[
-        extract_need_from_post,
-        find_matching_contacts,
-        generate_intro_message,
-        create_opportunity_summary
-    ],
-)
+    """
+
+AGENT_TOOLS = [
+    extract_need_from_post,
+    find_matching_contacts,
+    generate_intro_message,
+    generate_intro_messages,
+    create_opportunity_summary
+]
+
+_AGENT_APP = None
+
+
+def configure_gcp() -> None:
+    """Point the GenAI SDK at Vertex AI in the default credentials' project."""
+    import google.auth
+
+    _, project_id = google.auth.default()
+    os.environ["GOOGLE_CLOUD_PROJECT"] = project_id
+    os.environ["GOOGLE_CLOUD_LOCATION"] = "global"
+    os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "True"
+
+
+def build_app():
+    """
+    Configure GCP and build the ADK agent and App (once).
+    
+    Returns:
+        (root_agent, app)
+    """
+    global _AGENT_APP
+    if _AGENT_APP is None:
+        configure_gcp()
+        from google.adk.agents import Agent
+        from google.adk.apps.app import App
+
+        root_agent = Agent(
+            name="connector_agent",
+            model="gemini-2.5-flash",
+            instruction=AGENT_INSTRUCTION,
+            tools=AGENT_TOOLS,
+        )
+        _AGENT_APP = (root_agent, App(root_agent=root_agent, name="network_bounty_hunter_agent"))
+    return _AGENT_APP
+
 
-app = App(root_agent=root_agent, name="network_bounty_hunter_agent")
+def __getattr__(name: str):
+    # root_agent / app are what the ADK CLI loads; build them on first access
+    if name == "root_agent":
+        return build_app()[0]
+    if name == "app":
+        return build_app()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
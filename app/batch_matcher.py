@@ -0,0 +1,158 @@
+"""Vectorized batch matching of many needs against the whole contact network.
+
+Contacts and needs are encoded as sparse tag-incidence matrices over the
+``ContactIndex`` vocabulary. One sparse product gives the keyword/tag hit
+count of every (need, contact) pair, from which relevance, the 0.7/0.3 blend
+with ``relationship_strength``, the relevance cutoff and the per-need top-n
+are computed for a whole block of needs at once.
+"""
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.contact_index import (
+    ContactIndex,
+    MIN_RELEVANCE,
+    RELATIONSHIP_WEIGHT,
+    RELEVANCE_PER_HIT,
+    RELEVANCE_WEIGHT,
+)
+
+if TYPE_CHECKING:
+    from app.constraint_index import CandidateFilter
+
+# Needs scored per sparse product; bounds the size of the hit matrix
+DEFAULT_BLOCK_SIZE = 256
+
+
+class BatchMatcher:
+    """Scores batches of keyword lists against a ``ContactIndex``."""
+
+    def __init__(self, index: ContactIndex, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.index = index
+        self.block_size = block_size
+        # Candidates (contacts with any matching tag) per need of the last batch
+        self.candidate_counts: List[int] = []
+
+        rows, cols = [], []
+        for tag_id, postings in enumerate(index.postings):
+            for pos, _, _ in postings:
+                rows.append(tag_id)
+                cols.append(pos)
+        # tag x contact occurrence counts (duplicate entries are summed)
+        self._tag_contacts = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(index.postings), len(index.contacts)),
+        )
+
+        # Relevance saturates after this many hits, so every reachable score
+        # is one of a few values per contact; precompute them (and their
+        # rounded sort keys) with the exact arithmetic of the scalar path.
+        self._max_hits = int(np.ceil(1.0 / RELEVANCE_PER_HIT))
+        self._relevance = [
+            min(RELEVANCE_PER_HIT * hits, 1.0) for hits in range(self._max_hits + 1)
+        ]
+        scores = [
+            [(RELEVANCE_WEIGHT * relevance) + (RELATIONSHIP_WEIGHT * strength)
+             for relevance in self._relevance]
+            for strength in index.strengths
+        ]
+        shape = (len(index.contacts), self._max_hits + 1)
+        self._scores = np.array(scores, dtype=np.float64).reshape(shape)
+        self._keys = np.array(
+            [[round(score, 2) for score in row] for row in scores], dtype=np.float64
+        ).reshape(shape)
+        self._min_hits = next(
+            hits for hits, relevance in enumerate(self._relevance) if relevance > MIN_RELEVANCE
+        )
+
+    def _need_matrix(self, keyword_lists: Sequence[List[str]]) -> sparse.csr_matrix:
+        """Encode needs as need x tag counts of matching keywords."""
+        rows, cols = [], []
+        for row, keywords in enumerate(keyword_lists):
+            for keyword in keywords:
+                tag_ids = self.index.tags_for_keyword(keyword)
+                rows.extend([row] * len(tag_ids))
+                cols.extend(tag_ids)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(keyword_lists), len(self.index.postings)),
+        )
+
+    def top_matches_batch(
+        self,
+        keyword_lists: Sequence[List[str]],
+        top_n: int,
+        filters: Optional[Sequence[Optional["CandidateFilter"]]] = None,
+    ) -> List[List[Tuple[int, float, float, List[str]]]]:
+        """
+        Score a batch of needs and return each need's top matches.
+
+        Args:
+            keyword_lists: Extracted keywords, one list per need
+            top_n: Number of top matches to return per need
+            filters: Optional per-need candidate filters (None entries allow everyone)
+
+        Returns:
+            Per need, a list of (contact_pos, final_score, relevance,
+            matching_tags) equal to ``ContactIndex.top_matches``
+        """
+        results: List[List[Tuple[int, float, float, List[str]]]] = []
+        self.candidate_counts = []
+        for start in range(0, len(keyword_lists), self.block_size):
+            block = keyword_lists[start:start + self.block_size]
+            block_filters = filters[start:start + self.block_size] if filters is not None else None
+            results.extend(self._score_block(block, top_n, block_filters))
+        return results
+
+    def _allowed(self, candidate_filter: "CandidateFilter") -> np.ndarray:
+        bits = np.frombuffer(candidate_filter.bits, dtype=np.uint8)
+        return np.unpackbits(bits, bitorder="little")[:len(self.index.contacts)].astype(bool)
+
+    def _score_block(self, block: Sequence[List[str]], top_n: int, filters=None):
+        hits = (self._need_matrix(block) @ self._tag_contacts).tocsr()
+        hits.sort_indices()
+
+        row_ids = np.repeat(np.arange(len(block)), np.diff(hits.indptr))
+        contact_pos = hits.indices
+        levels = np.minimum(hits.data, self._max_hits)
+        keep = levels >= self._min_hits
+        if filters is not None:
+            # Drop candidates outside each need's constraint filter before scoring
+            allowed = np.ones(len(contact_pos), dtype=bool)
+            for row, candidate_filter in enumerate(filters):
+                if candidate_filter is not None:
+                    start, end = hits.indptr[row], hits.indptr[row + 1]
+                    allowed[start:end] = self._allowed(candidate_filter)[contact_pos[start:end]]
+            keep &= allowed
+            self.candidate_counts.extend(
+                int(np.count_nonzero(allowed[start:end]))
+                for start, end in zip(hits.indptr[:-1], hits.indptr[1:])
+            )
+        else:
+            self.candidate_counts.extend(np.diff(hits.indptr).tolist())
+        row_ids, contact_pos, levels = row_ids[keep], contact_pos[keep], levels[keep]
+        keys = self._keys[contact_pos, levels]
+
+        # One sort for the whole block: by need, then rounded score desc,
+        # then network order (the scalar path's stable sort)
+        order = np.lexsort((contact_pos, -keys, row_ids))
+        row_ids, contact_pos, levels = row_ids[order], contact_pos[order], levels[order]
+        starts = np.searchsorted(row_ids, np.arange(len(block)))
+        ends = np.searchsorted(row_ids, np.arange(len(block)), side="right")
+
+        block_results = []
+        for row, keywords in enumerate(block):
+            winners = []
+            stop = min(ends[row], starts[row] + max(top_n, 0))
+            for i in range(starts[row], stop):
+                pos, level = int(contact_pos[i]), int(levels[i])
+                winners.append((
+                    pos,
+                    float(self._scores[pos, level]),
+                    self._relevance[level],
+                    self.index.matching_tags(keywords, pos),
+                ))
+            block_results.append(winners)
+        return block_results
@@ -0,0 +1,269 @@
+"""Bitmap pre-filter for NeedSpec constraints.
+
+The matcher scores contacts on ``keywords_must`` only. This index turns the
+remaining ``NeedSpec`` constraints into a candidate set before any scoring:
+
+- ``geography``: contact location contains one of the places
+- ``target_persona``: title terms (``title``), tags (``industry``), tags or
+  company (``company_type``) and company (``company``); any value of a key
+  may match, every key given must match
+- ``keywords_avoid``: contacts with a tag, title or company containing every
+  word of an avoided keyword are removed
+
+Constraint values match whole words, not the matcher's substring test: a
+tag, title, company or location matches when it contains every word of the
+value, so "ai" matches "AI Ethics" but not "Retail".
+
+Bitmaps are Python ints used as bitsets over contact positions, so AND / OR /
+ANDNOT run in C across the whole network. Per-term bitmaps are built on
+first use from posting lists and cached. The result is a ``CandidateFilter``
+the matchers test in O(1) per contact; small candidate sets are scored
+directly instead of walking the keyword postings.
+
+Contacts without a location never satisfy a geography constraint.
+``contact_allowed`` applies the same rules to a single contact, without an
+index, for matching new contacts against stored needs.
+"""
+import re
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.contact_index import ContactIndex
+from app.contact_store import ContactStore
+from app.models import Contact, NeedSpec
+from app.text import normalized_tokens
+
+
+# Geography values that do not restrict anything
+ANY_GEOGRAPHY = frozenset({"remote", "global", "anywhere", "worldwide"})
+
+# target_persona key -> contact fields its values are matched against
+PERSONA_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "title": ("title",),
+    "industry": ("tags",),
+    "company_type": ("tags", "company"),
+    "company": ("company",),
+}
+
+TEXT_FIELDS = ("title", "company", "location")
+
+_NONZERO_BYTES = re.compile(rb"[^\x00]")
+
+
+class CandidateFilter(NamedTuple):
+    """Contacts allowed by a need's constraints, as a little-endian bitset."""
+    bits: bytes
+    count: int
+
+    def __contains__(self, pos: int) -> bool:
+        return bool(self.bits[pos >> 3] >> (pos & 7) & 1)
+
+    def positions(self) -> List[int]:
+        """Allowed contact positions, ascending."""
+        positions = []
+        for match in _NONZERO_BYTES.finditer(self.bits):
+            base, byte = match.start() << 3, self.bits[match.start()]
+            positions.extend(base + bit for bit in range(8) if byte >> bit & 1)
+        return positions
+
+
+def _as_list(value) -> List[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else [item for item in value if item]
+
+
+def has_constraints(need: NeedSpec) -> bool:
+    """True if the need restricts who may match beyond its keywords."""
+    persona = need.target_persona or {}
+    return bool(
+        need.keywords_avoid
+        or any(place.strip().lower() not in ANY_GEOGRAPHY for place in need.geography or [])
+        or any(_as_list(persona.get(key)) for key in PERSONA_FIELDS)
+    )
+
+
+def _phrase_in(text: str, value: Optional[str]) -> bool:
+    tokens = normalized_tokens(text)
+    return bool(tokens) and set(tokens) <= set(normalized_tokens(value))
+
+
+def contact_allowed(need: NeedSpec, contact: Contact) -> bool:
+    """True if the need's constraints allow this contact (``ConstraintIndex.mask`` for one contact)."""
+    places = [place for place in need.geography or [] if place.strip().lower() not in ANY_GEOGRAPHY]
+    if places and not any(_phrase_in(place, contact.location) for place in places):
+        return False
+
+    persona = need.target_persona or {}
+    for key, fields in PERSONA_FIELDS.items():
+        values = _as_list(persona.get(key))
+        if values and not any(
+            any(_phrase_in(value, tag) for tag in contact.tags)
+            if field == "tags" else _phrase_in(value, getattr(contact, field))
+            for value in values
+            for field in fields
+        ):
+            return False
+
+    return not any(
+        any(_phrase_in(keyword, tag) for tag in contact.tags)
+        or _phrase_in(keyword, contact.title)
+        or _phrase_in(keyword, contact.company)
+        for keyword in need.keywords_avoid
+    )
+
+
+class ConstraintIndex:
+    """Per-term contact bitmaps over a ``ContactIndex``'s network."""
+
+    def __init__(self, index: ContactIndex):
+        self.index = index
+        self.size = len(index)
+        self.all = (1 << self.size) - 1
+        self._nbytes = (self.size + 7) // 8
+
+        # field -> token -> contact positions
+        self._postings: Dict[str, Dict[str, List[int]]] = {field: defaultdict(list) for field in TEXT_FIELDS}
+        for pos in range(self.size):
+            for field in TEXT_FIELDS:
+                for token in set(normalized_tokens(self._value(pos, field))):
+                    self._postings[field][token].append(pos)
+            if not index.is_live(pos):
+                self.all &= ~(1 << pos)
+
+        self._token_bitmaps: Dict[Tuple[str, str], int] = {}
+        self._tag_bitmaps: Dict[int, int] = {}
+        # tag token -> ids of the vocabulary tags containing it, covering the
+        # first ``_tokenized_tags`` tags (extended as the vocabulary grows)
+        self._tag_tokens: Dict[str, List[int]] = defaultdict(list)
+        self._tokenized_tags = 0
+
+    def _value(self, pos: int, field: str) -> Optional[str]:
+        contacts = self.index.contacts
+        if isinstance(contacts, ContactStore):
+            return contacts.field(pos, field)
+        return getattr(contacts[pos], field)
+
+    def _set_bit(self, pos: int, present: bool) -> None:
+        bit = 1 << pos
+        for field in TEXT_FIELDS:
+            for token in set(normalized_tokens(self._value(pos, field))):
+                postings = self._postings[field][token]
+                if present:
+                    postings.append(pos)
+                else:
+                    postings.remove(pos)
+                key = (field, token)
+                if key in self._token_bitmaps:
+                    bitmap = self._token_bitmaps[key]
+                    self._token_bitmaps[key] = bitmap | bit if present else bitmap & ~bit
+        for tag in self.index.contact_tags(pos):
+            tag_id = self.index.vocab[tag.lower()]
+            if tag_id in self._tag_bitmaps:
+                bitmap = self._tag_bitmaps[tag_id]
+                self._tag_bitmaps[tag_id] = bitmap | bit if present else bitmap & ~bit
+        self.all = self.all | bit if present else self.all & ~bit
+
+    def add_position(self, pos: int) -> None:
+        """Index the contact now at ``pos`` (after ``ContactIndex.add_position``)."""
+        if pos >= self.size:
+            self.size = pos + 1
+            self._nbytes = (self.size + 7) // 8
+        self._set_bit(pos, True)
+
+    def remove_position(self, pos: int) -> None:
+        """Drop the contact at ``pos`` (before ``ContactIndex.remove_position``)."""
+        self._set_bit(pos, False)
+
+    def _bitmap(self, positions: Iterable[int]) -> int:
+        bits = bytearray(self._nbytes)
+        for pos in positions:
+            bits[pos >> 3] |= 1 << (pos & 7)
+        return int.from_bytes(bits, "little")
+
+    def _token(self, field: str, token: str) -> int:
+        key = (field, token)
+        bitmap = self._token_bitmaps.get(key)
+        if bitmap is None:
+            postings = self._postings[field].get(token)
+            bitmap = self._bitmap(postings) if postings else 0
+            self._token_bitmaps[key] = bitmap
+        return bitmap
+
+    def phrase(self, field: str, text: str) -> int:
+        """Contacts whose ``field`` contains every token of ``text`` (title, company or location)."""
+        tokens = normalized_tokens(text)
+        if not tokens:
+            return 0
+        bitmap = self.all
+        for token in tokens:
+            bitmap &= self._token(field, token)
+            if not bitmap:
+                break
+        return bitmap
+
+    def _tag(self, tag_id: int) -> int:
+        bitmap = self._tag_bitmaps.get(tag_id)
+        if bitmap is None:
+            bitmap = self._bitmap(pos for pos, _, _ in self.index.postings[tag_id])
+            self._tag_bitmaps[tag_id] = bitmap
+        return bitmap
+
+    def tag_phrase(self, text: str) -> int:
+        """Contacts with a tag containing every token of ``text`` (whole words)."""
+        tokens = normalized_tokens(text)
+        if not tokens:
+            return 0
+        vocab = self.index.vocab
+        if self._tokenized_tags < len(vocab):
+            for tag, tag_id in islice(vocab.items(), self._tokenized_tags, None):
+                for token in set(normalized_tokens(tag)):
+                    self._tag_tokens[token].append(tag_id)
+            self._tokenized_tags = len(vocab)
+        tag_ids = set(self._tag_tokens.get(tokens[0], ()))
+        for token in tokens[1:]:
+            tag_ids.intersection_update(self._tag_tokens.get(token, ()))
+        bitmap = 0
+        for tag_id in tag_ids:
+            bitmap |= self._tag(tag_id)
+        return bitmap
+
+    def _field(self, field: str, value: str) -> int:
+        return self.tag_phrase(value) if field == "tags" else self.phrase(field, value)
+
+    def mask(self, need: NeedSpec) -> Optional[int]:
+        """Bitmap of the contacts allowed by the need's constraints; None if it has none."""
+        mask = None
+
+        places = [place for place in need.geography or [] if place.strip().lower() not in ANY_GEOGRAPHY]
+        if places:
+            mask = 0
+            for place in places:
+                mask |= self.phrase("location", place)
+
+        persona = need.target_persona or {}
+        for key, fields in PERSONA_FIELDS.items():
+            values = _as_list(persona.get(key))
+            if not values:
+                continue
+            allowed = 0
+            for value in values:
+                for field in fields:
+                    allowed |= self._field(field, value)
+            mask = allowed if mask is None else mask & allowed
+
+        if need.keywords_avoid:
+            avoided = 0
+            for keyword in need.keywords_avoid:
+                avoided |= self.tag_phrase(keyword) | self.phrase("title", keyword) | self.phrase("company", keyword)
+            mask = (self.all if mask is None else mask) & ~avoided
+
+        return mask
+
+    def filter(self, need: NeedSpec) -> Optional[CandidateFilter]:
+        """The need's candidate set, or None if every contact may match."""
+        mask = self.mask(need)
+        if mask is None:
+            return None
+        return CandidateFilter(mask.to_bytes(self._nbytes, "little"), mask.bit_count())
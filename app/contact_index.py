@@ -0,0 +1,334 @@
+"""Inverted tag index over the contact network.
+
+Replaces the contact x keyword x tag scan in ``find_matching_contacts`` with a
+tag vocabulary, keyword -> tag containment lists and tag -> contact postings,
+so only contacts sharing at least one matching tag are ever scored.
+
+Top-n selection walks the candidates in descending relationship strength and
+keeps a bounded heap, stopping as soon as no remaining contact can beat the
+current n-th best. Postings hold stable rank keys (strength, then position,
+packed in one int), so contacts can be added, edited and removed in place
+over an ``EditableContactStore`` without rebuilding the index.
+
+An optional ``CandidateFilter`` (see ``app.constraint_index``) restricts which
+contacts may be scored. When it allows fewer contacts than the keyword
+postings would visit, those contacts are scored directly instead.
+"""
+import heapq
+from array import array
+from bisect import bisect_left, insort
+from itertools import groupby
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from app.contact_store import ContactStore, EditableContactStore
+from app.models import Contact
+
+if TYPE_CHECKING:
+    from app.constraint_index import CandidateFilter
+
+
+# Scoring constants shared with find_matching_contacts
+RELEVANCE_PER_HIT = 0.25
+RELEVANCE_WEIGHT = 0.7
+RELATIONSHIP_WEIGHT = 0.3
+MIN_RELEVANCE = 0.2
+
+# Score a filtered candidate set directly when it is this many times smaller
+# than the postings a keyword walk would visit
+DIRECT_SCORING_RATIO = 8
+
+# Keyword -> tag lists kept for keywords outside the precomputed lexicon
+# (least recently used dropped first)
+KEYWORD_CACHE_SIZE = 4096
+
+# Rank keys: descending strength in the high bits (IEEE-754 bit patterns of
+# non-negative doubles sort like their values), network position in the low 32
+_POS_BITS = 32
+_POS_MASK = (1 << _POS_BITS) - 1
+_TOP_STRENGTH_BITS = array("q", array("d", [1.0]).tobytes())[0]
+
+
+def rank_keys(strengths: Sequence, start: int = 0) -> List[int]:
+    """Rank keys of consecutive contacts: ascending key = strength desc, then position."""
+    bits = array("q", array("d", [strength + 0.0 for strength in strengths]).tobytes())
+    return [((_TOP_STRENGTH_BITS - b) << _POS_BITS) | pos for pos, b in enumerate(bits, start)]
+
+
+class ContactIndex:
+    """
+    Prebuilt index giving the same substring-match semantics as the scalar scorer.
+
+    A keyword matches a tag when ``keyword in tag or tag in keyword`` (both
+    lowercased). Every occurrence of a matching tag on a contact counts as one
+    hit worth ``RELEVANCE_PER_HIT``, exactly like the nested loops it replaces.
+    """
+
+    def __init__(self, contacts: Iterable[Contact]):
+        # Sequences (lists, a ContactStore) are kept as-is so a columnar store
+        # is never materialized into one pydantic object per contact
+        self.contacts: Sequence = contacts if isinstance(contacts, Sequence) else list(contacts)
+        if isinstance(self.contacts, ContactStore):
+            self.strengths = self.contacts.strengths
+            tag_lists = (self.contacts.tags(pos) for pos in range(len(self.contacts)))
+        else:
+            self.strengths = [contact.relationship_strength for contact in self.contacts]
+            tag_lists = (contact.tags for contact in self.contacts)
+        self.vocab: Dict[str, int] = {}
+        # tag_id -> [(contact_pos, tag_pos, original_tag), ...]
+        self.postings: List[List[Tuple[int, int, str]]] = []
+        # keyword -> tag ids whose text contains / is contained in the keyword:
+        # every precomputed lexicon keyword, plus an LRU of the others
+        self._lexicon_tags: Dict[str, List[int]] = {}
+        self._keyword_tags: "OrderedDict[str, List[int]]" = OrderedDict()
+        # Running count of candidates scored by top_matches (for run metrics)
+        self.candidates_scored = 0
+
+        for pos, tags in enumerate(tag_lists):
+            for tag_pos, tag in enumerate(tags):
+                tag_id = self.vocab.get(tag.lower())
+                if tag_id is None:
+                    tag_id = len(self.postings)
+                    self.vocab[tag.lower()] = tag_id
+                    self.postings.append([])
+                self.postings[tag_id].append((pos, tag_pos, tag))
+
+        self._vocab_items = list(self.vocab.items())
+
+        # Rank postings list each tag occurrence by rank key (relationship
+        # strength desc, then network order) so candidates can be merged
+        # strongest-first.
+        keys = rank_keys(self.strengths)
+        self._rank_postings: List[List[int]] = [
+            sorted(keys[pos] for pos, _, _ in postings) for postings in self.postings
+        ]
+        # Most occurrences of one tag on a single contact, to cap reachable hits
+        # (an upper bound once contacts are edited)
+        self._max_multiplicity: List[int] = [
+            max((len(list(run)) for _, run in groupby(ranks)), default=0)
+            for ranks in self._rank_postings
+        ]
+
+    def __len__(self) -> int:
+        return len(self.contacts)
+
+    def contact_tags(self, pos: int) -> List[str]:
+        """Tags of the contact at ``pos`` (without materializing store contacts)."""
+        if isinstance(self.contacts, ContactStore):
+            return self.contacts.tags(pos)
+        return self.contacts[pos].tags
+
+    def tags_for_keyword(self, keyword: str) -> List[int]:
+        """Return the ids of every vocabulary tag the keyword matches."""
+        kw = keyword.lower()
+        tag_ids = self._lexicon_tags.get(kw)
+        if tag_ids is not None:
+            return tag_ids
+        tag_ids = self._keyword_tags.get(kw)
+        if tag_ids is not None:
+            self._keyword_tags.move_to_end(kw)
+            return tag_ids
+        tag_ids = self._containing(kw)
+        self._keyword_tags[kw] = tag_ids
+        if len(self._keyword_tags) > KEYWORD_CACHE_SIZE:
+            self._keyword_tags.popitem(last=False)
+        return tag_ids
+
+    def _containing(self, kw: str) -> List[int]:
+        return [tag_id for tag, tag_id in self._vocab_items if kw in tag or tag in kw]
+
+    def precompute(self, keywords: Iterable[str]) -> None:
+        """Warm the keyword -> tag containment lists for a known lexicon (kept for good)."""
+        for keyword in keywords:
+            kw = keyword.lower()
+            if kw not in self._lexicon_tags:
+                self._lexicon_tags[kw] = self._keyword_tags.pop(kw, None) or self._containing(kw)
+
+    # ------------------------------------------------------------------
+    # Incremental updates (over an EditableContactStore)
+    # ------------------------------------------------------------------
+
+    def is_live(self, pos: int) -> bool:
+        """False for the slot of a deleted contact."""
+        return not isinstance(self.contacts, EditableContactStore) or self.contacts.is_live(pos)
+
+    def _new_tag(self, tag: str) -> int:
+        tag_id = len(self.postings)
+        self.vocab[tag] = tag_id
+        self._vocab_items.append((tag, tag_id))
+        self.postings.append([])
+        self._rank_postings.append([])
+        self._max_multiplicity.append(0)
+        # Keep cached containment lists complete (tag ids stay in vocabulary order)
+        for cache in (self._lexicon_tags, self._keyword_tags):
+            for keyword, tag_ids in cache.items():
+                if keyword in tag or tag in keyword:
+                    tag_ids.append(tag_id)
+        return tag_id
+
+    def add_position(self, pos: int) -> None:
+        """Index the contact currently stored at ``pos``."""
+        key = rank_keys([self.strengths[pos]], pos)[0]
+        multiplicity: Dict[int, int] = {}
+        for tag_pos, tag in enumerate(self.contact_tags(pos)):
+            tag_id = self.vocab.get(tag.lower())
+            if tag_id is None:
+                tag_id = self._new_tag(tag.lower())
+            insort(self.postings[tag_id], (pos, tag_pos, tag))
+            insort(self._rank_postings[tag_id], key)
+            multiplicity[tag_id] = multiplicity.get(tag_id, 0) + 1
+        for tag_id, count in multiplicity.items():
+            if count > self._max_multiplicity[tag_id]:
+                self._max_multiplicity[tag_id] = count
+
+    def remove_position(self, pos: int) -> None:
+        """Drop the contact currently stored at ``pos`` from the index (before it changes)."""
+        key = rank_keys([self.strengths[pos]], pos)[0]
+        for tag_id in {self.vocab[tag.lower()] for tag in self.contact_tags(pos)}:
+            postings = self.postings[tag_id]
+            start = end = bisect_left(postings, (pos,))
+            while end < len(postings) and postings[end][0] == pos:
+                end += 1
+            del postings[start:end]
+            ranks = self._rank_postings[tag_id]
+            start = end = bisect_left(ranks, key)
+            while end < len(ranks) and ranks[end] == key:
+                end += 1
+            del ranks[start:end]
+
+    def upsert(self, contact: Contact) -> int:
+        """Add a contact, or replace the one with the same id, in place; returns its position."""
+        store = self._editable()
+        pos = store.positions.get(contact.id)
+        if pos is not None:
+            self.remove_position(pos)
+        pos = store.upsert(contact)
+        self.add_position(pos)
+        return pos
+
+    def delete(self, contact_id: str) -> Optional[int]:
+        """Remove a contact by id; returns the position it had (None if unknown)."""
+        store = self._editable()
+        pos = store.positions.get(contact_id)
+        if pos is not None:
+            self.remove_position(pos)
+            store.delete(contact_id)
+        return pos
+
+    def _editable(self) -> EditableContactStore:
+        if not isinstance(self.contacts, EditableContactStore):
+            raise TypeError("incremental updates need an index built over an EditableContactStore")
+        return self.contacts
+
+    def candidates(self, keywords: List[str]) -> Dict[int, List[str]]:
+        """
+        Collect the matching tags of every contact hit by the keywords.
+
+        Args:
+            keywords: Extracted need keywords
+
+        Returns:
+            Mapping of contact position -> matching tags, in the same
+            keyword-major, tag-order sequence the scalar scan produces
+        """
+        hits: Dict[int, List[Tuple[int, int, str]]] = {}
+        for kw_pos, keyword in enumerate(keywords):
+            for tag_id in self.tags_for_keyword(keyword):
+                for pos, tag_pos, tag in self.postings[tag_id]:
+                    hits.setdefault(pos, []).append((kw_pos, tag_pos, tag))
+
+        return {pos: [tag for _, _, tag in sorted(entries)] for pos, entries in hits.items()}
+
+    def matching_tags(self, keywords: List[str], pos: int) -> List[str]:
+        """Return one contact's matching tags in scalar scan order."""
+        contact_tags = self.contact_tags(pos)
+        tag_ids = [self.vocab[tag.lower()] for tag in contact_tags]
+        matching = []
+        for keyword in keywords:
+            wanted = set(self.tags_for_keyword(keyword))
+            matching.extend(tag for tag, tag_id in zip(contact_tags, tag_ids) if tag_id in wanted)
+        return matching
+
+    def top_matches(
+        self, keywords: List[str], top_n: int, allowed: Optional["CandidateFilter"] = None
+    ) -> List[Tuple[int, float, float, List[str]]]:
+        """
+        Select the best ``top_n`` candidates with a bounded heap.
+
+        Args:
+            keywords: Extracted need keywords
+            top_n: Number of top matches to return
+            allowed: Only contacts in this filter may match (None: everyone)
+
+        Returns:
+            List of (contact_pos, final_score, relevance, matching_tags), ordered
+            like the scalar scorer (rounded score desc, then network order)
+        """
+        if top_n <= 0 or (allowed is not None and not allowed.count):
+            return []
+
+        tag_ids = [tag_id for keyword in keywords for tag_id in self.tags_for_keyword(keyword)]
+        streams = [self._rank_postings[tag_id] for tag_id in tag_ids]
+        if allowed is not None and allowed.count * DIRECT_SCORING_RATIO < sum(len(stream) for stream in streams):
+            return self._top_matches_among(keywords, allowed.positions(), top_n)
+
+        # Best relevance any contact can reach for this query: every stream
+        # contributes at most its tag's multiplicity, and relevance is capped
+        max_hits = sum(self._max_multiplicity[tag_id] for tag_id in tag_ids)
+        relevance_cap = RELEVANCE_WEIGHT * min(RELEVANCE_PER_HIT * max_hits, 1.0)
+
+        # Min-heap of (rounded score, -pos, score, relevance): the root is the
+        # current n-th best, the one a new candidate has to beat
+        heap: List[Tuple[float, int, float, float]] = []
+        strengths = self.strengths
+        current, hits, scored = -1, 0, 0
+        for key in heapq.merge(*streams):
+            if key != current:
+                if current >= 0 and (allowed is None or current & _POS_MASK in allowed):
+                    self._offer(heap, top_n, current & _POS_MASK, hits)
+                    scored += 1
+                if len(heap) == top_n and round(
+                    relevance_cap + RELATIONSHIP_WEIGHT * strengths[key & _POS_MASK], 2
+                ) < heap[0][0]:
+                    current = -1
+                    break
+                current, hits = key, 0
+            hits += 1
+        if current >= 0 and (allowed is None or current & _POS_MASK in allowed):
+            self._offer(heap, top_n, current & _POS_MASK, hits)
+            scored += 1
+        self.candidates_scored += scored
+
+        return [
+            (-neg_pos, final_score, relevance, self.matching_tags(keywords, -neg_pos))
+            for _, neg_pos, final_score, relevance in sorted(heap, reverse=True)
+        ]
+
+    def _top_matches_among(
+        self, keywords: List[str], positions: List[int], top_n: int
+    ) -> List[Tuple[int, float, float, List[str]]]:
+        """Score only ``positions`` (ascending), with the same ordering as ``top_matches``."""
+        entries = []
+        for pos in positions:
+            matching = self.matching_tags(keywords, pos)
+            relevance = min(RELEVANCE_PER_HIT * len(matching), 1.0)
+            if relevance <= MIN_RELEVANCE:
+                continue
+            final_score = (RELEVANCE_WEIGHT * relevance) + (RELATIONSHIP_WEIGHT * self.strengths[pos])
+            entries.append((-round(final_score, 2), pos, final_score, relevance, matching))
+        self.candidates_scored += len(positions)
+        entries.sort(key=lambda entry: entry[:2])
+        return [(pos, final_score, relevance, matching) for _, pos, final_score, relevance, matching in entries[:top_n]]
+
+    def _offer(self, heap: list, top_n: int, pos: int, hits: int) -> None:
+        """Score one candidate from its hit count and keep it if it makes the top n."""
+        relevance = min(RELEVANCE_PER_HIT * hits, 1.0)
+        if relevance <= MIN_RELEVANCE:
+            return
+        final_score = (RELEVANCE_WEIGHT * relevance) + (RELATIONSHIP_WEIGHT * self.strengths[pos])
+        entry = (round(final_score, 2), -pos, final_score, relevance)
+        if len(heap) < top_n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
@@ -0,0 +1,466 @@
+"""External contact store.
+
+Stream-parses contact files (JSON array or JSONL), maps both the native
+``Contact`` schema and the ``data/contacts.example.json`` schema (skills,
+industry, current_role, interests, ...) onto ``Contact``, and keeps the
+network in a compact columnar form:
+
+- every string lives once in a UTF-8 string pool, columns hold offsets into it
+- tags are interned ids in a CSR layout (per-contact offsets into one id array)
+- relationship strengths are an ``array('d')``
+
+A store saves to a binary snapshot that is memory-mapped on load, so opening
+a large network is a header read rather than a parse.
+"""
+import hashlib
+import json
+import mmap
+import sys
+from array import array
+from collections.abc import Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+from app.models import Contact
+
+
+SNAPSHOT_MAGIC = b"NBHCSNP1"
+READ_CHUNK_CHARS = 1 << 16
+
+# Optional string columns, in Contact field order
+STRING_FIELDS = (
+    "id", "name", "title", "company", "location", "profile_url",
+    "last_interaction", "notes", "source",
+)
+# String id marking a missing optional value
+NULL = 0xFFFFFFFF
+
+# Relationship descriptions in the example schema -> relationship_strength.
+# First phrase found in the (lowercased) description wins.
+RELATIONSHIP_STRENGTHS = (
+    ("close friend", 0.9),
+    ("best friend", 0.9),
+    ("close colleague", 0.8),
+    ("friend", 0.7),
+    ("former colleague", 0.6),
+    ("colleague", 0.6),
+    ("classmate", 0.6),
+    ("client", 0.5),
+    ("acquaintance", 0.4),
+)
+
+
+# ============================================================================
+# STREAMING PARSERS
+# ============================================================================
+
+def _iter_json_array(f: TextIO) -> Iterator[dict]:
+    """Yield the objects of a top-level JSON array without loading the file."""
+    decoder = json.JSONDecoder()
+    buf, pos = f.read(READ_CHUNK_CHARS), 0
+
+    def skip(chars: str) -> None:
+        nonlocal buf, pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf):
+                return
+            buf, pos = f.read(READ_CHUNK_CHARS), 0
+            if not buf:
+                raise ValueError("Unexpected end of JSON array")
+
+    skip(" \t\r\n")
+    if buf[pos] != "[":
+        raise ValueError("File is not a JSON array")
+    pos += 1
+
+    while True:
+        skip(" \t\r\n,")
+        if buf[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            more = f.read(READ_CHUNK_CHARS)
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield record
+        pos = end
+        if pos >= READ_CHUNK_CHARS:
+            buf, pos = buf[pos:], 0
+
+
+def iter_json_records(path: Union[str, Path]) -> Iterator[dict]:
+    """
+    Stream the objects of a JSON array or JSONL file.
+
+    Args:
+        path: Input file; a leading ``[`` means JSON array, anything else JSONL
+
+    Returns:
+        Iterator of record dicts, one at a time
+    """
+    with open(path, encoding="utf-8") as f:
+        first = ""
+        while not first:
+            char = f.read(1)
+            if not char:
+                return
+            if not char.isspace():
+                first = char
+        f.seek(0)
+
+        if first == "[":
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def iter_contact_records(path: Union[str, Path]) -> Iterator[dict]:
+    """Stream raw contact records from a JSON array or JSONL contacts file."""
+    return iter_json_records(path)
+
+
+def _relationship_strength(description: str) -> float:
+    description = description.lower()
+    for phrase, strength in RELATIONSHIP_STRENGTHS:
+        if phrase in description:
+            return strength
+    return Contact.model_fields["relationship_strength"].default
+
+
+def contact_from_record(record: dict) -> Contact:
+    """
+    Map a record in either supported schema onto ``Contact``.
+
+    Records already carrying ``tags`` or ``title`` are treated as native
+    ``Contact`` data. Example-schema records map current_role/current_company/
+    linkedin_url onto title/company/profile_url, and skills, industry and
+    interests onto tags.
+    """
+    if "tags" in record or "title" in record or ("current_role" not in record and "skills" not in record):
+        return Contact(**record)
+
+    tags = list(record.get("skills", []))
+    if record.get("industry"):
+        tags.append(record["industry"])
+    tags.extend(record.get("interests", []))
+
+    notes = record.get("notes", "")
+    if record.get("relationship_context"):
+        notes = f"{notes} {record['relationship_context']}".strip()
+
+    identity = record.get("linkedin_url") or record.get("email") or record["name"]
+    return Contact(
+        id=record.get("id") or "c_" + hashlib.sha1(identity.encode("utf-8")).hexdigest()[:12],
+        name=record["name"],
+        title=record.get("current_role"),
+        company=record.get("current_company"),
+        location=record.get("location"),
+        profile_url=record.get("linkedin_url"),
+        relationship_strength=_relationship_strength(record.get("relationship", "")),
+        last_interaction=record.get("last_interaction"),
+        tags=tags,
+        notes=notes,
+        source=record.get("source", "import"),
+    )
+
+
+def iter_contacts(path: Union[str, Path]) -> Iterator[Contact]:
+    """Stream ``Contact`` objects from a JSON array or JSONL contacts file."""
+    for record in iter_contact_records(path):
+        yield contact_from_record(record)
+
+
+# ============================================================================
+# COLUMNAR STORE
+# ============================================================================
+
+class _StringPool:
+    """Append-only interned UTF-8 string pool used while building a store."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NULL
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.offsets) - 1
+            self._ids[value] = string_id
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return string_id
+
+
+class ContactStore(Sequence):
+    """
+    Columnar, read-only contact network.
+
+    Behaves as a ``Sequence[Contact]``: indexing materializes one ``Contact``
+    on demand. Hot paths (indexing, ranking) should use ``strengths``,
+    ``tag_ids`` and ``tag_vocab`` instead, which never build pydantic objects.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence], pool: Union[bytes, memoryview], source=None):
+        self._columns = columns
+        self._pool = pool
+        self._pool_offsets = columns["pool_offsets"]
+        self.strengths = columns["strengths"]
+        self._tag_offsets = columns["tag_offsets"]
+        self._tag_ids = columns["tag_ids"]
+        self.tag_vocab: List[str] = [self._string(i) for i in columns["tag_vocab"]]
+        self._source = source  # keeps a snapshot's mmap alive
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def from_contacts(cls, contacts: Iterable[Contact]) -> "ContactStore":
+        """Build a store from any iterable of contacts, one contact at a time."""
+        pool = _StringPool()
+        strings = {field: array("I") for field in STRING_FIELDS}
+        strengths = array("d")
+        tag_offsets = array("Q", [0])
+        tag_ids = array("I")
+        tag_vocab = array("I")
+        tag_lookup: Dict[str, int] = {}
+
+        for contact in contacts:
+            for field in STRING_FIELDS:
+                value = getattr(contact, field)
+                if isinstance(value, datetime):
+                    value = value.isoformat()
+                strings[field].append(pool.intern(value))
+            strengths.append(contact.relationship_strength)
+            for tag in contact.tags:
+                tag_id = tag_lookup.get(tag)
+                if tag_id is None:
+                    tag_id = len(tag_vocab)
+                    tag_lookup[tag] = tag_id
+                    tag_vocab.append(pool.intern(tag))
+                tag_ids.append(tag_id)
+            tag_offsets.append(len(tag_ids))
+
+        columns = {f"str_{field}": column for field, column in strings.items()}
+        columns.update(
+            pool_offsets=pool.offsets,
+            strengths=strengths,
+            tag_offsets=tag_offsets,
+            tag_ids=tag_ids,
+            tag_vocab=tag_vocab,
+        )
+        return cls(columns, bytes(pool.data))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ContactStore":
+        """Stream-parse a JSON array / JSONL contacts file into a store."""
+        return cls.from_contacts(iter_contacts(path))
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "ContactStore":
+        """Open a snapshot if the file is one, otherwise parse it as contacts JSON."""
+        with open(path, "rb") as f:
+            is_snapshot = f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+        return cls.open_snapshot(path) if is_snapshot else cls.load(path)
+
+    # --------------------------------------------------------------- snapshot
+
+    def save_snapshot(self, path: Union[str, Path]) -> Path:
+        """
+        Write the store as a binary snapshot.
+
+        Layout: magic, header length (little-endian u64), JSON header describing each
+        section's offset, byte length and array typecode, then the 8-byte
+        aligned sections themselves.
+        """
+        path = Path(path)
+        sections = [("pool", b"", "B")]
+        for name, column in self._columns.items():
+            sections.append((name, column, column.format if isinstance(column, memoryview) else column.typecode))
+
+        layout, offset = {}, 0
+        for name, column, typecode in sections:
+            nbytes = len(self._pool) if name == "pool" else len(column) * array(typecode).itemsize
+            layout[name] = [offset, nbytes, typecode]
+            offset += (nbytes + 7) & ~7
+        header = json.dumps({
+            "count": len(self),
+            "byteorder": sys.byteorder,
+            "sections": layout,
+        }).encode("utf-8")
+        header += b" " * (-(len(SNAPSHOT_MAGIC) + 8 + len(header)) % 8)
+
+        with open(path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for name, column, _ in sections:
+                data = self._pool if name == "pool" else column
+                raw = bytes(data) if isinstance(data, memoryview) else (
+                    data if isinstance(data, bytes) else data.tobytes()
+                )
+                f.write(raw)
+                f.write(b"\0" * (-len(raw) % 8))
+        return path
+
+    @classmethod
+    def open_snapshot(cls, path: Union[str, Path]) -> "ContactStore":
+        """Memory-map a snapshot; columns are zero-copy views into the file."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a contact snapshot")
+        header_len = int.from_bytes(mapped[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 8], "little")
+        body = len(SNAPSHOT_MAGIC) + 8
+        header = json.loads(mapped[body:body + header_len])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+
+        view = memoryview(mapped)
+        base = body + header_len
+        columns = {}
+        for name, (offset, nbytes, typecode) in header["sections"].items():
+            section = view[base + offset:base + offset + nbytes]
+            columns[name] = section if name == "pool" else section.cast(typecode)
+        pool = columns.pop("pool")
+        return cls(columns, pool, source=mapped)
+
+    # ----------------------------------------------------------------- access
+
+    def __len__(self) -> int:
+        return len(self.strengths)
+
+    def _string(self, string_id: int) -> Optional[str]:
+        if string_id == NULL:
+            return None
+        start, end = self._pool_offsets[string_id], self._pool_offsets[string_id + 1]
+        return str(self._pool[start:end], "utf-8")
+
+    def field(self, pos: int, name: str) -> Optional[str]:
+        """Return one string field of a contact without building the Contact."""
+        return self._string(self._columns[f"str_{name}"][pos])
+
+    def tag_ids(self, pos: int) -> Sequence:
+        """Interned tag ids of one contact (indices into ``tag_vocab``)."""
+        return self._tag_ids[self._tag_offsets[pos]:self._tag_offsets[pos + 1]]
+
+    def tags(self, pos: int) -> List[str]:
+        """Tags of one contact, in their original order."""
+        return [self.tag_vocab[tag_id] for tag_id in self.tag_ids(pos)]
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError("contact index out of range")
+        values = {field: self.field(pos, field) for field in STRING_FIELDS}
+        return Contact(
+            relationship_strength=self.strengths[pos],
+            tags=self.tags(pos),
+            **{field: value for field, value in values.items() if value is not None},
+        )
+
+    def close(self) -> None:
+        """Release a memory-mapped snapshot; the store is unusable afterwards."""
+        if self._source is not None:
+            for column in self._columns.values():
+                if isinstance(column, memoryview):
+                    column.release()
+            if isinstance(self._pool, memoryview):
+                self._pool.release()
+            self._source.close()
+            self._source = None
+
+
+class EditableContactStore(ContactStore):
+    """
+    A ``ContactStore`` with in-memory edits over a read-only base store.
+
+    Positions never move: an edit replaces the contact at its position, a new
+    contact is appended and a deletion leaves an empty slot (no fields, no
+    tags), so positions held by indexes stay valid. Contacts are addressed by
+    id. ``save_snapshot`` writes the live contacts as a fresh store.
+    """
+
+    def __init__(self, base: ContactStore):
+        super().__init__(base._columns, base._pool, source=base._source)
+        self.base = base
+        self.strengths = array("d", base.strengths)
+        # position -> current contact (None once deleted), for edited and added contacts
+        self._changed: Dict[int, Optional[Contact]] = {}
+        self.positions: Dict[str, int] = {base.field(pos, "id"): pos for pos in range(len(base))}
+        self.deleted = 0
+
+    @classmethod
+    def from_contacts(cls, contacts: Iterable[Contact]) -> "EditableContactStore":
+        return cls(ContactStore.from_contacts(contacts))
+
+    def __len__(self) -> int:
+        return len(self.strengths)
+
+    def __iter__(self) -> Iterator[Contact]:
+        """Live contacts, in network order."""
+        for pos in range(len(self)):
+            if self.is_live(pos):
+                yield self[pos]
+
+    def is_live(self, pos: int) -> bool:
+        return self._changed.get(pos, True) is not None
+
+    def field(self, pos: int, name: str) -> Optional[str]:
+        if pos not in self._changed:
+            return super().field(pos, name)
+        contact = self._changed[pos]
+        value = None if contact is None else getattr(contact, name)
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def tags(self, pos: int) -> List[str]:
+        if pos not in self._changed:
+            return super().tags(pos)
+        contact = self._changed[pos]
+        return [] if contact is None else list(contact.tags)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice) or pos not in self._changed:
+            return super().__getitem__(pos)
+        contact = self._changed[pos]
+        if contact is None:
+            raise KeyError(f"contact at position {pos} was deleted")
+        return contact
+
+    def upsert(self, contact: Contact) -> int:
+        """Add a contact, or replace the one with the same id; returns its position."""
+        pos = self.positions.get(contact.id)
+        if pos is None:
+            pos = len(self.strengths)
+            self.strengths.append(contact.relationship_strength)
+            self.positions[contact.id] = pos
+        else:
+            self.strengths[pos] = contact.relationship_strength
+        self._changed[pos] = contact
+        return pos
+
+    def delete(self, contact_id: str) -> Optional[int]:
+        """Delete a contact by id; returns the position it had (None if unknown)."""
+        pos = self.positions.pop(contact_id, None)
+        if pos is not None:
+            self._changed[pos] = None
+            self.strengths[pos] = 0.0
+            self.deleted += 1
+        return pos
+
+    def save_snapshot(self, path: Union[str, Path]) -> Path:
+        return ContactStore.from_contacts(iter(self)).save_snapshot(path)
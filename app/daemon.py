@@ -0,0 +1,596 @@
+"""Long-running matcher service with a warm contact index.
+
+Every cron job and CLI run otherwise pays for interpreter startup, the
+contacts parse and the index build before matching a single post. The daemon
+does that once and serves the agent tools over local HTTP, on a TCP port or
+a Unix socket::
+
+    python -m app.daemon --contacts data/contacts.json --port 8787
+    python -m app.daemon --contacts data/contacts.json --socket state/matcher.sock
+
+Endpoints (JSON in, JSON out):
+
+- ``POST /extract`` ``{"post_text", "author_name"}``: ``extract_need_from_post``
+- ``POST /match`` ``{"need", "top_n"}``: ``find_matching_contacts``
+- ``POST /match_batch`` ``{"needs", "top_n"}``: ``match_batch``
+- ``POST /draft`` ``{"matches", "channel", "author_name"}``: ``generate_intro_messages``
+- ``POST /process`` ``{"post_text", "author_name", "top_n"}``: need, matches
+  and drafts in one call (``ConnectorPipeline.process_payload``)
+- ``POST /reload``: apply contacts file changes now
+- ``GET /health``: contact counts, reloads, uptime
+
+The contacts file is polled every ``DAEMON_WATCH_INTERVAL`` seconds. Once a
+change has been stable for one poll, the file is re-read in the background:
+records whose content is unchanged are skipped by fingerprint, only new and
+edited records are parsed, and adds, edits and deletes are applied to the
+live index in place (``ConnectorPipeline.upsert_contacts`` /
+``delete_contacts``). Deleted contacts leave empty slots; when they exceed
+``COMPACT_RATIO`` of the network the pipeline is rebuilt from the live
+contacts and swapped in. Snapshots are copied into memory rather than
+mapped, so the file can be rewritten while the daemon runs. With a semantic
+index, added and edited contacts are left out of its hits and matched by
+keywords only until it is rebuilt.
+
+Tool calls and reloads are serialized on one lock. ``MatcherClient`` calls a
+running daemon; the linkedin monitor uses it when ``MATCHER_URL`` is set.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from app.contact_index import ContactIndex
+from app.contact_store import (
+    SNAPSHOT_MAGIC,
+    ContactStore,
+    EditableContactStore,
+    contact_from_record,
+    iter_contact_records,
+)
+from app.metrics import METRICS
+from app.models import Contact
+from app.need_extractor import NEED_EXTRACTOR
+from app.pipeline import (
+    ConnectorPipeline,
+    drafts_to_payload,
+    need_from_payload,
+    need_to_payload,
+    ranked_from_payload,
+    ranking_to_payload,
+)
+
+
+# Where the daemon listens (DAEMON_SOCKET selects a Unix socket instead)
+DAEMON_HOST = os.getenv("DAEMON_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.getenv("DAEMON_PORT", "8787"))
+DAEMON_SOCKET = os.getenv("DAEMON_SOCKET")
+
+# Seconds between contacts file checks (0 disables watching)
+DAEMON_WATCH_INTERVAL = float(os.getenv("DAEMON_WATCH_INTERVAL", "2"))
+
+# Rebuild the index once deleted slots exceed this share of the network
+COMPACT_RATIO = 0.25
+
+# Daemon clients connect to: http://host:port or unix://path/to/socket
+MATCHER_URL = os.getenv("MATCHER_URL")
+
+
+class ReloadResult(NamedTuple):
+    """Contact changes applied by one reload."""
+    added: int
+    updated: int
+    deleted: int
+    compacted: bool
+    elapsed_ms: float
+
+    @property
+    def changed(self) -> int:
+        return self.added + self.updated + self.deleted
+
+
+class MatcherError(RuntimeError):
+    """A daemon request failed (bad request, server error or unreachable daemon)."""
+
+
+class BadRequest(ValueError):
+    """A request payload is missing a field or has one of the wrong shape (answered with 400)."""
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+def _is_snapshot(path: Union[str, Path]) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+
+def _is_jsonl(path: Union[str, Path]) -> bool:
+    with open(path, "rb") as f:
+        return f.read(4096).lstrip()[:1] not in (b"[", b"")
+
+
+def _file_entries(path: Union[str, Path]) -> Iterator[Tuple[int, Callable[[], Contact]]]:
+    """(content fingerprint, contact factory) for every contact in a contacts file or snapshot."""
+    if _is_snapshot(path):
+        store = ContactStore.open_snapshot(path)
+        try:
+            for pos in range(len(store)):
+                contact = store[pos]
+                yield hash(contact.model_dump_json()), lambda contact=contact: contact
+        finally:
+            store.close()
+    elif _is_jsonl(path):
+        # Unchanged lines are recognized without parsing them
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield hash(line), lambda line=line: contact_from_record(json.loads(line))
+    else:
+        for record in iter_contact_records(path):
+            yield hash(json.dumps(record, sort_keys=True, default=str)), lambda record=record: contact_from_record(record)
+
+
+def build_pipeline(store: EditableContactStore, semantic_dir: Optional[str] = None) -> ConnectorPipeline:
+    """A pipeline over an editable store, with the extractor's keywords precomputed."""
+    index = ContactIndex(store)
+    index.precompute(NEED_EXTRACTOR.keywords)
+    semantic = None
+    if semantic_dir:
+        from app.semantic_index import SemanticIndex
+        semantic = SemanticIndex.open(semantic_dir, store)
+    return ConnectorPipeline(index, semantic=semantic)
+
+
+class MatcherService:
+    """
+    The warm pipeline behind the daemon.
+
+    Serves the agent tools from one ``ConnectorPipeline`` over an
+    ``EditableContactStore`` and keeps it in step with the contacts file.
+    """
+
+    def __init__(self, contacts_file: Optional[str] = None, semantic_dir: Optional[str] = None):
+        from app.agent import MY_CONTACTS
+
+        self.contacts_file = contacts_file
+        self.semantic_dir = semantic_dir
+        self.lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.started = time.time()
+        self.reloads = 0
+        self.last_reload: Optional[ReloadResult] = None
+        # content fingerprint -> contact id, for the contacts file as last applied
+        self._fingerprints: Dict[int, str] = {}
+        self._stamp = self._pending = None
+
+        if contacts_file:
+            self._stamp = self._file_stamp()
+            store = EditableContactStore.from_contacts(self._load_file())
+        else:
+            store = EditableContactStore.from_contacts(MY_CONTACTS)
+        self._install(build_pipeline(store, semantic_dir))
+
+    def _install(self, pipeline: ConnectorPipeline) -> None:
+        from app.agent import set_pipeline
+
+        self.pipeline = pipeline
+        set_pipeline(pipeline)
+
+    def _load_file(self) -> Iterator[Contact]:
+        for fingerprint, make_contact in _file_entries(self.contacts_file):
+            contact = make_contact()
+            self._fingerprints[fingerprint] = contact.id
+            yield contact
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.contacts_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    # ----------------------------------------------------------------- reload
+
+    def check(self, force: bool = False) -> Optional[ReloadResult]:
+        """
+        Reload the contacts file if it changed.
+
+        A change is only applied once the file looked the same on two checks
+        in a row, so a file being written is not read half-way; ``force``
+        applies it immediately.
+
+        Returns:
+            The applied changes, or None if nothing was reloaded
+        """
+        if not self.contacts_file:
+            return None
+        with self._reload_lock:
+            stamp = self._file_stamp()
+            if stamp is None or stamp == self._stamp:
+                self._pending = None
+                return None
+            if not force and stamp != self._pending:
+                self._pending = stamp
+                return None
+            result = self.reload()
+            self._stamp, self._pending = stamp, None
+            return result
+
+    def reload(self) -> ReloadResult:
+        """Diff the contacts file against the network and apply the changes in place."""
+        started = time.perf_counter()
+        fingerprints: Dict[int, str] = {}
+        changed: Dict[str, Contact] = {}
+        for fingerprint, make_contact in _file_entries(self.contacts_file):
+            contact_id = self._fingerprints.get(fingerprint)
+            if contact_id is None:
+                contact = make_contact()
+                contact_id = contact.id
+                changed[contact_id] = contact
+            fingerprints[fingerprint] = contact_id
+
+        live_ids = set(fingerprints.values())
+        store = self.pipeline.index.contacts
+        deleted_ids = [contact_id for contact_id in store.positions if contact_id not in live_ids]
+        added = sum(1 for contact_id in changed if contact_id not in store.positions)
+
+        with self.lock:
+            self.pipeline.upsert_contacts(changed.values())
+            self.pipeline.delete_contacts(deleted_ids)
+        self._fingerprints = fingerprints
+
+        compacted = self.semantic_dir is None and store.deleted > COMPACT_RATIO * len(store)
+        if compacted:
+            # Positions change, so build the replacement before swapping it in
+            pipeline = build_pipeline(EditableContactStore.from_contacts(iter(store)))
+            with self.lock:
+                self._install(pipeline)
+            METRICS.incr("contact_compactions")
+
+        self.reloads += 1
+        METRICS.incr("contact_reloads")
+        self.last_reload = ReloadResult(
+            added=added,
+            updated=len(changed) - added,
+            deleted=len(deleted_ids),
+            compacted=compacted,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+        return self.last_reload
+
+    def watch(self, interval: float = DAEMON_WATCH_INTERVAL) -> threading.Event:
+        """Check the contacts file every ``interval`` seconds in a background thread; set the event to stop."""
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                try:
+                    result = self.check()
+                except Exception as e:
+                    print(f"⚠️  Contacts reload failed, keeping the current network: {e}")
+                    continue
+                if result is not None:
+                    print(f"🔄 Contacts reloaded: {result.added} added, {result.updated} updated, "
+                          f"{result.deleted} deleted in {result.elapsed_ms:.0f}ms"
+                          + (" (compacted)" if result.compacted else ""))
+
+        if self.contacts_file and interval > 0:
+            threading.Thread(target=run, name="contacts-watcher", daemon=True).start()
+        return stop
+
+    # ------------------------------------------------------------------ tools
+
+    def call(self, endpoint: str, payload: dict) -> str:
+        """
+        Run one endpoint.
+
+        Args:
+            endpoint: Name from ``ENDPOINTS``
+            payload: Parsed request body
+
+        Returns:
+            The JSON response body
+        """
+        handler = ENDPOINTS[endpoint]
+        if endpoint == "reload":
+            result = self.check(force=True)
+            return json.dumps(result._asdict() if result is not None else None)
+        with self.lock:
+            return handler(self.pipeline, payload)
+
+    def health(self) -> dict:
+        store = self.pipeline.index.contacts
+        return {
+            "contacts": len(store.positions),
+            "deleted_slots": store.deleted,
+            "contacts_file": self.contacts_file,
+            "reloads": self.reloads,
+            "last_reload": self.last_reload._asdict() if self.last_reload is not None else None,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+
+_REQUIRED = object()
+_JSON_TYPES = {str: "string", int: "integer", dict: "object", list: "array"}
+
+
+def _field(payload: dict, key: str, kind: type, default=_REQUIRED, parse: Optional[Callable] = None):
+    """
+    One request field, checked against its expected type.
+
+    Args:
+        parse: Optional conversion of the value (or of each item of a list),
+            e.g. ``need_from_payload``; its errors mean malformed content
+
+    Raises:
+        BadRequest: the field is missing, has the wrong type or does not parse
+    """
+    if key not in payload and default is _REQUIRED:
+        raise BadRequest(f"{key} is required")
+    value = payload.get(key, default)
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise BadRequest(f"{key} must be a JSON {_JSON_TYPES[kind]}")
+    if kind is list and not all(isinstance(item, dict) for item in value):
+        raise BadRequest(f"{key} must be a list of JSON objects")
+    if parse is None:
+        return value
+    try:
+        return [parse(item) for item in value] if kind is list else parse(value)
+    except (KeyError, TypeError, ValueError) as e:
+        raise BadRequest(f"invalid {key}: {e!r}") from e
+
+
+def _extract(pipeline: ConnectorPipeline, payload: dict) -> str:
+    need = pipeline.extract(_field(payload, "post_text", str), _field(payload, "author_name", str, "someone"))
+    return json.dumps(need_to_payload(need))
+
+
+def _match(pipeline: ConnectorPipeline, payload: dict) -> str:
+    need = _field(payload, "need", dict, parse=need_from_payload)
+    ranking = pipeline.rank(need, _field(payload, "top_n", int, 3))
+    return json.dumps(ranking_to_payload(need, ranking), default=str)
+
+
+def _match_batch(pipeline: ConnectorPipeline, payload: dict) -> str:
+    needs = _field(payload, "needs", list, parse=need_from_payload)
+    rankings = pipeline.rank_batch(needs, _field(payload, "top_n", int, 3))
+    return json.dumps([ranking_to_payload(need, ranking) for need, ranking in zip(needs, rankings)], default=str)
+
+
+def _draft(pipeline: ConnectorPipeline, payload: dict) -> str:
+    ranked = _field(payload, "matches", list, parse=ranked_from_payload)
+    channel = _field(payload, "channel", str, "linkedin_dm")
+    if channel not in pipeline.drafter.channels:
+        raise BadRequest(f"channel must be one of {pipeline.drafter.channels}")
+    author_name = _field(payload, "author_name", str, "")
+    need = need_from_payload({"author": author_name}) if author_name else None
+    return json.dumps(drafts_to_payload(ranked, pipeline.draft_batch(ranked, need, channels=(channel,))), indent=2)
+
+
+def _process(pipeline: ConnectorPipeline, payload: dict) -> str:
+    result = pipeline.process_payload(
+        _field(payload, "post_text", str),
+        _field(payload, "author_name", str, "someone"),
+        _field(payload, "top_n", int, 3),
+    )
+    return json.dumps(result, default=str)
+
+
+# POST endpoint -> handler(pipeline, payload) returning the JSON body
+ENDPOINTS: Dict[str, Callable[[ConnectorPipeline, dict], str]] = {
+    "extract": _extract,
+    "match": _match,
+    "match_batch": _match_batch,
+    "draft": _draft,
+    "process": _process,
+    "reload": None,
+}
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive: clients reuse one connection for all their calls
+    protocol_version = "HTTP/1.1"
+    server_version = "NetworkBountyMatcher/1.0"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/health":
+            self._send(200, json.dumps(self.server.service.health()))
+        else:
+            self._send(404, json.dumps({"error": f"unknown endpoint {self.path}"}))
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # The body cannot be skipped, so the connection cannot be reused
+            self.close_connection = True
+            self._send(400, json.dumps({"error": "invalid Content-Length"}))
+            return
+        body = self.rfile.read(length)
+        endpoint = self.path.strip("/")
+        if endpoint not in ENDPOINTS:
+            self._send(404, json.dumps({"error": f"unknown endpoint {self.path}"}))
+            return
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise ValueError("request body must be a JSON object")
+        except ValueError as e:
+            self._send(400, json.dumps({"error": f"invalid JSON: {e}"}))
+            return
+
+        METRICS.incr("daemon_requests")
+        try:
+            response = self.server.service.call(endpoint, payload)
+        except BadRequest as e:
+            METRICS.incr("daemon_bad_requests")
+            self._send(400, json.dumps({"error": f"bad request: {e}"}))
+            return
+        except Exception as e:
+            METRICS.incr("daemon_errors")
+            self._send(500, json.dumps({"error": str(e)}))
+            return
+        self._send(200, response)
+
+
+class _TCPHandler(_Handler):
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: MatcherService, host: str = DAEMON_HOST, port: int = DAEMON_PORT, socket_path: Optional[str] = None):
+    """An HTTP server for the service on ``host:port``, or on a Unix socket if ``socket_path`` is given."""
+    if socket_path:
+        Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _TCPHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class MatcherClient:
+    """
+    Calls a running matcher daemon.
+
+    ``url`` is ``http://host:port`` or ``unix://`` followed by the socket
+    path. Each thread keeps its own persistent connection; a dropped
+    keep-alive connection is reopened and the call retried once.
+    """
+
+    def __init__(self, url: Optional[str] = MATCHER_URL, timeout: float = 30.0):
+        if not url:
+            raise ValueError("no matcher url (set MATCHER_URL)")
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.url.startswith("unix://"):
+            return _UnixConnection(self.url[len("unix://"):], self.timeout)
+        parts = urlsplit(self.url)
+        return http.client.HTTPConnection(parts.hostname or DAEMON_HOST, parts.port or DAEMON_PORT, timeout=self.timeout)
+
+    def _request(self, method: str, endpoint: str, body: Optional[bytes]):
+        connection = getattr(self._local, "connection", None)
+        for attempt in range(2):
+            if connection is None:
+                connection = self._local.connection = self._connect()
+            try:
+                connection.request(method, f"/{endpoint}", body, {"Content-Type": "application/json"} if body else {})
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError) as e:
+                connection.close()
+                connection = self._local.connection = None
+                if attempt:
+                    raise MatcherError(f"matcher daemon at {self.url} unreachable: {e}") from e
+            except OSError as e:
+                connection.close()
+                self._local.connection = None
+                raise MatcherError(f"matcher daemon at {self.url} unreachable: {e}") from e
+
+    def call(self, endpoint: str, payload: Optional[dict] = None):
+        """POST ``payload`` to an endpoint and return the parsed response."""
+        status, body = self._request("POST", endpoint, json.dumps(payload or {}, default=str).encode("utf-8"))
+        result = json.loads(body)
+        if status != 200:
+            raise MatcherError(f"{endpoint}: {result.get('error', status)}")
+        return result
+
+    def process(self, post_text: str, author_name: str = "someone", top_n: int = 3) -> dict:
+        """``ConnectorPipeline.process_payload`` on the daemon."""
+        return self.call("process", {"post_text": post_text, "author_name": author_name, "top_n": top_n})
+
+    def health(self) -> dict:
+        status, body = self._request("GET", "health", None)
+        if status != 200:
+            raise MatcherError(f"health: HTTP {status}")
+        return json.loads(body)
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the matcher tools from a warm, self-updating contact index.")
+    parser.add_argument("--contacts", default=os.getenv("CONTACTS_FILE"), help="Contacts file or snapshot to serve and watch (default CONTACTS_FILE, else the demo contacts)")
+    parser.add_argument("--semantic-index", default=os.getenv("SEMANTIC_INDEX_DIR"), help="Semantic index directory for the same contacts")
+    parser.add_argument("--host", default=DAEMON_HOST)
+    parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--watch-interval", type=float, default=DAEMON_WATCH_INTERVAL, help="Seconds between contacts file checks (0 = no watching)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    service = MatcherService(args.contacts, args.semantic_index)
+    server = make_server(service, args.host, args.port, args.socket)
+    stop = service.watch(args.watch_interval)
+    where = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{server.server_address[1]}"
+    print(f"✅ Serving {len(service.pipeline.index.contacts.positions):,} contacts on {where} "
+          f"(ready in {(time.perf_counter() - started):.1f}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Batch intro draft generation.
+
+Intro messages are data: one template per channel (``MessageDraft.channel``)
+and direction (to the poster, to your contact). Templates are checked and
+compiled once; a batch then computes each contact's fields once and renders
+every channel and direction from them with a single ``format_map`` call per
+draft, so drafting every candidate of every post stays cheap.
+
+Each channel has a body length limit. An over-long draft first gives up the
+end of the contact's notes, then is cut at the limit.
+"""
+from string import Formatter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.models import MessageDraft, RankedContact
+
+
+# ============================================================================
+# TEMPLATES
+# ============================================================================
+
+# Fields a template may use; all are computed once per contact
+TEMPLATE_FIELDS = frozenset({
+    "poster", "contact_name", "first_name", "title", "company", "expertise", "notes",
+})
+
+# Shortened first when a draft is over its channel's limit
+ELASTIC_FIELD = "notes"
+ELLIPSIS = "…"
+
+EXPERTISE_IN_DRAFT = 2
+
+# channel -> (to_poster, to_contact) as (subject, body); subject None for channels without one
+DRAFT_TEMPLATES: Dict[str, Tuple[Tuple[Optional[str], str], Tuple[Optional[str], str]]] = {
+    "linkedin_dm": (
+        (
+            None,
+            "Hi! Saw your post and thought I could help connect you with someone perfect.\n\n"
+            "I'd like to introduce you to {contact_name}, {title} at {company}. "
+            "They have deep expertise in {expertise} which aligns directly with what you're looking for.\n\n"
+            "Notes: {notes}\n\n"
+            "Would you be open to a quick intro call? Happy to facilitate.",
+        ),
+        (
+            None,
+            "Hi {first_name},\n\n"
+            "I came across someone on LinkedIn who's looking for help with {expertise} - "
+            "right up your alley!\n\n"
+            "They seem like a great fit for your expertise. Would you be open to a quick intro? "
+            "Happy to connect you if you have 15-20 mins to chat with them.\n\n"
+            "Let me know!",
+        ),
+    ),
+    "email": (
+        (
+            "Intro to {contact_name} ({expertise})",
+            "Hi {poster},\n\n"
+            "I saw your LinkedIn post and know someone who could help: {contact_name}, {title} at {company}, "
+            "who works on {expertise}.\n\n"
+            "A bit more about them: {notes}\n\n"
+            "If useful, I'm happy to make a quick email intro - just reply and I'll connect you both.\n\n"
+            "Best,",
+        ),
+        (
+            "Someone looking for help with {expertise}",
+            "Hi {first_name},\n\n"
+            "{poster} posted on LinkedIn looking for help with {expertise}, and you came to mind right away.\n\n"
+            "Would you be open to an intro? A 15-20 minute call would probably be enough to see if there's a fit. "
+            "No pressure either way.\n\n"
+            "Best,",
+        ),
+    ),
+    "warm_intro": (
+        (
+            "{poster} <> {contact_name}",
+            "{poster}, meet {contact_name}, {title} at {company} and someone I trust on {expertise}. "
+            "{contact_name}, {poster} is looking for help in exactly that area.\n\n"
+            "{notes}\n\n"
+            "I'll let you two take it from here.",
+        ),
+        (
+            "{contact_name} <> {poster}",
+            "{contact_name}, meet {poster}, who is looking for help with {expertise}. "
+            "{poster}, {contact_name} is {title} at {company} and the best person I know for this.\n\n"
+            "I'll let you two take it from here.",
+        ),
+    ),
+}
+
+# Maximum body length per channel (LinkedIn InMail body, a short email, a forwardable intro)
+CHANNEL_LIMITS: Dict[str, int] = {
+    "linkedin_dm": 1900,
+    "email": 5000,
+    "warm_intro": 1200,
+}
+SUBJECT_LIMIT = 200
+
+DEFAULT_CHANNELS = ("linkedin_dm",)
+DEFAULT_POSTER = "there"
+
+
+class CompiledTemplate(NamedTuple):
+    """A checked template and what is needed to enforce its channel limit."""
+    text: str
+    uses_elastic: bool
+    limit: int
+
+
+def compile_template(text: str, limit: int) -> CompiledTemplate:
+    """
+    Check a template's fields once, up front.
+
+    Raises:
+        ValueError: If the template uses a field outside TEMPLATE_FIELDS or
+            a format spec / conversion
+    """
+    fields = set()
+    for _, field, spec, conversion in Formatter().parse(text):
+        if field is None:
+            continue
+        if field not in TEMPLATE_FIELDS or spec or conversion:
+            raise ValueError(f"Unsupported template field {{{field}}} in {text[:40]!r}...")
+        fields.add(field)
+    return CompiledTemplate(text, ELASTIC_FIELD in fields, limit)
+
+
+def _fit(template: CompiledTemplate, fields: dict) -> Tuple[str, bool]:
+    """Render ``template``; returns (text, truncated)."""
+    text = template.text.format_map(fields)
+    overflow = len(text) - template.limit
+    if overflow <= 0:
+        return text, False
+    if template.uses_elastic:
+        notes = fields[ELASTIC_FIELD]
+        keep = len(notes) - overflow - len(ELLIPSIS)
+        if keep > 0:
+            return template.text.format_map(dict(fields, notes=notes[:keep].rstrip() + ELLIPSIS)), True
+        text = template.text.format_map(dict(fields, notes=""))
+    if len(text) > template.limit:
+        text = text[:template.limit - len(ELLIPSIS)] + ELLIPSIS
+    return text, True
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+class DraftEngine:
+    """Renders intro drafts for many matches, channels and directions in one call."""
+
+    def __init__(
+        self,
+        templates: Optional[Dict[str, Tuple[Tuple[Optional[str], str], Tuple[Optional[str], str]]]] = None,
+        limits: Optional[Dict[str, int]] = None,
+    ):
+        templates = DRAFT_TEMPLATES if templates is None else templates
+        limits = CHANNEL_LIMITS if limits is None else limits
+        # channel -> ((subject, body) to the poster, (subject, body) to the contact)
+        self._compiled: Dict[str, tuple] = {}
+        for channel, directions in templates.items():
+            self._compiled[channel] = tuple(
+                (
+                    compile_template(subject, SUBJECT_LIMIT) if subject is not None else None,
+                    compile_template(body, limits[channel]),
+                )
+                for subject, body in directions
+            )
+        self.truncated = 0  # drafts shortened to fit a channel limit
+
+    @property
+    def channels(self) -> List[str]:
+        return list(self._compiled)
+
+    @staticmethod
+    def fields(ranked: RankedContact, poster: str = DEFAULT_POSTER) -> dict:
+        """Template fields for one match."""
+        contact = ranked.contact
+        name_parts = contact.name.split()
+        return {
+            "poster": poster,
+            "contact_name": contact.name,
+            "first_name": name_parts[0] if name_parts else contact.name,
+            "title": contact.title,
+            "company": contact.company,
+            "expertise": ", ".join(ranked.matching_expertise[:EXPERTISE_IN_DRAFT]),
+            "notes": contact.notes,
+        }
+
+    def render(self, fields: dict, channel: str = "linkedin_dm", to_poster: bool = True) -> MessageDraft:
+        """Render one draft from precomputed ``fields``."""
+        subject_template, body_template = self._compiled[channel][0 if to_poster else 1]
+        body, truncated = _fit(body_template, fields)
+        subject = None
+        if subject_template is not None:
+            subject, subject_truncated = _fit(subject_template, fields)
+            truncated = truncated or subject_truncated
+        if truncated:
+            self.truncated += 1
+        return MessageDraft(channel=channel, subject=subject, body=body, char_count=len(body))
+
+    def render_batch(
+        self,
+        ranked_contacts: Sequence[RankedContact],
+        poster: str = DEFAULT_POSTER,
+        channels: Iterable[str] = DEFAULT_CHANNELS,
+        directions: Sequence[bool] = (True, False),
+    ) -> List[List[MessageDraft]]:
+        """
+        Drafts for every match, channel and direction.
+
+        Args:
+            ranked_contacts: Matches, e.g. ``RankingResponse.ranked_contacts``
+            poster: Name of the person who posted the need
+            channels: Channels to draft for, in output order
+            directions: True drafts to the poster, False to your contact
+
+        Returns:
+            One list per match, ordered by channel then direction
+        """
+        channels = tuple(channels)
+        for channel in channels:
+            if channel not in self._compiled:
+                raise ValueError(f"No templates for channel {channel!r}; have {', '.join(self._compiled)}")
+        render = self.render
+        return [
+            [render(fields, channel, to_poster) for channel in channels for to_poster in directions]
+            for fields in (self.fields(ranked, poster) for ranked in ranked_contacts)
+        ]
+
+
+DRAFT_ENGINE = DraftEngine()
@@ -0,0 +1,301 @@
+"""Entity resolution of signal leads against the contact network.
+
+Signal dumps (``SignalDump`` records from linkedin, rss, jobs, github, events
+runs, as a JSON array or JSONL file) are stream-parsed one dump at a time.
+Every ``PersonLead`` is resolved to one of:
+
+- ``known``: an existing contact
+- ``duplicate``: the same person as an earlier lead in the ingestion, or a
+  likely but uncertain match to a contact (worth a manual look)
+- ``new``: nobody we know yet
+
+Comparing every lead with every contact is O(leads x contacts). Instead each
+record gets a few blocking keys (profile URL, normalized full name, last name
+plus first initial, company plus last name) and only records sharing a key are
+scored, with a cheap weighted name / company / location similarity. Blocks
+larger than ``MAX_BLOCK_SIZE`` (very common names) are skipped, so resolution
+stays near-linear in the number of leads plus contacts.
+"""
+import argparse
+import json
+from collections import defaultdict
+from collections.abc import Sequence
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit
+
+from app.contact_store import ContactStore, iter_json_records
+from app.metrics import METRICS, MetricsRegistry
+from app.models import PersonLead
+from app.text import normalized_tokens
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+NAME_AFFIXES = frozenset("mr mrs ms miss mx dr prof sir jr sr ii iii iv phd md mba cpa esq".split())
+COMPANY_SUFFIXES = frozenset("the inc llc ltd limited co corp corporation company gmbh plc sa ag bv".split())
+
+
+def name_tokens(name: Optional[str]) -> Tuple[str, ...]:
+    """Name tokens without honorifics and degree suffixes ("Dr. Sarah Chen, PhD" -> sarah, chen)."""
+    return tuple(token for token in normalized_tokens(name) if token not in NAME_AFFIXES)
+
+
+def company_key(company: Optional[str]) -> str:
+    """Company name without legal suffixes ("GreenPack Solutions, Inc." -> "greenpack solutions")."""
+    return " ".join(token for token in normalized_tokens(company) if token not in COMPANY_SUFFIXES)
+
+
+def profile_key(url: Optional[str]) -> str:
+    """Host and path of a profile URL, without scheme, www / country subdomain, query or trailing slash."""
+    url = (url or "").strip().lower()
+    if not url:
+        return ""
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    host = parts.netloc
+    if host.startswith("www."):
+        host = host[4:]
+    if host.endswith(".linkedin.com"):
+        host = "linkedin.com"  # uk.linkedin.com/in/x is linkedin.com/in/x
+    return host + parts.path.rstrip("/")
+
+
+class EntityRecord(NamedTuple):
+    """Normalized identity fields of a contact or lead."""
+    id: str
+    name: Tuple[str, ...]
+    company: str
+    profile: str
+    location: frozenset
+
+    @classmethod
+    def of(cls, id_: str, name: Optional[str], company: Optional[str], profile_url: Optional[str], location: Optional[str]) -> "EntityRecord":
+        return cls(id_, name_tokens(name), company_key(company), profile_key(profile_url), frozenset(normalized_tokens(location)))
+
+    def blocking_keys(self) -> List[str]:
+        keys = []
+        if self.profile:
+            keys.append("u:" + self.profile)
+        if self.name:
+            keys.append("n:" + " ".join(sorted(self.name)))
+            if len(self.name) > 1:
+                last = self.name[-1]
+                keys.append(f"i:{last} {self.name[0][0]}")
+                if self.company:
+                    keys.append(f"c:{self.company} {last}")
+        return keys
+
+
+# ============================================================================
+# SIMILARITY
+# ============================================================================
+
+NAME_WEIGHT = 0.6
+COMPANY_WEIGHT = 0.3
+LOCATION_WEIGHT = 0.1
+UNKNOWN = 0.5  # a field missing on either side neither supports nor contradicts a match
+URL_CONFLICT_CAP = 0.5  # two different profile URLs are two different people
+
+MATCH_THRESHOLD = 0.8
+POSSIBLE_THRESHOLD = 0.65
+MAX_BLOCK_SIZE = 64
+
+
+def _first_names_compatible(a: str, b: str) -> bool:
+    """Initials and prefixes: "s" / "sarah", "sam" / "samantha"."""
+    short, full = (a, b) if len(a) <= len(b) else (b, a)
+    return full.startswith(short) and (len(short) == 1 or len(short) >= 3)
+
+
+def name_similarity(a: Tuple[str, ...], b: Tuple[str, ...]) -> float:
+    if not a or not b:
+        return 0.0
+    if a == b or set(a) == set(b):
+        return 1.0
+    if a[-1] == b[-1] and len(a) > 1 and len(b) > 1:
+        if a[0] == b[0]:
+            return 0.95  # middle names differ
+        return 0.85 if _first_names_compatible(a[0], b[0]) else 0.5
+    # Typos and transliterations: character-level similarity, discounted
+    return 0.8 * SequenceMatcher(None, " ".join(a), " ".join(b)).ratio()
+
+
+def similarity(a: EntityRecord, b: EntityRecord) -> float:
+    """Weighted identity similarity of two records, 0-1."""
+    if a.profile and b.profile and a.profile == b.profile:
+        return 1.0
+    score = NAME_WEIGHT * name_similarity(a.name, b.name)
+    if a.company and b.company:
+        score += COMPANY_WEIGHT * (a.company == b.company)
+    else:
+        score += COMPANY_WEIGHT * UNKNOWN
+    if a.location and b.location:
+        score += LOCATION_WEIGHT * bool(a.location & b.location)
+    else:
+        score += LOCATION_WEIGHT * UNKNOWN
+    if a.profile and b.profile:
+        score = min(score, URL_CONFLICT_CAP)
+    return score
+
+
+class BlockingIndex:
+    """Blocking key -> record positions, with best-match lookup over the candidate blocks."""
+
+    def __init__(self, max_block_size: int = MAX_BLOCK_SIZE):
+        self.records: List[EntityRecord] = []
+        self.max_block_size = max_block_size
+        self._blocks: Dict[str, List[int]] = defaultdict(list)
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, record: EntityRecord) -> int:
+        pos = len(self.records)
+        self.records.append(record)
+        for key in record.blocking_keys():
+            self._blocks[key].append(pos)
+        return pos
+
+    def best_match(self, record: EntityRecord) -> Tuple[Optional[int], float]:
+        """Best scoring record sharing a blocking key with ``record``; (None, 0.0) if none."""
+        best_pos, best_score = None, 0.0
+        seen: Set[int] = set()
+        for key in record.blocking_keys():
+            block = self._blocks.get(key)
+            if not block or (len(block) > self.max_block_size and not key.startswith("u:")):
+                continue
+            for pos in block:
+                if pos in seen:
+                    continue
+                seen.add(pos)
+                score = similarity(record, self.records[pos])
+                if score > best_score or (score == best_score and best_pos is not None and pos < best_pos):
+                    best_pos, best_score = pos, score
+                    if score >= 1.0:
+                        self.comparisons += len(seen)
+                        return best_pos, best_score
+        self.comparisons += len(seen)
+        return best_pos, best_score
+
+
+# ============================================================================
+# RESOLUTION
+# ============================================================================
+
+class ResolvedLead(NamedTuple):
+    """Resolution of one person lead."""
+    lead: PersonLead
+    source: str
+    dump_id: str
+    status: str  # "known" | "duplicate" | "new"
+    match_id: Optional[str]  # contact id, the earlier lead it duplicates, or its own lead id if new
+    score: float  # similarity to the match (for new leads: to the closest record found)
+
+    def to_payload(self) -> dict:
+        return {
+            "status": self.status,
+            "match_id": self.match_id,
+            "score": round(self.score, 2),
+            "source": self.source,
+            "dump_id": self.dump_id,
+            "lead": self.lead.model_dump(mode="json"),
+        }
+
+
+def _contact_records(contacts: Sequence) -> Iterator[EntityRecord]:
+    if isinstance(contacts, ContactStore):
+        for pos in range(len(contacts)):
+            yield EntityRecord.of(
+                contacts.field(pos, "id"), contacts.field(pos, "name"), contacts.field(pos, "company"),
+                contacts.field(pos, "profile_url"), contacts.field(pos, "location"),
+            )
+    else:
+        for contact in contacts:
+            yield EntityRecord.of(contact.id, contact.name, contact.company, contact.profile_url, contact.location)
+
+
+def iter_person_leads(dumps: Iterable[dict]) -> Iterator[Tuple[str, str, PersonLead]]:
+    """(source, dump id, lead) for every person item of raw ``SignalDump`` records."""
+    for dump in dumps:
+        source, dump_id = dump.get("source", "manual"), dump.get("id", "")
+        for item in dump.get("items", []):
+            if item.get("type") == "person":
+                yield source, dump_id, PersonLead(**item["data"])
+
+
+class LeadResolver:
+    """Resolves person leads against a contact network and against each other."""
+
+    def __init__(self, contacts: Sequence, metrics: MetricsRegistry = METRICS, max_block_size: int = MAX_BLOCK_SIZE):
+        self.metrics = metrics
+        self.contacts = BlockingIndex(max_block_size)
+        with metrics.stage("resolve_index"):
+            for record in _contact_records(contacts):
+                self.contacts.add(record)
+        self.leads = BlockingIndex(max_block_size)
+
+    def resolve(self, lead: PersonLead, source: str = "manual", dump_id: str = "") -> ResolvedLead:
+        """Resolve one lead; new leads are remembered so later copies resolve as duplicates."""
+        record = EntityRecord.of(
+            f"lead:{len(self.leads)}", lead.name, lead.company, lead.profile_url, lead.location,
+        )
+        contact_pos, contact_score = self.contacts.best_match(record)
+        if contact_pos is not None and contact_score >= MATCH_THRESHOLD:
+            return ResolvedLead(lead, source, dump_id, "known", self.contacts.records[contact_pos].id, contact_score)
+
+        lead_pos, lead_score = self.leads.best_match(record)
+        if lead_pos is not None and lead_score >= MATCH_THRESHOLD:
+            return ResolvedLead(lead, source, dump_id, "duplicate", self.leads.records[lead_pos].id, lead_score)
+        if contact_pos is not None and contact_score >= POSSIBLE_THRESHOLD:
+            return ResolvedLead(lead, source, dump_id, "duplicate", self.contacts.records[contact_pos].id, contact_score)
+
+        self.leads.add(record)
+        return ResolvedLead(lead, source, dump_id, "new", record.id, max(contact_score, lead_score))
+
+    def resolve_dumps(self, dumps: Iterable[dict]) -> Iterator[ResolvedLead]:
+        """Resolve every person lead of raw ``SignalDump`` records, one lead at a time."""
+        for source, dump_id, lead in iter_person_leads(dumps):
+            with self.metrics.stage("resolve"):
+                resolved = self.resolve(lead, source, dump_id)
+            self.metrics.incr(f"leads_{resolved.status}")
+            yield resolved
+
+
+def resolve_files(
+    contacts: Sequence,
+    paths: Iterable[Union[str, Path]],
+    metrics: MetricsRegistry = METRICS,
+) -> Iterator[ResolvedLead]:
+    """Stream-resolve the person leads of one or more signal dump files."""
+    resolver = LeadResolver(contacts, metrics)
+    for path in paths:
+        yield from resolver.resolve_dumps(iter_json_records(path))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Resolve signal dump leads against your contacts.")
+    parser.add_argument("dumps", nargs="+", help="SignalDump files (JSON array or JSONL)")
+    parser.add_argument("--contacts", required=True, help="Contacts file (JSON array, JSONL or snapshot)")
+    parser.add_argument("--output", help="Write one JSON line per resolved lead here")
+    args = parser.parse_args(argv)
+
+    counts = {"known": 0, "duplicate": 0, "new": 0}
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for resolved in resolve_files(ContactStore.open(args.contacts), args.dumps):
+            counts[resolved.status] += 1
+            if output is not None:
+                output.write(json.dumps(resolved.to_payload(), separators=(",", ":")) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+    print(f"✅ {sum(counts.values()):,} leads: {counts['new']:,} new, {counts['known']:,} known contacts, "
+          f"{counts['duplicate']:,} likely duplicates")
+
+
+if __name__ == "__main__":
+    main()
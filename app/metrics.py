@@ -0,0 +1,264 @@
+"""Run metrics: per-stage timings, counters and latency histograms.
+
+Every pipeline stage (search, parse, extract, match, draft, save) is timed
+with ``METRICS.stage(name)``, which records wall time into a per-stage
+histogram and adds the CPU time spent in the process. Counters track volumes
+(posts seen, posts skipped, candidates scored, ...). A run ends by writing a
+snapshot as JSON or in the Prometheus text exposition format.
+
+CPU time is process CPU time, so for stages that overlap (concurrent
+searches) it includes whatever else ran in the meantime.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+
+NAMESPACE = "nbh"
+
+# Histogram bucket upper bounds in seconds (the last bucket is +Inf)
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style) with interpolated quantiles."""
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, fraction: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= target:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                estimate = lower + (upper - lower) * (target - seen) / bucket_count
+                return min(estimate, self.max)
+            seen += bucket_count
+        return self.max
+
+
+class StageTiming:
+    """Wall and CPU time of one stage execution, filled in when the stage exits."""
+
+    __slots__ = ("stage", "wall_ms", "cpu_ms")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+
+
+class MetricsRegistry:
+    """Thread-safe collection of counters, histograms and stage timings."""
+
+    def __init__(self, namespace: str = NAMESPACE):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop everything recorded so far (e.g. at the start of a run)."""
+        with self._lock:
+            self.counters: Dict[str, float] = {}
+            self.histograms: Dict[str, Histogram] = {}
+            self.stages: Dict[str, Histogram] = {}
+            self.stage_cpu: Dict[str, float] = {}
+            self.started_at = time.time()
+
+    # ------------------------------------------------------------------ record
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Record one value in a named histogram."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(bounds)
+            histogram.observe(value)
+
+    def record_stage(self, stage: str, wall_seconds: float, cpu_seconds: float) -> None:
+        """Record one execution of a stage timed elsewhere."""
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(wall_seconds)
+            self.stage_cpu[stage] = self.stage_cpu.get(stage, 0.0) + cpu_seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTiming]:
+        """
+        Time a block as one execution of stage ``name``.
+
+        Yields:
+            A StageTiming whose ``wall_ms`` / ``cpu_ms`` are set on exit
+        """
+        timing = StageTiming(name)
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        try:
+            yield timing
+        finally:
+            wall = time.perf_counter() - wall_started
+            cpu = time.process_time() - cpu_started
+            timing.wall_ms, timing.cpu_ms = wall * 1000, cpu * 1000
+            self.record_stage(name, wall, cpu)
+
+    # ------------------------------------------------------------------ merge
+
+    def export_state(self) -> dict:
+        """Raw, picklable state, e.g. to send a worker process's metrics to its parent."""
+        def histograms(items):
+            return {name: (h.bounds, h.counts, h.count, h.sum, h.max) for name, h in items.items()}
+
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": histograms(self.histograms),
+                "stages": histograms(self.stages),
+                "stage_cpu": dict(self.stage_cpu),
+            }
+
+    def merge_state(self, state: dict) -> None:
+        """Add the state exported by another registry to this one."""
+        def merge(target: Dict[str, Histogram], items: dict) -> None:
+            for name, (bounds, counts, count, total, largest) in items.items():
+                histogram = target.get(name)
+                if histogram is None:
+                    histogram = target[name] = Histogram(bounds)
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.count += count
+                histogram.sum += total
+                histogram.max = max(histogram.max, largest)
+
+        with self._lock:
+            for name, value in state["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for stage, cpu in state["stage_cpu"].items():
+                self.stage_cpu[stage] = self.stage_cpu.get(stage, 0.0) + cpu
+            merge(self.histograms, state["histograms"])
+            merge(self.stages, state["stages"])
+
+    # ------------------------------------------------------------------ export
+
+    @staticmethod
+    def _histogram_summary(histogram: Histogram) -> dict:
+        return {
+            "count": histogram.count,
+            "total_ms": round(histogram.sum * 1000, 3),
+            "mean_ms": round(histogram.sum * 1000 / histogram.count, 3) if histogram.count else 0.0,
+            "p50_ms": round(histogram.quantile(0.50) * 1000, 3),
+            "p99_ms": round(histogram.quantile(0.99) * 1000, 3),
+            "max_ms": round(histogram.max * 1000, 3),
+        }
+
+    def snapshot(self) -> dict:
+        """JSON-serializable view of everything recorded."""
+        with self._lock:
+            stages = {}
+            for stage, histogram in self.stages.items():
+                stages[stage] = self._histogram_summary(histogram)
+                stages[stage]["cpu_ms"] = round(self.stage_cpu.get(stage, 0.0) * 1000, 3)
+            return {
+                "started_at": self.started_at,
+                "elapsed_s": round(time.time() - self.started_at, 3),
+                "counters": dict(self.counters),
+                "stages": stages,
+                "histograms": {name: self._histogram_summary(h) for name, h in self.histograms.items()},
+            }
+
+    @staticmethod
+    def _prometheus_histogram(name: str, histogram: Histogram, labels: str = "") -> List[str]:
+        prefix = f"{labels}," if labels else ""
+        bounds = [repr(float(bound)) for bound in histogram.bounds] + ["+Inf"]
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(bounds, histogram.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.sum!r}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+        return lines
+
+    def to_prometheus(self) -> str:
+        """Snapshot in the Prometheus text exposition format."""
+        ns = self.namespace
+        with self._lock:
+            lines = []
+            for name in sorted(self.counters):
+                metric = f"{ns}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {self.counters[name]!r}")
+
+            if self.stages:
+                metric = f"{ns}_stage_wall_seconds"
+                lines.append(f"# HELP {metric} Wall time per pipeline stage execution")
+                lines.append(f"# TYPE {metric} histogram")
+                for stage in sorted(self.stages):
+                    lines.extend(self._prometheus_histogram(metric, self.stages[stage], f'stage="{stage}"'))
+
+                metric = f"{ns}_stage_cpu_seconds_total"
+                lines.append(f"# HELP {metric} Process CPU time spent inside each pipeline stage")
+                lines.append(f"# TYPE {metric} counter")
+                for stage in sorted(self.stage_cpu):
+                    lines.append(f'{metric}{{stage="{stage}"}} {self.stage_cpu[stage]!r}')
+
+            for name in sorted(self.histograms):
+                metric = f"{ns}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                lines.extend(self._prometheus_histogram(metric, self.histograms[name]))
+            return "\n".join(lines) + "\n"
+
+    def write(self, path: Union[str, Path], fmt: Optional[str] = None) -> Path:
+        """
+        Write a snapshot to ``path``.
+
+        Args:
+            path: Output file
+            fmt: "json" or "prometheus"; by default ``.prom`` / ``.txt`` files
+                get Prometheus text and everything else JSON
+
+        Returns:
+            The path written
+        """
+        path = Path(path)
+        fmt = fmt or ("prometheus" if path.suffix in (".prom", ".txt") else "json")
+        if fmt not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format {fmt!r}; expected 'json' or 'prometheus'")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if fmt == "prometheus":
+            path.write_text(self.to_prometheus(), encoding="utf-8")
+        else:
+            path.write_text(json.dumps(self.snapshot(), indent=2) + "\n", encoding="utf-8")
+        return path
+
+
+# Process-wide registry shared by the pipeline and the monitor
+METRICS = MetricsRegistry()
@@ -109,6 +109,7 @@ class RankedContact(BaseModel):
     recency_score: float = Field(default=0.5, ge=0, le=1)
     connector_bonus: float = Field(default=0, ge=0, le=0.5)
     risk_discount: float = Field(default=0, ge=-0.5, le=0)
+    matching_expertise: List[str] = Field(default_factory=list)  # tags that matched the need
 
 
 class MessageDraft(BaseModel):
@@ -162,6 +163,7 @@ class RankingResponse(BaseModel):
     ranked_contacts: List[RankedContact]
     total_candidates: int
     ranking_time_ms: float
+    cpu_time_ms: float = 0.0
 
 
 class DraftResponse(BaseModel):
@@ -169,3 +171,4 @@ class DraftResponse(BaseModel):
     drafts: List[MessageDraft]
     contact_id: str
     generation_time_ms: float
+    cpu_time_ms: float = 0.0
@@ -0,0 +1,192 @@
+"""Single-pass need extraction for LinkedIn posts.
+
+The keyword and need-type rules of ``extract_need_from_post`` live here as a
+data-driven lexicon, compiled once into an Aho-Corasick automaton that finds
+every surface form in one pass over the lowercased post text.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# ============================================================================
+# LEXICON
+# ============================================================================
+
+# A post only expresses a need if one of these appears
+NEED_TRIGGERS = ("looking for", "need", "seeking")
+
+# keyword -> surface forms, in the order keywords are reported
+KEYWORD_LEXICON: Dict[str, Tuple[str, ...]] = {
+    "packaging": ("packaging",),
+    "bioplastics": ("bioplastic", "bio-plastic"),
+    "sustainability": ("sustainable", "sustainability"),
+    "materials": ("material",),
+    "engineer": ("engineer",),
+    "supplier": ("supplier", "vendor"),
+    "investment": ("investor", "funding"),
+    "partnerships": ("partner",),
+    "advice": ("advice", "help"),
+    "certification": ("certification", "certified"),
+    "food-packaging": ("food",),
+}
+
+# (need_type, surface forms) in priority order; the first rule that hits wins
+NEED_TYPE_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("hire", ("hire", "hiring")),
+    ("investment", ("invest", "funding")),
+    ("partnership", ("partner",)),
+    ("supplier", ("supplier", "vendor")),
+)
+DEFAULT_NEED_TYPE = "advice/intro"
+NO_NEED_TYPE = "unknown"
+
+CONTEXT_CHARS = 200
+
+
+# ============================================================================
+# AHO-CORASICK AUTOMATON
+# ============================================================================
+
+class PatternAutomaton:
+    """Aho-Corasick automaton reporting which patterns occur anywhere in a text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str) -> None:
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (pattern_id,)
+
+    def _link(self) -> None:
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, nxt in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def find(self, text: str) -> Set[int]:
+        """Return the ids of every pattern occurring in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        total = len(self.patterns)
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+                if len(found) == total:
+                    break
+        return found
+
+
+# ============================================================================
+# EXTRACTOR
+# ============================================================================
+
+class NeedExtractor:
+    """Compiled keyword / need-type extractor built from a lexicon."""
+
+    def __init__(
+        self,
+        triggers: Iterable[str] = NEED_TRIGGERS,
+        keyword_lexicon: Optional[Dict[str, Tuple[str, ...]]] = None,
+        need_type_rules: Iterable[Tuple[str, Tuple[str, ...]]] = NEED_TYPE_RULES,
+    ):
+        keyword_lexicon = KEYWORD_LEXICON if keyword_lexicon is None else keyword_lexicon
+        self.keywords: List[str] = list(keyword_lexicon)
+        self.need_types: List[str] = [need_type for need_type, _ in need_type_rules]
+
+        # surface form -> (kind, index) labels; kinds: trigger, keyword, need_type
+        labels: Dict[str, List[Tuple[str, int]]] = {}
+        for form in triggers:
+            labels.setdefault(form, []).append(("trigger", 0))
+        for i, forms in enumerate(keyword_lexicon.values()):
+            for form in forms:
+                labels.setdefault(form, []).append(("keyword", i))
+        for i, (_, forms) in enumerate(need_type_rules):
+            for form in forms:
+                labels.setdefault(form, []).append(("need_type", i))
+
+        self._automaton = PatternAutomaton(labels)
+        self._labels = [labels[form] for form in self._automaton.patterns]
+
+    def scan(self, post_text: str) -> Tuple[str, List[str]]:
+        """
+        Find the need type and keywords of a post in one pass.
+
+        Args:
+            post_text: The full text of the LinkedIn post
+
+        Returns:
+            (need_type, keywords) with keywords in lexicon order
+        """
+        triggered = False
+        keyword_hits: Set[int] = set()
+        need_type_hits: Set[int] = set()
+        for pattern_id in self._automaton.find(post_text.lower()):
+            for kind, i in self._labels[pattern_id]:
+                if kind == "trigger":
+                    triggered = True
+                elif kind == "keyword":
+                    keyword_hits.add(i)
+                else:
+                    need_type_hits.add(i)
+
+        if not triggered:
+            return NO_NEED_TYPE, []
+
+        keywords = [self.keywords[i] for i in sorted(keyword_hits)]
+        need_type = self.need_types[min(need_type_hits)] if need_type_hits else DEFAULT_NEED_TYPE
+        return need_type, keywords
+
+    def extract(self, post_text: str, author_name: str = "someone") -> dict:
+        """Return the extracted need dict produced by ``extract_need_from_post``."""
+        need_type, keywords = self.scan(post_text)
+        return {
+            "author": author_name,
+            "need_type": need_type,
+            "keywords": keywords,
+            "context": post_text[:CONTEXT_CHARS]
+        }
+
+    def extract_many(self, posts: Iterable[dict]) -> List[dict]:
+        """
+        Extract needs for a batch of posts.
+
+        Args:
+            posts: Post dicts with ``post_text`` and optional ``author_name``
+
+        Returns:
+            One extracted need dict per post, in input order
+        """
+        return [
+            self.extract(post.get("post_text", ""), post.get("author_name", "someone"))
+            for post in posts
+        ]
+
+
+NEED_EXTRACTOR = NeedExtractor()
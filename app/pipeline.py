@@ -0,0 +1,542 @@
+"""Typed in-process connector pipeline.
+
+extract -> rank -> draft -> summarize, passing ``NeedSpec``, ``RankedContact``,
+``RankingResponse`` and ``MessageDraft`` objects directly between stages. The
+agent tools and output writers convert to and from JSON payloads only at the
+edge, through the ``*_payload`` helpers below.
+
+Every stage is timed into ``app.metrics.METRICS`` (or the registry passed
+in), and the timings are also returned in the response models.
+
+With a ``SemanticIndex`` the pipeline ranks in semantic mode: contacts close
+to the post in the LSA space are scored alongside the keyword matches, with
+relevance = max(keyword relevance, cosine similarity) and the same
+relationship-strength weighting.
+
+Needs with geography, keywords_avoid or target_persona constraints are first
+narrowed to a candidate set by ``app.constraint_index``; only those contacts
+are scored, in every mode.
+
+Drafts come from the precompiled per-channel templates in ``app.drafts``;
+``draft_batch`` renders every match of a ranking in one call.
+
+Over an ``EditableContactStore``, ``upsert_contacts`` and ``delete_contacts``
+apply contact changes to the keyword and constraint indexes in place; the
+batch matcher is rebuilt on its next use. A semantic index is not updated:
+added and edited contacts are left out of its hits (their vectors are missing
+or stale) and matched by keywords only until it is rebuilt.
+"""
+import hashlib
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.constraint_index import PERSONA_FIELDS, CandidateFilter, ConstraintIndex, has_constraints
+from app.contact_index import (
+    MIN_RELEVANCE,
+    RELATIONSHIP_WEIGHT,
+    RELEVANCE_PER_HIT,
+    RELEVANCE_WEIGHT,
+    ContactIndex,
+)
+from app.drafts import DEFAULT_CHANNELS, DEFAULT_POSTER, DRAFT_ENGINE, DraftEngine
+from app.metrics import METRICS, MetricsRegistry
+from app.models import Contact, DraftResponse, MessageDraft, NeedSpec, RankedContact, RankingResponse
+from app.need_extractor import CONTEXT_CHARS, NEED_EXTRACTOR, NO_NEED_TYPE, NeedExtractor
+
+if TYPE_CHECKING:
+    from app.semantic_index import SemanticIndex
+
+
+# Extracted need types -> NeedSpec.objective_type
+NEED_TYPE_OBJECTIVES = {
+    "hire": "hire",
+    "investment": "raise",
+    "partnership": "partner",
+    "supplier": "intro",
+    "advice/intro": "intro",
+    "unknown": "intro",
+}
+
+NO_NEED_MESSAGE = "No clear need detected in post"
+NO_OPPORTUNITY_MESSAGE = "No connector opportunities found. Keep monitoring for posts that match your network's expertise."
+
+# Semantic candidates retrieved per need: at least this many, or this many per requested match
+SEMANTIC_CANDIDATES = 50
+SEMANTIC_CANDIDATES_PER_MATCH = 10
+
+
+# ============================================================================
+# EDGE CONVERSIONS (JSON payloads <-> models)
+# ============================================================================
+
+def need_author(need: NeedSpec) -> str:
+    """Name of the person who posted the need."""
+    return need.target_persona.get("author", "someone")
+
+
+def need_type(need: NeedSpec) -> str:
+    """Need type as detected in the post (hire, investment, advice/intro, ...)."""
+    return need.target_persona.get("need_type", "help")
+
+
+def build_need_spec(
+    post_text: str,
+    author_name: str,
+    detected_type: str,
+    keywords: List[str],
+    geography: Optional[List[str]] = None,
+    keywords_avoid: Optional[List[str]] = None,
+    persona: Optional[dict] = None,
+) -> NeedSpec:
+    """
+    Wrap an extraction result in a NeedSpec with a stable, content-derived id.
+
+    ``geography``, ``keywords_avoid`` and ``persona`` (title / industry /
+    company_type / company values) restrict which contacts may match.
+    """
+    digest = hashlib.sha1(f"{author_name}\n{post_text}".encode("utf-8")).hexdigest()[:12]
+    return NeedSpec(
+        id=f"need_{digest}",
+        raw_input=post_text,
+        objective_type=NEED_TYPE_OBJECTIVES.get(detected_type, "intro"),
+        target_persona={**(persona or {}), "author": author_name, "need_type": detected_type},
+        geography=geography or None,
+        keywords_must=keywords,
+        keywords_avoid=keywords_avoid or [],
+    )
+
+
+def need_to_payload(need: NeedSpec) -> dict:
+    """
+    The extract_need_from_post payload for a need (constraints only when set).
+
+    ``context`` is the start of the post; a longer post is also carried whole
+    as ``post_text``, so the semantic query sees all of it after a round trip.
+    """
+    payload = {
+        "need_id": need.id,
+        "author": need_author(need),
+        "need_type": need_type(need),
+        "keywords": need.keywords_must,
+        "context": need.raw_input[:CONTEXT_CHARS]
+    }
+    if len(need.raw_input) > CONTEXT_CHARS:
+        payload["post_text"] = need.raw_input
+    if need.geography:
+        payload["geography"] = need.geography
+    if need.keywords_avoid:
+        payload["keywords_avoid"] = need.keywords_avoid
+    persona = {key: need.target_persona[key] for key in PERSONA_FIELDS if need.target_persona.get(key)}
+    if persona:
+        payload["target_persona"] = persona
+    return payload
+
+
+def need_from_payload(payload: dict) -> NeedSpec:
+    """
+    Rebuild a NeedSpec from an extract_need_from_post payload.
+
+    The post is ``post_text`` when present, else ``context``. The payload's
+    ``need_id`` is kept when present: an id derived from a truncated
+    ``context`` would differ from the one ``extract`` produced.
+    """
+    need = build_need_spec(
+        payload.get("post_text") or payload.get("context", ""),
+        payload.get("author", "someone"),
+        payload.get("need_type", "help"),
+        payload.get("keywords", []),
+        geography=payload.get("geography"),
+        keywords_avoid=payload.get("keywords_avoid"),
+        persona=payload.get("target_persona"),
+    )
+    if payload.get("need_id"):
+        need = need.model_copy(update={"id": payload["need_id"]})
+    return need
+
+
+def ranked_to_payload(ranked: RankedContact) -> dict:
+    """One match entry of the find_matching_contacts payload."""
+    return {
+        "contact": ranked.contact.model_dump(),
+        "match_score": round(ranked.rank_score, 2),
+        "relevance": round(ranked.relevance_score, 2),
+        "matching_expertise": ranked.matching_expertise,
+        "why_good_match": ranked.rank_justification
+    }
+
+
+def ranking_to_payload(need: NeedSpec, ranking: RankingResponse) -> dict:
+    """The find_matching_contacts payload for a ranked need."""
+    if not need.keywords_must and not ranking.ranked_contacts:
+        return {"matches": [], "message": NO_NEED_MESSAGE}
+
+    matches = [ranked_to_payload(ranked) for ranked in ranking.ranked_contacts]
+    return {
+        "author_need": need_author(need) + " needs " + need_type(need),
+        "keywords": need.keywords_must,
+        "matches": matches,
+        "total_found": len(matches)
+    }
+
+
+def drafts_to_payload(ranked_contacts: Sequence[RankedContact], responses: Sequence[DraftResponse]) -> List[dict]:
+    """The generate_intro_messages payload: per match, the first channel's drafts in both directions."""
+    return [
+        {
+            "contact_name": ranked.contact.name,
+            "contact_id": response.contact_id,
+            "to_poster": response.drafts[0].model_dump(),
+            "to_contact": response.drafts[1].model_dump(),
+        }
+        for ranked, response in zip(ranked_contacts, responses)
+    ]
+
+
+def ranked_from_payload(match: dict) -> RankedContact:
+    """Rebuild a RankedContact from one find_matching_contacts match entry."""
+    contact = Contact(**match["contact"])
+    return RankedContact(
+        contact=contact,
+        rank_score=match.get("match_score", 0),
+        rank_justification=match.get("why_good_match", ""),
+        relevance_score=match.get("relevance", 0.5),
+        relationship_score=contact.relationship_strength,
+        matching_expertise=match.get("matching_expertise", []),
+    )
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+class ConnectorPipeline:
+    """In-process extract / rank / draft / summarize over one contact index."""
+
+    def __init__(
+        self,
+        index: ContactIndex,
+        extractor: NeedExtractor = NEED_EXTRACTOR,
+        metrics: MetricsRegistry = METRICS,
+        semantic: Optional["SemanticIndex"] = None,
+        drafter: DraftEngine = DRAFT_ENGINE,
+    ):
+        self.index = index
+        self.extractor = extractor
+        self.metrics = metrics
+        self.semantic = semantic
+        self.drafter = drafter
+        self._batch_matcher = None
+        # Positions added or edited since the semantic index was built
+        self._semantic_stale: Set[int] = set()
+        self._constraints: Optional[ConstraintIndex] = None
+
+    def extract(self, post_text: str, author_name: str = "someone") -> NeedSpec:
+        """Extract the need expressed in one post."""
+        with self.metrics.stage("extract"):
+            detected_type, keywords = self.extractor.scan(post_text)
+            need = build_need_spec(post_text, author_name, detected_type, keywords)
+        self.metrics.incr("needs_extracted")
+        if not keywords:
+            self.metrics.incr("needs_without_keywords")
+        return need
+
+    def extract_many(self, posts: Iterable[dict]) -> List[NeedSpec]:
+        """Extract needs from post dicts with ``post_text`` / ``author_name``."""
+        return [
+            self.extract(post.get("post_text", ""), post.get("author_name", "someone"))
+            for post in posts
+        ]
+
+    def _ranked(self, matches) -> List[RankedContact]:
+        ranked = []
+        for pos, final_score, relevance, matching_tags in matches:
+            contact = self.index.contacts[pos]
+            expertise = list(dict.fromkeys(matching_tags))
+            if expertise:
+                justification = f"{contact.name} has expertise in {', '.join(expertise[:3])}"
+            else:
+                # Semantic-only match with no tag close enough to the post to name
+                justification = f"{contact.name} has a semantically similar profile"
+            ranked.append(RankedContact(
+                contact=contact,
+                rank_score=final_score,
+                rank_justification=justification,
+                relevance_score=relevance,
+                relationship_score=contact.relationship_strength,
+                matching_expertise=expertise,
+            ))
+        return ranked
+
+    def candidate_filter(self, need: NeedSpec) -> Optional[CandidateFilter]:
+        """Contacts the need's constraints allow, or None if it has no constraints."""
+        if not has_constraints(need):
+            return None
+        with self.metrics.stage("filter"):
+            if self._constraints is None:
+                self._constraints = ConstraintIndex(self.index)
+            allowed = self._constraints.filter(need)
+        self.metrics.incr("contacts_filtered_out", len(self.index) - allowed.count)
+        return allowed
+
+    def upsert_contacts(self, contacts: Iterable[Contact]) -> int:
+        """
+        Add or replace contacts in place, keeping every index current.
+
+        The index must be built over an ``EditableContactStore``. Returns the
+        number of contacts applied.
+        """
+        store = self.index.contacts
+        applied = 0
+        with self.metrics.stage("reindex"):
+            for contact in contacts:
+                pos = store.positions.get(contact.id)
+                if pos is not None and self._constraints is not None:
+                    self._constraints.remove_position(pos)
+                pos = self.index.upsert(contact)
+                if self._constraints is not None:
+                    self._constraints.add_position(pos)
+                if self.semantic is not None:
+                    self._semantic_stale.add(pos)
+                applied += 1
+        self._contacts_changed(applied)
+        return applied
+
+    def delete_contacts(self, contact_ids: Iterable[str]) -> int:
+        """Remove contacts by id, keeping every index current; returns how many existed."""
+        store = self.index.contacts
+        deleted = 0
+        with self.metrics.stage("reindex"):
+            for contact_id in contact_ids:
+                pos = store.positions.get(contact_id)
+                if pos is None:
+                    continue
+                if self._constraints is not None:
+                    self._constraints.remove_position(pos)
+                self.index.delete(contact_id)
+                deleted += 1
+        self._contacts_changed(deleted)
+        return deleted
+
+    def _contacts_changed(self, count: int) -> None:
+        if count:
+            # The batch matcher's matrices are a snapshot; rebuilt on next use
+            self._batch_matcher = None
+            self.metrics.incr("contacts_reindexed", count)
+
+    def rank(self, need: NeedSpec, top_n: int = 3) -> RankingResponse:
+        """Rank the network for one need."""
+        return self.rank_with_positions(need, top_n)[1]
+
+    def rank_with_positions(self, need: NeedSpec, top_n: int = 3) -> Tuple[List[int], RankingResponse]:
+        """``rank``, plus the network position of each ranked contact (to merge rankings of shards)."""
+        allowed = self.candidate_filter(need)
+        scored_before = self.index.candidates_scored
+        semantic_scored = 0
+        with self.metrics.stage("match") as timing:
+            keywords = need.keywords_must
+            if self.semantic is not None:
+                matches, semantic_scored = self._semantic_matches(need, top_n, allowed)
+            else:
+                matches = self.index.top_matches(keywords, top_n, allowed) if keywords else []
+            ranked = self._ranked(matches)
+        scored = self.index.candidates_scored - scored_before + semantic_scored
+        self.metrics.incr("candidates_scored", scored)
+        return [match[0] for match in matches], RankingResponse(
+            ranked_contacts=ranked,
+            total_candidates=scored,
+            ranking_time_ms=timing.wall_ms,
+            cpu_time_ms=timing.cpu_ms,
+        )
+
+    def rank_batch(self, needs: Sequence[NeedSpec], top_n: int = 3) -> List[RankingResponse]:
+        """Rank the network for a batch of needs with one vectorized pass."""
+        if self.semantic is not None:
+            return [self.rank(need, top_n) for need in needs]
+        if self._batch_matcher is None:
+            # Imported lazily: the sparse matrices are only needed for batches
+            from app.batch_matcher import BatchMatcher
+            self._batch_matcher = BatchMatcher(self.index)
+
+        filters = [self.candidate_filter(need) for need in needs]
+        with self.metrics.stage("match_batch") as timing:
+            batch = self._batch_matcher.top_matches_batch(
+                [need.keywords_must for need in needs], top_n,
+                filters if any(allowed is not None for allowed in filters) else None,
+            )
+        counts = self._batch_matcher.candidate_counts
+        self.metrics.incr("candidates_scored", sum(counts))
+        # The batch is scored in one pass, so its time is split evenly
+        per_need = max(len(needs), 1)
+        responses = []
+        for matches, scored in zip(batch, counts):
+            ranked = self._ranked(matches)
+            responses.append(RankingResponse(
+                ranked_contacts=ranked,
+                total_candidates=scored,
+                ranking_time_ms=timing.wall_ms / per_need,
+                cpu_time_ms=timing.cpu_ms / per_need,
+            ))
+        return responses
+
+    def _semantic_matches(self, need: NeedSpec, top_n: int, allowed: Optional[CandidateFilter] = None) -> Tuple[list, int]:
+        """
+        Keyword top matches plus nearest contacts in the semantic index, scored together.
+
+        Returns:
+            (matches in ContactIndex.top_matches form, semantic candidates scored)
+        """
+        keywords = need.keywords_must
+        if top_n <= 0 or (not keywords and need_type(need) == NO_NEED_TYPE):
+            return [], 0
+
+        query = self.semantic.encode(need.raw_input)
+        similarities = dict(self.semantic.search_vector(
+            query, max(SEMANTIC_CANDIDATES, SEMANTIC_CANDIDATES_PER_MATCH * top_n)
+        ))
+        candidates = dict.fromkeys(
+            pos for pos in similarities
+            if (allowed is None or pos in allowed) and self.index.is_live(pos) and pos not in self._semantic_stale
+        )
+        if keywords:
+            candidates.update(dict.fromkeys(pos for pos, _, _, _ in self.index.top_matches(keywords, top_n, allowed)))
+
+        entries = []
+        for pos in candidates:
+            matching_tags = self.index.matching_tags(keywords, pos) if keywords else []
+            keyword_relevance = min(RELEVANCE_PER_HIT * len(matching_tags), 1.0)
+            relevance = max(keyword_relevance, min(max(similarities.get(pos, 0.0), 0.0), 1.0))
+            if relevance <= MIN_RELEVANCE:
+                continue
+            final_score = (RELEVANCE_WEIGHT * relevance) + (RELATIONSHIP_WEIGHT * self.index.strengths[pos])
+            entries.append((-round(final_score, 2), pos, final_score, relevance, matching_tags))
+        entries.sort(key=lambda entry: entry[:2])
+
+        matches = []
+        for _, pos, final_score, relevance, matching_tags in entries[:top_n]:
+            if not matching_tags:
+                # Semantic-only match: explain it with the tags closest to the post
+                matching_tags = self.semantic.related_tags(query, self.index.contact_tags(pos))
+            matches.append((pos, final_score, relevance, matching_tags))
+        self.metrics.incr("semantic_candidates", len(similarities))
+        return matches, len(similarities)
+
+    def draft(self, ranked: RankedContact, to_poster: bool = True) -> MessageDraft:
+        """
+        Draft an intro message for one match.
+
+        Args:
+            ranked: The matched contact
+            to_poster: If True, message to person who posted. If False, message to your contact.
+        """
+        with self.metrics.stage("draft"):
+            return self._render(ranked, to_poster)
+
+    def draft_response(self, ranked: RankedContact) -> DraftResponse:
+        """Both intro drafts for one match (to the poster, then to your contact), timed."""
+        with self.metrics.stage("draft") as timing:
+            drafts = [self._render(ranked, True), self._render(ranked, False)]
+        return DraftResponse(
+            drafts=drafts,
+            contact_id=ranked.contact.id,
+            generation_time_ms=timing.wall_ms,
+            cpu_time_ms=timing.cpu_ms,
+        )
+
+    def draft_batch(
+        self,
+        ranked_contacts: Sequence[RankedContact],
+        need: Optional[NeedSpec] = None,
+        channels: Iterable[str] = DEFAULT_CHANNELS,
+    ) -> List[DraftResponse]:
+        """
+        Drafts in both directions for every match of a ranking, in one pass.
+
+        Args:
+            ranked_contacts: Matches, e.g. ``rank(need).ranked_contacts``
+            need: The need it was ranked for (names the poster in templates that greet them)
+            channels: ``MessageDraft.channel`` values to draft for
+
+        Returns:
+            One DraftResponse per ranked contact, drafts ordered by channel and
+            then direction (to the poster, to your contact). The batch time is
+            split evenly across the responses.
+        """
+        poster = need_author(need) if need is not None else DEFAULT_POSTER
+        truncated_before = self.drafter.truncated
+        with self.metrics.stage("draft") as timing:
+            batches = self.drafter.render_batch(ranked_contacts, poster, channels)
+        self.metrics.incr("drafts_rendered", sum(len(drafts) for drafts in batches))
+        self.metrics.incr("drafts_truncated", self.drafter.truncated - truncated_before)
+
+        share = max(1, len(ranked_contacts))
+        return [
+            DraftResponse(
+                drafts=drafts,
+                contact_id=ranked.contact.id,
+                generation_time_ms=timing.wall_ms / share,
+                cpu_time_ms=timing.cpu_ms / share,
+            )
+            for ranked, drafts in zip(ranked_contacts, batches)
+        ]
+
+    def _render(self, ranked: RankedContact, to_poster: bool) -> MessageDraft:
+        return self.drafter.render(self.drafter.fields(ranked), "linkedin_dm", to_poster)
+
+    def summarize(self, keywords: List[str], ranked_contacts: List[RankedContact]) -> str:
+        """Human-readable opportunity summary with next actions."""
+        if not ranked_contacts:
+            return NO_OPPORTUNITY_MESSAGE
+
+        summary = f"**CONNECTOR OPPORTUNITY**\n\n"
+        summary += f"Someone needs: {', '.join(keywords)}\n\n"
+        summary += f"Found {len(ranked_contacts)} contacts from your network who could help:\n\n"
+
+        for i, ranked in enumerate(ranked_contacts, 1):
+            contact = ranked.contact
+            summary += f"{i}. **{contact.name}** ({contact.title}) - Match: {round(ranked.rank_score, 2)}\n"
+            summary += f"   Expertise: {', '.join(ranked.matching_expertise)}\n"
+            summary += f"   Why: {ranked.rank_justification}\n\n"
+
+        summary += f"\n**NEXT ACTIONS:**\n"
+        summary += f"1. Message your top contact ({ranked_contacts[0].contact.name}) to gauge interest\n"
+        summary += f"2. If interested, intro them to the person who posted\n"
+        summary += f"3. Track outcome - successful intros build your connector reputation\n\n"
+        summary += f"**VALUE**: By facilitating this intro, you:\n"
+        summary += f"- Help someone in your network find what they need\n"
+        summary += f"- Strengthen relationship with your contact by sending them opportunities\n"
+        summary += f"- Build reputation as a valuable connector\n"
+
+        return summary
+
+    def process(self, post_text: str, author_name: str = "someone", top_n: int = 3):
+        """
+        Run extract and rank for one post.
+
+        Returns:
+            (NeedSpec, RankingResponse)
+        """
+        need = self.extract(post_text, author_name)
+        return need, self.rank(need, top_n)
+
+    def process_payload(self, post_text: str, author_name: str = "someone", top_n: int = 3) -> dict:
+        """
+        Extract, rank and draft for one post, as the monitor's result payload.
+
+        Returns:
+            Dict with ``need``, ``need_id`` and ``matches``; with any matches
+            also ``intro_message`` (top match, to the poster) and ``intro_drafts``
+        """
+        need, ranking = self.process(post_text, author_name, top_n)
+        result = {
+            "need": need_to_payload(need),
+            "need_id": need.id,
+            "matches": ranking_to_payload(need, ranking)["matches"],
+        }
+        if ranking.ranked_contacts:
+            # Drafts for every match; the top one is also kept as intro_message
+            drafts = self.draft_batch(ranking.ranked_contacts, need)
+            result["intro_message"] = drafts[0].drafts[0].body
+            result["intro_drafts"] = [
+                {"contact_id": response.contact_id, "to_poster": response.drafts[0].body, "to_contact": response.drafts[1].body}
+                for response in drafts
+            ]
+        return result
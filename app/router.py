@@ -0,0 +1,336 @@
+"""Deterministic fast path and batched model review in front of the agent.
+
+The ADK ``root_agent`` handles a post with a full gemini conversation that
+calls four tools one after another, even when the answer is already known
+from the tools alone. The router runs extract and rank in-process first and
+settles, without any model call:
+
+- ``no_need``: the post asks for nothing (no keywords and no need trigger),
+  the same test ``ConnectorPipeline`` applies before a semantic search
+- ``no_match``: no contact passed the relevance cutoff (or ``min_score``)
+
+The remaining posts go to the model ``batch_size`` at a time, in one request
+per batch with a JSON response schema (``ReviewBatch``): for each post,
+whether it is a real ask, which of the ranked candidates to introduce and
+why. Answers are validated against the candidates actually sent; a post the
+model leaves out (or a batch it fails) keeps its deterministic ranking.
+
+Models implement ``generate(prompt, schema) -> str`` returning JSON text.
+``GeminiModel`` calls gemini via google-genai (imported on first use);
+``LocalModel`` is a deterministic stand-in that answers from the prompt
+itself, for tests and offline runs::
+
+    python -m app.router posts.jsonl --model local --output output/routed.jsonl
+
+The router is standalone for now: the linkedin monitor does not route its
+posts through it.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Type
+
+from pydantic import BaseModel, Field
+
+from app.contact_store import iter_json_records
+from app.metrics import METRICS, MetricsRegistry
+from app.models import NeedSpec, RankingResponse
+from app.need_extractor import NO_NEED_TYPE
+from app.pipeline import (
+    ConnectorPipeline,
+    need_author,
+    need_to_payload,
+    need_type,
+    ranking_to_payload,
+)
+
+
+# Model used for reviews ("local" selects the stand-in)
+ROUTER_MODEL = os.getenv("ROUTER_MODEL", "gemini-2.5-flash")
+
+# Posts per model request
+ROUTER_BATCH_SIZE = int(os.getenv("ROUTER_BATCH_SIZE", "8"))
+
+# Posts whose best match scores below this are settled as no_match
+ROUTER_MIN_SCORE = float(os.getenv("ROUTER_MIN_SCORE", "0"))
+
+# Characters of each post sent to the model
+REVIEW_POST_CHARS = 600
+
+REVIEW_INSTRUCTION = """You review LinkedIn posts for a connector who introduces people from their network.
+For each post below you get the extracted need and the best-ranked contacts.
+Decide whether the post is a genuine ask someone could be introduced for, and
+which of the listed candidates (by contact_id, best first) are worth an intro.
+Only use contact ids from the post's own candidates. Give a one-sentence reason.
+Answer for every post_id.
+
+POSTS:
+"""
+
+
+# ============================================================================
+# STRUCTURED OUTPUT
+# ============================================================================
+
+class PostReview(BaseModel):
+    """The model's verdict on one post."""
+    post_id: str
+    is_need: bool
+    contact_ids: List[str] = Field(default_factory=list)
+    reason: str = ""
+
+
+class ReviewBatch(BaseModel):
+    """The model's answer to one batch request."""
+    results: List[PostReview]
+
+
+class RoutedPost(NamedTuple):
+    """Outcome of routing one post."""
+    post: dict
+    need: NeedSpec
+    ranking: RankingResponse
+    route: str  # "no_need" | "no_match" | "model" | "fallback"
+    reason: str
+
+    def to_payload(self) -> dict:
+        return {
+            "route": self.route,
+            "reason": self.reason,
+            "post_url": self.post.get("post_url", ""),
+            "author_name": need_author(self.need),
+            "need": need_to_payload(self.need),
+            "need_id": self.need.id,
+            "matches": ranking_to_payload(self.need, self.ranking)["matches"],
+        }
+
+
+# ============================================================================
+# MODELS
+# ============================================================================
+
+class GeminiModel:
+    """Structured-output calls to a gemini model through google-genai (Vertex AI)."""
+
+    def __init__(self, model: str = ROUTER_MODEL):
+        self.model = model
+        self._client = None
+
+    def generate(self, prompt: str, schema: Type[BaseModel]) -> str:
+        if self._client is None:
+            from google import genai
+
+            from app.agent import configure_gcp
+            configure_gcp()
+            self._client = genai.Client()
+        from google.genai import types
+
+        response = self._client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=schema,
+                temperature=0,
+            ),
+        )
+        return response.text
+
+
+class LocalModel:
+    """
+    Deterministic stand-in for the review model.
+
+    Reads the posts back out of the prompt and accepts every candidate whose
+    match score reaches ``min_score``. ``latency_s`` simulates the round trip;
+    ``prompts`` keeps every request for inspection.
+    """
+
+    def __init__(self, min_score: float = 0.0, latency_s: float = 0.0):
+        self.min_score = min_score
+        self.latency_s = latency_s
+        self.prompts: List[str] = []
+
+    def generate(self, prompt: str, schema: Type[BaseModel]) -> str:
+        self.prompts.append(prompt)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        posts = json.loads(prompt[prompt.index(REVIEW_INSTRUCTION) + len(REVIEW_INSTRUCTION):])
+        results = []
+        for post in posts:
+            accepted = [c for c in post["candidates"] if c["match_score"] >= self.min_score]
+            results.append({
+                "post_id": post["post_id"],
+                "is_need": bool(accepted),
+                "contact_ids": [c["contact_id"] for c in accepted],
+                "reason": f"Matches {', '.join(post['keywords'][:3])}" if accepted else "No strong candidate",
+            })
+        return schema(results=results).model_dump_json()
+
+
+def get_model(name: str = ROUTER_MODEL):
+    """The review model for a name ("local" for the stand-in, else a gemini model id)."""
+    return LocalModel() if name == "local" else GeminiModel(name)
+
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+
+def review_prompt(entries: Sequence[dict]) -> str:
+    """The batch request: instruction followed by the posts as a JSON list."""
+    return REVIEW_INSTRUCTION + json.dumps(entries, separators=(",", ":"))
+
+
+class PostRouter:
+    """Settles clear-cut posts in-process and batches the rest to the model."""
+
+    def __init__(
+        self,
+        pipeline: ConnectorPipeline,
+        model=None,
+        batch_size: int = ROUTER_BATCH_SIZE,
+        top_n: int = 3,
+        min_score: float = ROUTER_MIN_SCORE,
+        metrics: MetricsRegistry = METRICS,
+    ):
+        self.pipeline = pipeline
+        self.model = model if model is not None else get_model()
+        self.batch_size = max(1, batch_size)
+        self.top_n = top_n
+        self.min_score = min_score
+        self.metrics = metrics
+        # Model requests made (one per batch)
+        self.model_calls = 0
+
+    def settle(self, post: dict) -> RoutedPost:
+        """Extract and rank one post; the route is only final if it is not ``"model"``."""
+        need, ranking = self.pipeline.process(
+            post.get("post_text", ""), post.get("author_name") or "someone", self.top_n
+        )
+        if not need.keywords_must and need_type(need) == NO_NEED_TYPE:
+            # A keyword-less ask can still have semantic matches
+            return RoutedPost(post, need, ranking, "no_need", "No need detected in the post")
+        ranked = ranking.ranked_contacts
+        if not ranked or ranked[0].rank_score < self.min_score:
+            return RoutedPost(post, need, ranking, "no_match", "No contact above the match threshold")
+        return RoutedPost(post, need, ranking, "model", "")
+
+    def route(self, posts: Iterable[dict]) -> Iterator[RoutedPost]:
+        """
+        Route posts, yielding results in input order.
+
+        Args:
+            posts: Post dicts with ``post_text`` and ``author_name``
+
+        Returns:
+            Iterator of RoutedPost; settled posts are held back only until the
+            pending batch before them has been reviewed
+        """
+        held: List[RoutedPost] = []
+        pending = 0
+        for post in posts:
+            routed = self.settle(post)
+            if routed.route == "model":
+                pending += 1
+            else:
+                self.metrics.incr(f"posts_settled_{routed.route}")
+                if not pending:
+                    yield routed
+                    continue
+            held.append(routed)
+            if pending == self.batch_size:
+                yield from self._review(held)
+                held, pending = [], 0
+        if held:
+            yield from self._review(held)
+
+    def _review(self, routed: List[RoutedPost]) -> List[RoutedPost]:
+        batch = {f"p{i}": entry for i, entry in enumerate(routed) if entry.route == "model"}
+        if not batch:
+            return routed
+        prompt = review_prompt([
+            {
+                "post_id": post_id,
+                "author": need_author(entry.need),
+                "need_type": need_type(entry.need),
+                "keywords": entry.need.keywords_must,
+                "post_text": entry.need.raw_input[:REVIEW_POST_CHARS],
+                "candidates": [
+                    {
+                        "contact_id": ranked.contact.id,
+                        "name": ranked.contact.name,
+                        "title": ranked.contact.title,
+                        "company": ranked.contact.company,
+                        "match_score": round(ranked.rank_score, 2),
+                        "matching_expertise": ranked.matching_expertise,
+                    }
+                    for ranked in entry.ranking.ranked_contacts
+                ],
+            }
+            for post_id, entry in batch.items()
+        ])
+
+        self.model_calls += 1
+        self.metrics.incr("model_calls")
+        self.metrics.incr("posts_reviewed", len(batch))
+        try:
+            with self.metrics.stage("review"):
+                reviews = ReviewBatch.model_validate_json(self.model.generate(prompt, ReviewBatch)).results
+        except Exception as e:
+            # Invalid answers and transport/API errors alike leave the batch on its deterministic ranking
+            print(f"⚠️  Model review failed, keeping deterministic rankings: {e}")
+            self.metrics.incr("model_errors")
+            reviews = None
+
+        verdicts = {review.post_id: review for review in reviews or () if review.post_id in batch}
+        unreviewed = "Model review failed" if reviews is None else "Not reviewed by the model"
+        results = []
+        for i, entry in enumerate(routed):
+            post_id = f"p{i}"
+            if entry.route != "model":
+                results.append(entry)
+                continue
+            review = verdicts.get(post_id)
+            if review is None:
+                self.metrics.incr("posts_unreviewed")
+                results.append(entry._replace(route="fallback", reason=unreviewed))
+                continue
+            by_id = {ranked.contact.id: ranked for ranked in entry.ranking.ranked_contacts}
+            kept = [by_id[contact_id] for contact_id in dict.fromkeys(review.contact_ids) if contact_id in by_id]
+            if not review.is_need:
+                kept = []
+            ranking = entry.ranking.model_copy(update={"ranked_contacts": kept})
+            results.append(entry._replace(ranking=ranking, reason=review.reason))
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Route posts: settle clear cases locally, batch the rest to the model.")
+    parser.add_argument("posts", help="Posts file (JSON array or JSONL) with post_text and author_name")
+    parser.add_argument("--model", default=ROUTER_MODEL, help='Gemini model id, or "local" for the stand-in')
+    parser.add_argument("--batch-size", type=int, default=ROUTER_BATCH_SIZE, help="Posts per model request")
+    parser.add_argument("--top-n", type=int, default=3, help="Candidates per post")
+    parser.add_argument("--output", help="Write one JSON line per routed post here")
+    args = parser.parse_args(argv)
+
+    from app.agent import get_pipeline
+
+    router = PostRouter(get_pipeline(), get_model(args.model), args.batch_size, args.top_n)
+    counts = {"no_need": 0, "no_match": 0, "model": 0, "fallback": 0}
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for routed in router.route(iter_json_records(args.posts)):
+            counts[routed.route] += 1
+            if output is not None:
+                output.write(json.dumps(routed.to_payload(), separators=(",", ":"), default=str) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+    print(f"✅ {sum(counts.values()):,} posts: {counts['no_need']:,} without a need, {counts['no_match']:,} without a match, "
+          f"{counts['model'] + counts['fallback']:,} reviewed in {router.model_calls:,} model calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""Offline semantic contact retrieval.
+
+Keyword matching only finds contacts whose tags contain an extracted keyword,
+so "compostable film" never reaches a contact tagged "bioplastics". This
+module embeds contacts (title, tags, notes) and post texts with a local,
+network-free LSA encoder:
+
+1. word unigrams and bigrams are feature-hashed into a fixed space (no
+   vocabulary to store), weighted by sublinear TF-IDF and L2-normalized
+2. a truncated SVD fitted on the network projects them onto ``dim`` latent
+   dimensions, where terms that co-occur across contacts end up close
+
+Vectors live in an IVF (inverted file) approximate nearest neighbour index:
+spherical k-means splits the network into ~sqrt(N) lists, and a query only
+scans the ``nprobe`` lists whose centroids are closest. The index is a
+directory of ``.npy`` files; the contact vectors are memory-mapped on open.
+
+Build one with::
+
+    python -m app.semantic_index --contacts contacts.json --output state/semantic_index
+"""
+import argparse
+import json
+import math
+import re
+import zlib
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+from app.contact_store import ContactStore
+
+
+INDEX_VERSION = 1
+DEFAULT_DIM = 64
+DEFAULT_HASH_FEATURES = 1 << 17
+DEFAULT_NPROBE = 8
+FIT_SAMPLE = 100_000  # documents used to fit the SVD and the centroids
+KMEANS_ITERATIONS = 12
+ENCODE_CHUNK = 50_000
+SEED = 0
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its of on or our the to we with you your "
+    "looking need needs seeking anyone someone help".split()
+)
+
+ARRAYS = ("idf", "components", "centroids", "list_offsets", "vectors", "positions")
+
+
+def _normalize_token(token: str) -> str:
+    # Light plural folding so "materials" and "material" share a feature
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def text_features(text: str) -> List[str]:
+    """Word unigrams and bigrams of the lowercased text, stopwords removed."""
+    tokens = [_normalize_token(token) for token in TOKEN_RE.findall((text or "").lower()) if token not in STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def contact_text(contacts: Sequence, pos: int) -> str:
+    """Text embedded for one contact: title, tags and notes."""
+    if isinstance(contacts, ContactStore):
+        title, notes, tags = contacts.field(pos, "title"), contacts.field(pos, "notes"), contacts.tags(pos)
+    else:
+        contact = contacts[pos]
+        title, notes, tags = contact.title, contact.notes, contact.tags
+    return " ".join([title or "", ". ".join(tags), notes or ""])
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SemanticIndex:
+    """Hashing TF-IDF + LSA encoder with an IVF nearest neighbour index over a contact network."""
+
+    def __init__(self, arrays: dict, meta: dict, nprobe: int = DEFAULT_NPROBE):
+        self.meta = meta
+        self.hash_features = meta["hash_features"]
+        self.nprobe = nprobe
+        self.idf: np.ndarray = arrays["idf"]
+        self.components: np.ndarray = arrays["components"]
+        self.centroids: np.ndarray = arrays["centroids"]
+        self.list_offsets: np.ndarray = arrays["list_offsets"]
+        self._offsets: List[int] = self.list_offsets.tolist()
+        # Plain ndarray views of the memory maps: slicing np.memmap is much slower
+        self.vectors: np.ndarray = arrays["vectors"].view(np.ndarray)
+        self.positions: np.ndarray = arrays["positions"].view(np.ndarray)
+
+    def __len__(self) -> int:
+        return self.meta["contacts"]
+
+    # ------------------------------------------------------------------ encode
+
+    def _hashed_counts(self, text: str) -> Counter:
+        return Counter(zlib.crc32(feature.encode("utf-8")) % self.hash_features for feature in text_features(text))
+
+    def encode(self, text: str) -> np.ndarray:
+        """Unit-length LSA vector of a text (all zeros if it has no features)."""
+        counts = self._hashed_counts(text)
+        if not counts:
+            return np.zeros(self.components.shape[1], dtype=np.float32)
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        weights = tf * self.idf[columns]
+        weights /= np.linalg.norm(weights)
+        vector = weights @ self.components[columns]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # ------------------------------------------------------------------ search
+
+    def search_vector(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """
+        Approximate top-k contacts by cosine similarity to a query vector.
+
+        Returns:
+            List of (contact_pos, similarity), best first
+        """
+        if k <= 0 or not query.any() or not len(self.centroids):
+            return []
+        centroid_scores = self.centroids @ query
+        nprobe = min(self.nprobe, len(centroid_scores))
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        similarities, positions = [], []
+        offsets = self._offsets
+        for list_id in probe.tolist():
+            start, end = offsets[list_id], offsets[list_id + 1]
+            if start < end:
+                similarities.append(self.vectors[start:end] @ query)
+                positions.append(self.positions[start:end])
+        if not similarities:
+            return []
+        similarities = np.concatenate(similarities)
+        positions = np.concatenate(positions)
+
+        if len(similarities) > k:
+            top = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            top = np.arange(len(similarities))
+        top = top[np.lexsort((positions[top], -similarities[top]))]
+        return list(zip(positions[top].tolist(), similarities[top].tolist()))
+
+    def search(self, text: str, k: int) -> List[Tuple[int, float]]:
+        """Approximate top-k contacts for a post text."""
+        return self.search_vector(self.encode(text), k)
+
+    def related_tags(self, query: np.ndarray, tags: Iterable[str], limit: int = 3, min_similarity: float = 0.2) -> List[str]:
+        """A contact's tags ordered by similarity to the query, for explaining a semantic match."""
+        scored = []
+        for tag in tags:
+            similarity = float(self.encode(tag) @ query)
+            if similarity >= min_similarity:
+                scored.append((-similarity, tag))
+        return [tag for _, tag in sorted(scored)[:limit]]
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def build(
+        cls,
+        contacts: Sequence,
+        dim: int = DEFAULT_DIM,
+        hash_features: int = DEFAULT_HASH_FEATURES,
+        nlist: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> "SemanticIndex":
+        """
+        Fit the encoder on a contact network and index every contact.
+
+        Args:
+            contacts: Contact list or ContactStore (positions refer to it)
+            dim: LSA dimensions
+            hash_features: Size of the hashed feature space
+            nlist: Number of IVF lists (default ~sqrt(len(contacts)))
+            nprobe: Lists scanned per query
+
+        Returns:
+            In-memory index; ``save`` it to reuse it
+        """
+        n = len(contacts)
+        rng = np.random.default_rng(SEED)
+        meta = {"version": INDEX_VERSION, "contacts": n, "hash_features": hash_features}
+
+        # Sparse hashed term counts, built in chunks to bound peak memory
+        tf = sparse.vstack(
+            [cls._hashed_rows(contacts, start, min(start + ENCODE_CHUNK, n), hash_features) for start in range(0, n, ENCODE_CHUNK)]
+            or [sparse.csr_matrix((0, hash_features), dtype=np.float32)],
+            format="csr",
+        )
+        tf.data = 1.0 + np.log(tf.data)
+
+        df = np.bincount(tf.indices, minlength=hash_features)
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        tfidf = tf
+        tfidf.data *= idf[tfidf.indices]
+        # Summed per row, so contacts without any text (empty rows) get norm 0
+        row_norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1), dtype=np.float64).ravel())
+        row_norms[row_norms == 0] = 1.0
+        tfidf.data /= np.repeat(row_norms, np.diff(tfidf.indptr)).astype(np.float32)
+
+        # LSA projection fitted on a sample of the network
+        sample = rng.choice(n, min(n, FIT_SAMPLE), replace=False) if n else np.arange(0)
+        k = max(1, min(dim, min(len(sample), hash_features) - 1))
+        if len(sample) > 1:
+            _, _, vt = svds(tfidf[np.sort(sample)].astype(np.float64), k=k, random_state=SEED)
+            components = np.ascontiguousarray(vt.T, dtype=np.float32)
+        else:
+            components = np.zeros((hash_features, k), dtype=np.float32)
+
+        vectors = np.empty((n, k), dtype=np.float32)
+        for start in range(0, n, ENCODE_CHUNK):
+            chunk = tfidf[start:start + ENCODE_CHUNK] @ components
+            vectors[start:start + ENCODE_CHUNK] = _l2_normalize(np.asarray(chunk, dtype=np.float32))
+
+        # Contacts without any text cannot be retrieved semantically
+        indexed = np.flatnonzero(np.abs(vectors).sum(axis=1) > 0)
+        nlist = nlist or max(1, int(math.sqrt(len(indexed))))
+        centroids = cls._kmeans(vectors[indexed], min(nlist, max(len(indexed), 1)), rng)
+        assignment = cls._assign(vectors[indexed], centroids)
+
+        order = np.argsort(assignment, kind="stable")
+        positions = indexed[order]
+        list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=list_offsets[1:])
+
+        meta.update(dim=k, nlist=len(centroids), indexed=len(indexed))
+        arrays = {
+            "idf": idf,
+            "components": components,
+            "centroids": centroids,
+            "list_offsets": list_offsets,
+            "vectors": np.ascontiguousarray(vectors[positions]),
+            "positions": positions.astype(np.int64),
+        }
+        return cls(arrays, meta, nprobe)
+
+    @staticmethod
+    def _hashed_rows(contacts: Sequence, start: int, end: int, hash_features: int) -> sparse.csr_matrix:
+        indptr, indices, counts = array("q", [0]), array("i"), array("f")
+        for pos in range(start, end):
+            row = Counter(zlib.crc32(f.encode("utf-8")) % hash_features for f in text_features(contact_text(contacts, pos)))
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.frombuffer(counts, dtype=np.float32), np.frombuffer(indices, dtype=np.int32), np.frombuffer(indptr, dtype=np.int64)),
+            shape=(end - start, hash_features),
+        )
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), ENCODE_CHUNK):
+            assignment[start:start + ENCODE_CHUNK] = np.argmax(vectors[start:start + ENCODE_CHUNK] @ centroids.T, axis=1)
+        return assignment
+
+    @classmethod
+    def _kmeans(cls, vectors: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+        """Spherical k-means on a sample of the (unit-length) vectors."""
+        if not len(vectors):
+            return np.zeros((0, vectors.shape[1]), dtype=np.float32)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), FIT_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = cls._assign(sample, centroids)
+            members = sparse.csr_matrix(
+                (np.ones(len(sample), dtype=np.float32), (assignment, np.arange(len(sample)))),
+                shape=(k, len(sample)),
+            )
+            sums = np.asarray(members @ sample)
+            empty = np.flatnonzero(np.bincount(assignment, minlength=k) == 0)
+            sums[empty] = centroids[empty]  # keep centroids that lost every member
+            centroids = _l2_normalize(sums).astype(np.float32)
+        return centroids
+
+    # ------------------------------------------------------------------ persist
+
+    def save(self, directory: Union[str, Path]) -> Path:
+        """Write the index as ``.npy`` files plus ``meta.json``."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        (directory / "meta.json").write_text(json.dumps(self.meta, indent=2) + "\n", encoding="utf-8")
+        return directory
+
+    @classmethod
+    def open(cls, directory: Union[str, Path], contacts: Optional[Sequence] = None, nprobe: int = DEFAULT_NPROBE) -> "SemanticIndex":
+        """
+        Open a saved index; the contact vectors are memory-mapped, not read.
+
+        Args:
+            directory: Directory written by ``save``
+            contacts: The network the index is used with, to check it matches
+            nprobe: Lists scanned per query
+        """
+        directory = Path(directory)
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"{directory}: unsupported semantic index version {meta.get('version')}")
+        if contacts is not None and len(contacts) != meta["contacts"]:
+            raise ValueError(
+                f"{directory}: index covers {meta['contacts']} contacts, network has {len(contacts)}; rebuild it"
+            )
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r" if name in ("vectors", "positions") else None)
+            for name in ARRAYS
+        }
+        return cls(arrays, meta, nprobe)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the semantic contact index.")
+    parser.add_argument("--contacts", required=True, help="Contacts file (JSON array, JSONL or snapshot)")
+    parser.add_argument("--output", required=True, help="Index directory")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--nlist", type=int)
+    args = parser.parse_args(argv)
+
+    contacts = ContactStore.open(args.contacts)
+    index = SemanticIndex.build(contacts, dim=args.dim, nlist=args.nlist)
+    index.save(args.output)
+    print(f"✅ Indexed {index.meta['indexed']:,} of {len(contacts):,} contacts "
+          f"({index.meta['nlist']} lists, {index.meta['dim']} dims) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
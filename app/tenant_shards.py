@@ -0,0 +1,512 @@
+"""Tenant-partitioned contact shards with scatter-gather matching.
+
+Every tenant (``NeedSpec.user_id``) has its own network, split into
+contiguous shards of at most ``SHARD_SIZE`` contacts saved as contact
+snapshots::
+
+    <SHARDS_DIR>/<tenant>/manifest.json
+    <SHARDS_DIR>/<tenant>/shard-<generation>-<n>.snapshot
+
+``ShardedMatcher`` ranks a need on every shard of its tenant in local worker
+processes (``ConnectorPipeline.rank`` per shard, so geography, persona and
+avoided keywords apply as usual) and merges the per-shard top-n. Shards are
+contiguous runs of the tenant's network, so ordering the merged entries by
+rounded score, then network position, gives exactly the ranking of a single
+index over the whole network.
+
+Each shard is pinned to one worker, consecutive shards to consecutive
+workers: a worker only builds indexes for its own shards, and a large
+network is spread across every core. A worker holds at most
+``SHARD_PREFETCH`` tasks at a time, and its next task is picked round-robin
+across the tenants with work waiting, so a small tenant waits behind a few
+shard tasks of a large one, not behind its whole backlog.
+
+Workers memory-map the snapshots (pages are shared between processes) and
+keep up to ``SHARD_CACHE_SIZE`` shard indexes each. Repartitioning a tenant
+writes a new generation of shard files and then swaps the manifest. The
+previous generation is kept until the next repartition, so requests already
+queued finish on the files they were planned against.
+
+Usage:
+    python -m app.tenant_shards build acme data/acme_contacts.jsonl
+    python -m app.tenant_shards match acme "I need a bioplastics engineer in Austin"
+    python -m app.tenant_shards list
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import traceback
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from itertools import islice
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from app.contact_index import ContactIndex
+from app.contact_store import ContactStore, iter_contacts
+from app.metrics import METRICS
+from app.models import Contact, NeedSpec, RankedContact, RankingResponse
+from app.need_extractor import NEED_EXTRACTOR
+from app.pipeline import ConnectorPipeline, build_need_spec, ranking_to_payload
+
+
+# Where tenant shards live, and how many contacts go into one shard
+SHARDS_DIR = Path(os.getenv("SHARDS_DIR", "state/shards"))
+SHARD_SIZE = int(os.getenv("SHARD_SIZE", "50000"))
+
+# Matcher processes (default: one per CPU), tasks each may hold, shard indexes each keeps
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0")) or None
+SHARD_PREFETCH = 2
+SHARD_CACHE_SIZE = int(os.getenv("SHARD_CACHE_SIZE", "32"))
+
+MANIFEST = "manifest.json"
+POLL_SECONDS = 0.5
+
+_TENANT_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.@-]*$")
+
+_RESULT = "result"
+_FAILED = "failed"
+_DONE = "done"
+
+
+class Shard(NamedTuple):
+    """One snapshot file holding contacts ``offset`` .. ``offset + contacts - 1`` of a tenant."""
+    path: str
+    offset: int
+    contacts: int
+
+
+class TenantShards(NamedTuple):
+    """A tenant's network as written by ``partition_tenant``."""
+    tenant: str
+    generation: int
+    contacts: int
+    shards: Tuple[Shard, ...]
+
+
+class ShardError(RuntimeError):
+    """A shard task failed, or the matcher workers are gone."""
+
+
+# ============================================================================
+# LAYOUT
+# ============================================================================
+
+def _tenant_dir(root: Union[str, Path], tenant: str) -> Path:
+    if not _TENANT_NAME.match(tenant):
+        raise ValueError(f"Invalid tenant name {tenant!r}: use letters, digits, '_', '.', '@' or '-'")
+    return Path(root) / tenant
+
+
+def load_tenant(tenant: str, root: Union[str, Path] = SHARDS_DIR) -> Optional[TenantShards]:
+    """A tenant's current shards, or None if it has never been partitioned."""
+    path = _tenant_dir(root, tenant) / MANIFEST
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    return TenantShards(
+        tenant=manifest["tenant"],
+        generation=manifest["generation"],
+        contacts=manifest["contacts"],
+        shards=tuple(Shard(str(path.parent / shard["file"]), shard["offset"], shard["contacts"]) for shard in manifest["shards"]),
+    )
+
+
+def list_tenants(root: Union[str, Path] = SHARDS_DIR) -> List[str]:
+    """Names of the partitioned tenants."""
+    root = Path(root)
+    if not root.exists():
+        return []
+    return sorted(path.name for path in root.iterdir() if (path / MANIFEST).exists())
+
+
+def partition_tenant(
+    tenant: str,
+    contacts: Iterable[Contact],
+    root: Union[str, Path] = SHARDS_DIR,
+    shard_size: int = SHARD_SIZE,
+) -> TenantShards:
+    """
+    Write a tenant's network as shards of at most ``shard_size`` contacts.
+
+    Contacts are streamed, one shard in memory at a time. Once the new
+    manifest is in place, generations older than the previous one are
+    removed; the previous one stays for requests still queued against it.
+
+    Args:
+        tenant: Tenant id (the ``user_id`` of its needs)
+        contacts: The tenant's whole network, in network order
+        root: Shards directory
+        shard_size: Contacts per shard
+
+    Returns:
+        The tenant's new shards
+    """
+    if shard_size <= 0:
+        raise ValueError("shard_size must be positive")
+    directory = _tenant_dir(root, tenant)
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = load_tenant(tenant, root)
+    generation = previous.generation + 1 if previous else 1
+
+    shards, offset = [], 0
+    contacts = iter(contacts)
+    while True:
+        store = ContactStore.from_contacts(islice(contacts, shard_size))
+        if not len(store):
+            break
+        path = directory / f"shard-{generation:04d}-{len(shards):04d}.snapshot"
+        store.save_snapshot(path)
+        shards.append({"file": path.name, "offset": offset, "contacts": len(store)})
+        offset += len(store)
+
+    staging = directory / f".{MANIFEST}.tmp"
+    staging.write_text(json.dumps({
+        "tenant": tenant, "generation": generation, "contacts": offset, "shards": shards,
+    }, indent=1), encoding="utf-8")
+    os.replace(staging, directory / MANIFEST)
+
+    for path in directory.glob("shard-*.snapshot"):
+        if _generation(path) < generation - 1:
+            path.unlink()
+    return load_tenant(tenant, root)
+
+
+def _generation(path: Path) -> int:
+    """Generation of a ``shard-<generation>-<n>.snapshot`` file."""
+    return int(path.name.split("-")[1])
+
+
+def remove_tenant(tenant: str, root: Union[str, Path] = SHARDS_DIR) -> bool:
+    """Delete a tenant's shards; False if it had none."""
+    directory = _tenant_dir(root, tenant)
+    if not directory.exists():
+        return False
+    shutil.rmtree(directory)
+    return True
+
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+# shard path -> pipeline over it, least recently used first
+_PIPELINES: "OrderedDict[str, ConnectorPipeline]" = OrderedDict()
+
+
+def _shard_pipeline(path: str) -> ConnectorPipeline:
+    pipeline = _PIPELINES.pop(path, None)
+    if pipeline is None:
+        with METRICS.stage("shard_load"):
+            index = ContactIndex(ContactStore.open_snapshot(path))
+            index.precompute(NEED_EXTRACTOR.keywords)
+            pipeline = ConnectorPipeline(index)
+    _PIPELINES[path] = pipeline
+    while len(_PIPELINES) > SHARD_CACHE_SIZE:
+        _PIPELINES.popitem(last=False)
+    return pipeline
+
+
+def _worker(slot: int, in_queue, out_queue) -> None:
+    """Matcher process: rank needs on its shards until a None sentinel."""
+    METRICS.reset()  # a forked child starts with a copy of the parent's numbers
+    while True:
+        task = in_queue.get()
+        if task is None:
+            break
+        request_id, shard_no, path, offset, need, top_n = task
+        try:
+            positions, ranking = _shard_pipeline(path).rank_with_positions(need, top_n)
+            out_queue.put((_RESULT, slot, (request_id, shard_no, [offset + pos for pos in positions], ranking)))
+        except Exception:
+            out_queue.put((_FAILED, slot, (request_id, traceback.format_exc())))
+    out_queue.put((_DONE, slot, METRICS.export_state()))
+
+
+class _Gather:
+    """One request's shard results, merged when the last one arrives."""
+
+    def __init__(self, top_n: int, shards: int):
+        self.future: Future = Future()
+        self.top_n = top_n
+        self.remaining = shards
+        self.parts: List[Tuple[List[int], RankingResponse]] = []
+        self.started = time.perf_counter()
+
+    def merge(self) -> RankingResponse:
+        entries: List[Tuple[float, int, RankedContact]] = []
+        for positions, ranking in self.parts:
+            for pos, ranked in zip(positions, ranking.ranked_contacts):
+                entries.append((-round(ranked.rank_score, 2), pos, ranked))
+        entries.sort(key=lambda entry: entry[:2])
+        return RankingResponse(
+            ranked_contacts=[ranked for _, _, ranked in entries[:self.top_n]],
+            total_candidates=sum(ranking.total_candidates for _, ranking in self.parts),
+            ranking_time_ms=(time.perf_counter() - self.started) * 1000,
+            cpu_time_ms=sum(ranking.cpu_time_ms for _, ranking in self.parts),
+        )
+
+
+# ============================================================================
+# MATCHER
+# ============================================================================
+
+class ShardedMatcher:
+    """
+    Scatter-gather ranking over tenant shards in local worker processes.
+
+    ``submit`` is thread-safe and returns a future, so many requests (and
+    many tenants) can be in flight at once::
+
+        with ShardedMatcher() as matcher:
+            ranking = matcher.rank(need)             # tenant = need.user_id
+            future = matcher.submit(other_need, top_n=5, tenant="acme")
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path] = SHARDS_DIR,
+        workers: Optional[int] = SHARD_WORKERS,
+        prefetch: int = SHARD_PREFETCH,
+        start_method: Optional[str] = None,
+    ):
+        self.root = Path(root)
+        self.workers = workers or os.cpu_count() or 1
+        self.prefetch = max(1, prefetch)
+        self._context = multiprocessing.get_context(start_method)
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._tenants: Dict[str, Tuple[int, Optional[TenantShards]]] = {}
+        # Per worker: tenant -> waiting tasks, tenants in round-robin order, tasks held
+        self._waiting: List[Dict[str, Deque[tuple]]] = [{} for _ in range(self.workers)]
+        self._turns: List[Deque[str]] = [deque() for _ in range(self.workers)]
+        self._held = [0] * self.workers
+        self._gathers: Dict[int, _Gather] = {}
+        self._next_request = 0
+        self._procs: List[multiprocessing.Process] = []
+        self._queues: list = []
+        self._collector: Optional[threading.Thread] = None
+        self._broken: Optional[str] = None
+        self._closed = False
+
+    def __enter__(self) -> "ShardedMatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start the worker processes and the result collector."""
+        self._out = self._context.Queue()
+        for slot in range(self.workers):
+            in_queue = self._context.Queue()
+            proc = self._context.Process(target=_worker, args=(slot, in_queue, self._out), daemon=True)
+            proc.start()
+            self._queues.append(in_queue)
+            self._procs.append(proc)
+        self._collector = threading.Thread(target=self._collect, name="shard-collector", daemon=True)
+        self._collector.start()
+
+    @property
+    def pids(self) -> List[int]:
+        """Process ids of the matcher workers."""
+        return [proc.pid for proc in self._procs]
+
+    # ------------------------------------------------------------------ input
+
+    def tenant(self, tenant: str) -> Optional[TenantShards]:
+        """A tenant's shards, re-read whenever its manifest changes."""
+        path = _tenant_dir(self.root, tenant) / MANIFEST
+        try:
+            stamp = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            stamp = 0
+        cached = self._tenants.get(tenant)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, load_tenant(tenant, self.root) if stamp else None)
+            self._tenants[tenant] = cached
+        return cached[1]
+
+    def _slot(self, tenant: str, shard_no: int) -> int:
+        return (zlib.crc32(tenant.encode("utf-8")) + shard_no) % self.workers
+
+    def submit(self, need: NeedSpec, top_n: int = 3, tenant: Optional[str] = None) -> Future:
+        """
+        Rank a need on every shard of its tenant.
+
+        Args:
+            need: The need; its ``user_id`` names the tenant unless ``tenant`` is given
+            top_n: Number of top matches to return
+            tenant: Tenant whose network to rank
+
+        Returns:
+            Future of the merged ``RankingResponse``
+        """
+        tenant = tenant or need.user_id
+        layout = self.tenant(tenant)
+        if layout is None:
+            raise ValueError(f"Unknown tenant {tenant!r}: no shards in {self.root}")
+        gather = _Gather(top_n, len(layout.shards))
+        if not layout.shards or top_n <= 0:
+            gather.future.set_result(gather.merge())
+            return gather.future
+
+        with self._lock:
+            if self._broken or self._closed:
+                raise ShardError(self._broken or "ShardedMatcher is closed")
+            request_id = self._next_request
+            self._next_request += 1
+            self._gathers[request_id] = gather
+            touched = set()
+            for shard_no, shard in enumerate(layout.shards):
+                slot = self._slot(tenant, shard_no)
+                waiting = self._waiting[slot]
+                if tenant not in waiting:
+                    waiting[tenant] = deque()
+                    self._turns[slot].append(tenant)
+                waiting[tenant].append((request_id, shard_no, shard.path, shard.offset, need, top_n))
+                touched.add(slot)
+            for slot in touched:
+                self._dispatch(slot)
+        METRICS.incr("shard_tasks", len(layout.shards))
+        return gather.future
+
+    def rank(self, need: NeedSpec, top_n: int = 3, tenant: Optional[str] = None) -> RankingResponse:
+        """``submit`` and wait for the merged ranking."""
+        return self.submit(need, top_n, tenant).result()
+
+    def match_payload(self, need: NeedSpec, top_n: int = 3, tenant: Optional[str] = None) -> dict:
+        """The find_matching_contacts payload of a need, ranked over its tenant's shards."""
+        return ranking_to_payload(need, self.rank(need, top_n, tenant))
+
+    def _dispatch(self, slot: int) -> None:
+        """Hand a worker tasks, one tenant at a time in turn, up to ``prefetch`` (lock held)."""
+        turns, waiting = self._turns[slot], self._waiting[slot]
+        while self._held[slot] < self.prefetch and turns:
+            tenant = turns.popleft()
+            tasks = waiting[tenant]
+            self._queues[slot].put(tasks.popleft())
+            self._held[slot] += 1
+            if tasks:
+                turns.append(tenant)
+            else:
+                del waiting[tenant]
+
+    # ------------------------------------------------------------------ output
+
+    def _collect(self) -> None:
+        """Collector thread: merge shard results, refill workers, until every worker is done."""
+        done = 0
+        while done < len(self._procs):
+            try:
+                kind, slot, payload = self._out.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if not all(proc.is_alive() for proc in self._procs):
+                    self._fail_all("a shard worker exited")
+                    break
+                continue
+
+            if kind == _DONE:
+                METRICS.merge_state(payload)
+                done += 1
+                continue
+
+            finished, error = None, None
+            with self._lock:
+                self._held[slot] -= 1
+                self._dispatch(slot)
+                if kind == _RESULT:
+                    request_id, _, positions, ranking = payload
+                    gather = self._gathers.get(request_id)
+                    if gather is not None:
+                        gather.parts.append((positions, ranking))
+                        gather.remaining -= 1
+                        if not gather.remaining:
+                            finished = self._gathers.pop(request_id)
+                else:
+                    request_id, error = payload
+                    finished = self._gathers.pop(request_id, None)
+                if not self._gathers:
+                    self._idle.notify_all()
+
+            if finished is None:
+                continue
+            if error is not None:
+                METRICS.incr("shard_task_failures")
+                finished.future.set_exception(ShardError(f"Shard task failed:\n{error}"))
+            else:
+                ranking = finished.merge()
+                METRICS.observe("shard_gather_ms", ranking.ranking_time_ms)
+                finished.future.set_result(ranking)
+
+    def _fail_all(self, reason: str) -> None:
+        with self._lock:
+            self._broken = reason
+            gathers, self._gathers = list(self._gathers.values()), {}
+            self._idle.notify_all()
+        for gather in gathers:
+            gather.future.set_exception(ShardError(reason))
+
+    def close(self) -> None:
+        """Wait for requests in flight, then stop the workers and merge their metrics."""
+        if self._closed or self._collector is None:
+            return
+        with self._lock:
+            while self._gathers and not self._broken:
+                self._idle.wait()
+            self._closed = True
+        for in_queue in self._queues:
+            in_queue.put(None)
+        self._collector.join()
+        for proc in self._procs:
+            proc.join(timeout=5)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Partition tenant networks into shards and match across them.")
+    parser.add_argument("--root", default=str(SHARDS_DIR), help="Shards directory (default SHARDS_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="(Re)partition one tenant's contacts")
+    build.add_argument("tenant")
+    build.add_argument("contacts", help="JSON array or JSONL contacts file")
+    build.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+
+    match = commands.add_parser("match", help="Match one post against a tenant's network")
+    match.add_argument("tenant")
+    match.add_argument("post_text")
+    match.add_argument("--author", default="someone")
+    match.add_argument("--top-n", type=int, default=3)
+    match.add_argument("--workers", type=int, default=SHARD_WORKERS)
+
+    commands.add_parser("list", help="List partitioned tenants")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        layout = partition_tenant(args.tenant, iter_contacts(args.contacts), args.root, args.shard_size)
+        print(f"🧩 {layout.tenant}: {layout.contacts:,} contacts in {len(layout.shards)} shards "
+              f"(generation {layout.generation}, {time.perf_counter() - started:.1f}s)")
+    elif args.command == "match":
+        detected_type, keywords = NEED_EXTRACTOR.scan(args.post_text)
+        need = build_need_spec(args.post_text, args.author, detected_type, keywords)
+        with ShardedMatcher(args.root, workers=args.workers) as matcher:
+            print(json.dumps(matcher.match_payload(need, args.top_n, args.tenant), indent=2))
+    else:
+        for tenant in list_tenants(args.root):
+            layout = load_tenant(tenant, args.root)
+            print(f"   {tenant:<24} {layout.contacts:>10,} contacts  {len(layout.shards):>4} shards")
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Text normalization shared by the matcher and the ingestion tools."""
+import re
+import unicodedata
+from typing import List, Optional
+
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalized_tokens(text: Optional[str]) -> List[str]:
+    """Lowercased word tokens with accents removed."""
+    text = (text or "").lower()
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return TOKEN_RE.findall(text)
@@ -0,0 +1,401 @@
+"""
+Persistent outreach pipeline: ``PipelineCard`` store and follow-up scheduler.
+
+Cards live in a local SQLite file with indexes on stage, contact, need, next
+action date and change version, so lookups and due-date queries stay index
+scans with hundreds of thousands of cards. Every write call stamps the rows it
+touches with a new version number; ``changes(since)`` and the named run
+cursors (``last_run`` / ``mark_run``) answer "what changed since the last
+run" without scanning the table.
+
+Stage transitions can be applied to many cards in one call. Moving a card to
+``sent`` or a follow-up stage schedules its next action from
+``FOLLOW_UP_POLICY``; closed cards are never scheduled.
+
+``CardStore.due_actions`` answers "what is due now" from the next action
+date index, which is what a one-shot run needs. ``FollowUpScheduler`` is for
+long-lived processes: it keeps the scheduled cards in a heap ordered by next
+action date and catches up on store changes incrementally, so finding the
+next due action costs O(log n) after its one full load.
+"""
+
+import heapq
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union, get_args
+
+from app.models import PipelineCard
+
+
+CARD_STAGES: Tuple[str, ...] = get_args(PipelineCard.model_fields["stage"].annotation)
+CLOSED_STAGES = ("closed_won", "closed_lost")
+
+# stage -> (action that becomes due, delay after entering the stage)
+FOLLOW_UP_POLICY: Dict[str, Tuple[str, timedelta]] = {
+    "sent": ("follow_up_1", timedelta(days=3)),
+    "follow_up_1": ("follow_up_2", timedelta(days=4)),
+    "follow_up_2": ("closed_lost", timedelta(days=7)),
+}
+
+COLUMNS = (
+    "id", "need_spec_id", "contact_id", "stage", "rank_score", "rank_justification", "drafts",
+    "next_action_date", "status_tags", "outcome", "created_at", "updated_at", "version",
+)
+_SELECT = f"SELECT {', '.join(COLUMNS)} FROM cards"
+_SQL_VARIABLES = 500  # ids per IN (...) query, below SQLite's variable limit
+
+
+def card_id(need_spec_id: str, contact_id: str) -> str:
+    """Stable id of the card for one contact suggested for one need."""
+    return f"{need_spec_id}:{contact_id}"
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    # Fixed-width ISO strings sort chronologically, so SQLite can range-scan them
+    return None if value is None else value.isoformat(timespec="microseconds")
+
+
+def next_action(stage: str, entered_at: datetime) -> Optional[datetime]:
+    """When the follow-up policy schedules the next action for a card entering ``stage``."""
+    policy = FOLLOW_UP_POLICY.get(stage)
+    return None if policy is None else entered_at + policy[1]
+
+
+class DueAction(NamedTuple):
+    """A card whose next action date has passed, and the stage that action moves it to."""
+    card: PipelineCard
+    action: str
+
+
+def due_action(card: PipelineCard) -> DueAction:
+    """The action due for a scheduled card (its own stage if scheduled by hand outside the policy)."""
+    return DueAction(card, FOLLOW_UP_POLICY.get(card.stage, (card.stage,))[0])
+
+
+class CardStore:
+    """
+    SQLite-backed PipelineCard store.
+
+    Intended for one writer at a time (the monitor run or an operator
+    script). Writes are batched and committed every ``commit_every`` rows
+    and on ``close()``; use it as a context manager so a run always flushes.
+    """
+
+    def __init__(self, path: Union[str, Path], commit_every: int = 1000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+        self._pending = 0
+
+        # One writer at a time, but it may be a different thread than the opener
+        # (the monitor's result-writer thread)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS cards (
+                id TEXT PRIMARY KEY,
+                need_spec_id TEXT NOT NULL,
+                contact_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                rank_score REAL NOT NULL,
+                rank_justification TEXT NOT NULL,
+                drafts TEXT NOT NULL,
+                next_action_date TEXT,
+                status_tags TEXT NOT NULL,
+                outcome TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                version INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cards_stage ON cards (stage);
+            CREATE INDEX IF NOT EXISTS idx_cards_contact ON cards (contact_id);
+            CREATE INDEX IF NOT EXISTS idx_cards_need ON cards (need_spec_id);
+            CREATE INDEX IF NOT EXISTS idx_cards_version ON cards (version);
+            CREATE INDEX IF NOT EXISTS idx_cards_next_action ON cards (next_action_date)
+                WHERE next_action_date IS NOT NULL;
+            CREATE TABLE IF NOT EXISTS run_cursors (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                run_at TEXT NOT NULL
+            );
+        """)
+        self._version = self._db.execute("SELECT COALESCE(MAX(version), 0) FROM cards").fetchone()[0]
+
+    def __enter__(self) -> "CardStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    @property
+    def version(self) -> int:
+        """Version of the latest write; pass it to ``changes`` later to see what changed since."""
+        return self._version
+
+    # ------------------------------------------------------------------ rows
+
+    @staticmethod
+    def _row(card: PipelineCard, version: int) -> tuple:
+        return (
+            card.id, card.need_spec_id, card.contact_id, card.stage, card.rank_score, card.rank_justification,
+            json.dumps([draft.model_dump() for draft in card.drafts]) if card.drafts else "[]",
+            _timestamp(card.next_action_date if card.stage not in CLOSED_STAGES else None),
+            json.dumps(card.status_tags) if card.status_tags else "[]", card.outcome,
+            _timestamp(card.created_at), _timestamp(card.updated_at), version,
+        )
+
+    @staticmethod
+    def _card(row: tuple) -> PipelineCard:
+        (id_, need_spec_id, contact_id, stage, rank_score, rank_justification, drafts,
+         next_action_date, status_tags, outcome, created_at, updated_at, _) = row
+        return PipelineCard(
+            id=id_, need_spec_id=need_spec_id, contact_id=contact_id, stage=stage,
+            rank_score=rank_score, rank_justification=rank_justification,
+            drafts=json.loads(drafts),
+            next_action_date=next_action_date, status_tags=json.loads(status_tags), outcome=outcome,
+            created_at=created_at, updated_at=updated_at,
+        )
+
+    def _next_version(self) -> int:
+        self._version += 1
+        return self._version
+
+    def _wrote(self, rows: int) -> None:
+        self._pending += rows
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    # ------------------------------------------------------------------ writes
+
+    def add(self, cards: Iterable[PipelineCard]) -> int:
+        """
+        Insert new cards; cards whose id already exists are left untouched.
+
+        Returns:
+            Number of cards inserted
+        """
+        version = self._next_version()
+        before = self._db.total_changes
+        self._db.executemany(
+            f"INSERT OR IGNORE INTO cards ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            (self._row(card, version) for card in cards),
+        )
+        inserted = self._db.total_changes - before
+        self._wrote(inserted)
+        return inserted
+
+    def upsert(self, cards: Iterable[PipelineCard]) -> int:
+        """Insert or fully replace cards; returns the number written."""
+        version = self._next_version()
+        before = self._db.total_changes
+        self._db.executemany(
+            f"INSERT OR REPLACE INTO cards ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            (self._row(card, version) for card in cards),
+        )
+        written = self._db.total_changes - before
+        self._wrote(written)
+        return written
+
+    def transition(
+        self,
+        card_ids: Iterable[str],
+        stage: str,
+        at: Optional[datetime] = None,
+        next_action_date: Optional[datetime] = None,
+        outcome: Optional[str] = None,
+    ) -> int:
+        """
+        Move many cards to ``stage`` in one statement batch.
+
+        Args:
+            card_ids: Cards to move
+            stage: Target stage
+            at: When the move happened (default now)
+            next_action_date: Override the follow-up policy's date; ignored for closed stages
+            outcome: Recorded on the cards if given
+
+        Returns:
+            Number of cards moved
+        """
+        if stage not in CARD_STAGES:
+            raise ValueError(f"Unknown stage {stage!r}; expected one of {CARD_STAGES}")
+        at = at or datetime.now()
+        due = None if stage in CLOSED_STAGES else (next_action_date or next_action(stage, at))
+        version = self._next_version()
+        before = self._db.total_changes
+        self._db.executemany(
+            "UPDATE cards SET stage = ?, next_action_date = ?, outcome = COALESCE(?, outcome), "
+            "updated_at = ?, version = ? WHERE id = ?",
+            ((stage, _timestamp(due), outcome, _timestamp(at), version, id_) for id_ in card_ids),
+        )
+        moved = self._db.total_changes - before
+        self._wrote(moved)
+        return moved
+
+    # ------------------------------------------------------------------ reads
+
+    def get(self, card_id: str) -> Optional[PipelineCard]:
+        row = self._db.execute(f"{_SELECT} WHERE id = ?", (card_id,)).fetchone()
+        return None if row is None else self._card(row)
+
+    def get_many(self, card_ids: Sequence[str]) -> List[PipelineCard]:
+        """Cards by id, in the order given (unknown ids are skipped)."""
+        found: Dict[str, PipelineCard] = {}
+        for start in range(0, len(card_ids), _SQL_VARIABLES):
+            chunk = card_ids[start:start + _SQL_VARIABLES]
+            rows = self._db.execute(f"{_SELECT} WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            found.update((row[0], self._card(row)) for row in rows)
+        return [found[id_] for id_ in card_ids if id_ in found]
+
+    def _query(self, where: str, params: tuple, limit: Optional[int], order: str = "id") -> List[PipelineCard]:
+        sql = f"{_SELECT} WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [self._card(row) for row in self._db.execute(sql, params)]
+
+    def by_stage(self, stage: str, limit: Optional[int] = None) -> List[PipelineCard]:
+        return self._query("stage = ?", (stage,), limit)
+
+    def for_contact(self, contact_id: str) -> List[PipelineCard]:
+        return self._query("contact_id = ?", (contact_id,), None)
+
+    def for_need(self, need_spec_id: str) -> List[PipelineCard]:
+        return self._query("need_spec_id = ?", (need_spec_id,), None, order="rank_score DESC, id")
+
+    def due(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[PipelineCard]:
+        """Open cards whose next action date has passed, earliest first."""
+        return self._query(
+            "next_action_date IS NOT NULL AND next_action_date <= ?",
+            (_timestamp(now or datetime.now()),), limit, order="next_action_date, id",
+        )
+
+    def due_actions(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[DueAction]:
+        """Actions due at ``now``, earliest first (``due`` with the action each card is due for)."""
+        return [due_action(card) for card in self.due(now, limit)]
+
+    def stage_counts(self) -> Dict[str, int]:
+        return dict(self._db.execute("SELECT stage, COUNT(*) FROM cards GROUP BY stage"))
+
+    # ------------------------------------------------------------------ changes
+
+    def changes(self, since: int, limit: Optional[int] = None) -> List[PipelineCard]:
+        """Cards added or modified after version ``since``, oldest change first."""
+        return self._query("version > ?", (since,), limit, order="version, id")
+
+    def schedule_entries(self, since: int = 0) -> List[Tuple[str, Optional[str], int]]:
+        """(id, next_action_date, version) of cards changed after ``since``; 0 lists only scheduled cards."""
+        if since == 0:
+            return self._db.execute(
+                "SELECT id, next_action_date, version FROM cards WHERE next_action_date IS NOT NULL"
+            ).fetchall()
+        return self._db.execute(
+            "SELECT id, next_action_date, version FROM cards WHERE version > ?", (since,)
+        ).fetchall()
+
+    def last_run(self, name: str) -> int:
+        """Store version recorded by the last ``mark_run(name)`` (0 if never run)."""
+        row = self._db.execute("SELECT version FROM run_cursors WHERE name = ?", (name,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def mark_run(self, name: str, version: Optional[int] = None) -> None:
+        """Record that run ``name`` has seen every change up to ``version`` (default: now)."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO run_cursors (name, version, run_at) VALUES (?, ?, ?)",
+            (name, self._version if version is None else version, _timestamp(datetime.now())),
+        )
+        self.flush()
+
+    def changes_since_last_run(self, name: str) -> Tuple[List[PipelineCard], int]:
+        """
+        Cards changed since run ``name`` was last marked.
+
+        Returns:
+            (changed cards, version to pass to ``mark_run`` once they are handled)
+        """
+        return self.changes(self.last_run(name)), self._version
+
+    def flush(self) -> None:
+        """Commit pending writes."""
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        """Commit and close the store file."""
+        self.flush()
+        self._db.close()
+
+
+class FollowUpScheduler:
+    """
+    Priority queue of scheduled cards over a ``CardStore``.
+
+    The heap holds (next_action_date, card_id, version) entries. Changed
+    cards are pulled from the store by version before each query and pushed
+    again; superseded entries are dropped lazily when they reach the top.
+    """
+
+    def __init__(self, store: CardStore):
+        self.store = store
+        self._heap: List[Tuple[str, str, int]] = []
+        self._live: Dict[str, int] = {}  # card id -> version of its current heap entry
+        self._version = 0
+        self.sync()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def sync(self) -> int:
+        """Pull cards changed since the last sync; returns how many were (re)scheduled or dropped."""
+        entries = self.store.schedule_entries(self._version)
+        scheduled = []
+        for id_, due, version in entries:
+            if due is None:
+                self._live.pop(id_, None)
+                continue
+            self._live[id_] = version
+            scheduled.append((due, id_, version))
+        if len(scheduled) > len(self._heap):
+            self._heap.extend(scheduled)
+            heapq.heapify(self._heap)
+        else:
+            for entry in scheduled:
+                heapq.heappush(self._heap, entry)
+        self._version = self.store.version
+        return len(entries)
+
+    def _prune(self) -> None:
+        heap, live = self._heap, self._live
+        while heap and live.get(heap[0][1]) != heap[0][2]:
+            heapq.heappop(heap)
+
+    def next_due_date(self) -> Optional[datetime]:
+        """Date of the earliest scheduled action, if any."""
+        self.sync()
+        self._prune()
+        return datetime.fromisoformat(self._heap[0][0]) if self._heap else None
+
+    def due(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[DueAction]:
+        """
+        Actions due at ``now``, earliest first.
+
+        Cards stay scheduled until they are transitioned in the store, so an
+        action not acted on is returned again by the next call.
+        """
+        self.sync()
+        cutoff = _timestamp(now or datetime.now())
+        popped = []
+        while self._heap and (limit is None or len(popped) < limit):
+            self._prune()
+            if not self._heap or self._heap[0][0] > cutoff:
+                break
+            popped.append(heapq.heappop(self._heap))
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+
+        return [due_action(card) for card in self.store.get_many([id_ for _, id_, _ in popped])]
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+Columnar history archive of monitor results.
+
+Result files (``output/matches_*.jsonl[.gz|.zst]``, and the older
+``matches_*.json`` arrays) are ingested once into three append-only tables:
+
+- ``posts``: one row per processed post (need type, keyword and match
+  counts, top score, errors)
+- ``matches``: one row per suggested contact (rank, score, relevance, and
+  the card's stage and outcome when a card store is given)
+- ``keywords``: one row per need keyword, with the post's match count
+
+Tables are partitioned by day (``<table>/date=YYYY-MM-DD/part-*``). A part is
+a directory with one ``.npy`` file per column plus ``meta.json`` holding row
+counts and per-column min/max. String columns are dictionary-encoded: small
+integer codes plus a ``<column>.dict.json`` list of values.
+
+Queries read only the partitions in the date range and only the columns
+they touch, memory-mapped. Predicates are pushed down: parts whose min/max
+or dictionary cannot satisfy them are skipped unread, and string predicates
+are evaluated once per distinct value rather than once per row. Grouped
+counts and sums run as ``bincount`` over the codes.
+
+Every ingest writes new parts and records how many records of each file it
+took (and the file's size), so re-running it skips unchanged files and only
+adds the new records of a grown one. A file that shrank, or now holds fewer
+records than were taken (replaced or truncated), is read again from the
+start. ``compact`` merges each day's parts into one; with a card
+store it also refreshes match stages and outcomes.
+
+Usage:
+    python automation/history_archive.py ingest "output/matches_*"
+    python automation/history_archive.py compact --cards state/pipeline_cards.sqlite
+    python automation/history_archive.py top-contacts --since 2026-07-01
+    python automation/history_archive.py hit-rate --since 2026-07-01
+    python automation/history_archive.py unmatched-keywords --since 2026-07-01
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Add parent directory to path for app imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.contact_store import iter_json_records
+from automation.card_store import CardStore, card_id
+from automation.result_sink import read_results
+
+ARCHIVE_VERSION = 1
+DEFAULT_ARCHIVE_DIR = Path(os.getenv("HISTORY_DIR", "state/history"))
+
+# table -> column -> numpy dtype ("str" = dictionary-encoded)
+TABLES = {
+    "posts": {
+        "ts": "int64", "need_id": "str", "need_type": "str", "author": "str", "post_url": "str",
+        "keywords": "int16", "matches": "int16", "top_score": "float32", "error": "bool",
+    },
+    "matches": {
+        "ts": "int64", "need_id": "str", "need_type": "str", "contact_id": "str", "contact_name": "str",
+        "rank": "int16", "score": "float32", "relevance": "float32", "stage": "str", "outcome": "str",
+    },
+    "keywords": {
+        "ts": "int64", "need_id": "str", "need_type": "str", "keyword": "str", "matches": "int16",
+    },
+}
+
+OPERATORS = {
+    "==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+}
+
+MANIFEST = "ingested.json"
+
+
+class IngestResult(NamedTuple):
+    """What one ingest added."""
+    files: int
+    posts: int
+    matches: int
+    parts: int
+
+
+class Group(NamedTuple):
+    """One row of a grouped aggregate."""
+    key: str
+    count: int
+    total: float
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+# ============================================================================
+# PARTS
+# ============================================================================
+
+def _timestamp(value: Optional[str], fallback: float) -> tuple[int, str]:
+    """(epoch seconds, partition date) of an ISO timestamp."""
+    try:
+        moment = datetime.fromisoformat(value) if value else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        moment = datetime.fromtimestamp(fallback)
+    return int(moment.timestamp()), moment.date().isoformat()
+
+
+def _write_part(partition: Path, table: str, columns: dict[str, list]) -> Path:
+    """Write one part; it only becomes visible (renamed into place) once complete."""
+    part = partition / f"part-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+    staging = partition / f".tmp-{part.name}"
+    staging.mkdir(parents=True)
+    rows = len(columns["ts"])
+    meta = {"version": ARCHIVE_VERSION, "table": table, "rows": rows, "columns": {}}
+    for name, dtype in TABLES[table].items():
+        values = columns[name]
+        if dtype == "str":
+            dictionary = list(dict.fromkeys(values))
+            lookup = {value: code for code, value in enumerate(dictionary)}
+            codes = np.fromiter((lookup[value] for value in values), dtype=np.min_scalar_type(max(len(dictionary) - 1, 0)), count=rows)
+            np.save(staging / f"{name}.npy", codes)
+            (staging / f"{name}.dict.json").write_text(json.dumps(dictionary), encoding="utf-8")
+            meta["columns"][name] = {"dtype": dtype, "distinct": len(dictionary)}
+        else:
+            array = np.asarray(values, dtype=dtype)
+            np.save(staging / f"{name}.npy", array)
+            meta["columns"][name] = {
+                "dtype": dtype,
+                "min": array.min().item() if rows else None,
+                "max": array.max().item() if rows else None,
+            }
+    (staging / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    staging.rename(part)
+    return part
+
+
+class _Part:
+    """Lazy reader for one part: metadata up front, columns and dictionaries on demand."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.rows = self.meta["rows"]
+        self._dictionaries: dict[str, list[str]] = {}
+
+    def dictionary(self, column: str) -> list[str]:
+        if column not in self._dictionaries:
+            self._dictionaries[column] = json.loads((self.path / f"{column}.dict.json").read_text(encoding="utf-8"))
+        return self._dictionaries[column]
+
+    def column(self, name: str) -> np.ndarray:
+        return np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    def may_match(self, predicate: tuple) -> bool:
+        """False if the part's statistics rule the predicate out."""
+        column, op, value = predicate
+        info = self.meta["columns"][column]
+        if info["dtype"] == "str":
+            if op == "==":
+                return value in self.dictionary(column)
+            if op == "in":
+                return not set(value).isdisjoint(self.dictionary(column))
+            return True
+        low, high = info["min"], info["max"]
+        if low is None:
+            return False
+        return {
+            "==": low <= value <= high, "<": low < value, "<=": low <= value,
+            ">": high > value, ">=": high >= value,
+        }.get(op, True)
+
+    def mask(self, predicate: tuple) -> np.ndarray:
+        column, op, value = predicate
+        values = self.column(column)
+        if self.meta["columns"][column]["dtype"] == "str":
+            # Evaluate once per distinct value, then select rows by code
+            dictionary = np.array(self.dictionary(column), dtype=object)
+            if op == "in":
+                hits = np.isin(dictionary, list(value))
+            else:
+                hits = OPERATORS[op](dictionary, value).astype(bool)
+            return hits[values]
+        if op == "in":
+            return np.isin(values, list(value))
+        return OPERATORS[op](values, value)
+
+
+def _records(path: Path) -> Iterator[dict]:
+    """Result records of one file: JSON arrays (older runs) or JSONL, plain or compressed."""
+    if path.suffix == ".json":
+        return iter_json_records(path)
+    return read_results(path)
+
+
+# ============================================================================
+# ARCHIVE
+# ============================================================================
+
+class HistoryArchive:
+    """Date-partitioned columnar tables of past monitor results."""
+
+    def __init__(self, root: str | Path = DEFAULT_ARCHIVE_DIR):
+        self.root = Path(root)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _manifest(self) -> dict[str, list]:
+        path = self.root / MANIFEST
+        return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+    def _save_manifest(self, manifest: dict[str, list]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{MANIFEST}.tmp"
+        staging.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(staging, self.root / MANIFEST)
+
+    def ingest(self, paths: Iterable[str | Path], cards: Optional[CardStore] = None) -> IngestResult:
+        """
+        Append the records of result files not archived yet.
+
+        Args:
+            paths: Monitor result files
+            cards: Optional pipeline store for the stage and outcome of each match
+
+        Returns:
+            Files read, posts and matches added, parts written
+        """
+        manifest = self._manifest()
+        # partition date -> table -> column -> values
+        batches: dict[str, dict[str, dict[str, list]]] = {}
+        files = posts = matches = 0
+        for path in map(Path, paths):
+            key = str(path.resolve())
+            stat = path.stat()
+            done, size = manifest.get(key, (0, None))
+            if stat.st_size == size:
+                continue
+            if size is not None and stat.st_size < size:
+                done = 0
+            count, added, added_matches = self._ingest_file(path, done, stat.st_mtime, batches, cards)
+            if count < done:
+                # Fewer records than already taken: a different file now, read it all
+                done = 0
+                count, added, added_matches = self._ingest_file(path, done, stat.st_mtime, batches, cards)
+            manifest[key] = (count, stat.st_size)
+            files += count > done
+            posts += added
+            matches += added_matches
+
+        parts = 0
+        for day, tables in sorted(batches.items()):
+            for table, columns in tables.items():
+                if columns["ts"]:
+                    _write_part(self.root / table / f"date={day}", table, columns)
+                    parts += 1
+        self._save_manifest(manifest)
+        return IngestResult(files, posts, matches, parts)
+
+    def _ingest_file(
+        self, path: Path, done: int, fallback: float, batches: dict, cards: Optional[CardStore]
+    ) -> tuple[int, int, int]:
+        """Add the records after the first ``done``; returns (records in the file, posts added, matches added)."""
+        count = posts = matches = 0
+        for count, result in enumerate(_records(path), 1):
+            if count <= done or result.get("skipped"):
+                continue
+            ts, day = _timestamp(result.get("timestamp"), fallback)
+            tables = batches.setdefault(day, {table: {name: [] for name in TABLES[table]} for table in TABLES})
+            matches += self._add_result(tables, result, ts, cards)
+            posts += 1
+        return count, posts, matches
+
+    @staticmethod
+    def _add_result(tables: dict[str, dict[str, list]], result: dict, ts: int, cards: Optional[CardStore]) -> int:
+        need = result.get("need") or {}
+        need_id = result.get("need_id") or ""
+        need_type = need.get("need_type", "")
+        keywords = need.get("keywords", [])
+        found = result.get("matches", [])
+        post = result.get("post") or result.get("post_data") or {}
+
+        row = tables["posts"]
+        row["ts"].append(ts)
+        row["need_id"].append(need_id)
+        row["need_type"].append(need_type)
+        row["author"].append(post.get("author_name", ""))
+        row["post_url"].append(post.get("post_url", ""))
+        row["keywords"].append(len(keywords))
+        row["matches"].append(len(found))
+        row["top_score"].append(max((match.get("match_score", 0.0) for match in found), default=0.0))
+        row["error"].append("error" in result)
+
+        row = tables["keywords"]
+        for keyword in dict.fromkeys(keyword.lower() for keyword in keywords):
+            row["ts"].append(ts)
+            row["need_id"].append(need_id)
+            row["need_type"].append(need_type)
+            row["keyword"].append(keyword)
+            row["matches"].append(len(found))
+
+        known = {}
+        if cards is not None and need_id and found:
+            known = {card.id: card for card in cards.get_many([card_id(need_id, m["contact"]["id"]) for m in found])}
+        row = tables["matches"]
+        for rank, match in enumerate(found, 1):
+            contact = match.get("contact", {})
+            card = known.get(card_id(need_id, contact.get("id", "")))
+            row["ts"].append(ts)
+            row["need_id"].append(need_id)
+            row["need_type"].append(need_type)
+            row["contact_id"].append(contact.get("id", ""))
+            row["contact_name"].append(contact.get("name", ""))
+            row["rank"].append(rank)
+            row["score"].append(match.get("match_score", 0.0))
+            row["relevance"].append(match.get("relevance", 0.0))
+            row["stage"].append(card.stage if card is not None else "")
+            row["outcome"].append((card.outcome or "") if card is not None else "")
+        return len(found)
+
+    def compact(self, cards: Optional[CardStore] = None, tables: Sequence[str] = tuple(TABLES)) -> int:
+        """
+        Merge each day's parts into one (and refresh match stages from ``cards``).
+
+        The merged part is in place before the parts it replaces are removed.
+
+        Returns:
+            Number of parts removed
+        """
+        removed = 0
+        for table in tables:
+            for partition in self.partitions(table):
+                parts = self._parts(partition)
+                if len(parts) < 2 and not (cards is not None and table == "matches"):
+                    continue
+                columns = {name: self._read(parts, name).tolist() for name in TABLES[table]}
+                if cards is not None and table == "matches":
+                    self._refresh_outcomes(columns, cards)
+                _write_part(partition, table, columns)
+                for part in parts:
+                    shutil.rmtree(part.path)
+                removed += len(parts)
+        return removed
+
+    @staticmethod
+    def _refresh_outcomes(columns: dict[str, list], cards: CardStore) -> None:
+        ids = [card_id(need_id, contact_id) for need_id, contact_id in zip(columns["need_id"], columns["contact_id"])]
+        known = {card.id: card for card in cards.get_many(list(dict.fromkeys(ids)))}
+        columns["stage"] = [known[id_].stage if id_ in known else "" for id_ in ids]
+        columns["outcome"] = [(known[id_].outcome or "") if id_ in known else "" for id_ in ids]
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def partitions(self, table: str, since: Optional[date] = None, until: Optional[date] = None) -> list[Path]:
+        """Day partitions of a table within [since, until], oldest first."""
+        if table not in TABLES:
+            raise ValueError(f"Unknown table {table!r}; expected one of {tuple(TABLES)}")
+        low = since.isoformat() if since else ""
+        high = until.isoformat() if until else "9999"
+        directory = self.root / table
+        if not directory.exists():
+            return []
+        return sorted(
+            path for path in directory.iterdir()
+            if path.name.startswith("date=") and low <= path.name[5:] <= high
+        )
+
+    @staticmethod
+    def _parts(partition: Path) -> list[_Part]:
+        return [_Part(path) for path in sorted(partition.iterdir()) if path.name.startswith("part-")]
+
+    @staticmethod
+    def _read(parts: list[_Part], column: str, masks: Optional[list] = None) -> np.ndarray:
+        """One column across parts (strings decoded), optionally row-filtered per part."""
+        masks = masks or [None] * len(parts)
+        if not parts:
+            return np.array([])
+        if parts[0].meta["columns"][column]["dtype"] != "str":
+            return np.concatenate([
+                np.asarray(part.column(column) if mask is None else part.column(column)[mask])
+                for part, mask in zip(parts, masks)
+            ])
+        return np.concatenate([
+            np.array(part.dictionary(column), dtype=object)[part.column(column) if mask is None else part.column(column)[mask]]
+            for part, mask in zip(parts, masks)
+        ])
+
+    def _select(self, table: str, where: Sequence[tuple], since: Optional[date], until: Optional[date]):
+        """Parts that may match, with the row mask of each (None = every row)."""
+        for partition in self.partitions(table, since, until):
+            for part in self._parts(partition):
+                if not part.rows or not all(part.may_match(predicate) for predicate in where):
+                    continue
+                mask = None
+                for predicate in where:
+                    hits = part.mask(predicate)
+                    mask = hits if mask is None else mask & hits
+                if mask is not None and not mask.any():
+                    continue
+                yield part, mask
+
+    def scan(
+        self,
+        table: str,
+        columns: Sequence[str],
+        where: Sequence[tuple] = (),
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Read some columns of the rows matching every predicate.
+
+        Args:
+            table: "posts", "matches" or "keywords"
+            columns: Columns to return
+            where: ``(column, op, value)`` predicates; op is one of
+                ``== != < <= > >=`` or ``in`` (value is a collection)
+            since: First day to read (inclusive)
+            until: Last day to read (inclusive)
+
+        Returns:
+            Column name -> array (strings as object arrays)
+        """
+        selected = list(self._select(table, where, since, until))
+        parts = [part for part, _ in selected]
+        masks = [mask for _, mask in selected]
+        return {column: self._read(parts, column, masks) for column in columns}
+
+    def group(
+        self,
+        table: str,
+        by: str,
+        value: Optional[str] = None,
+        where: Sequence[tuple] = (),
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> list[Group]:
+        """
+        Count rows (and sum ``value``) per distinct ``by``, most frequent first.
+
+        Codes are remapped to one shared dictionary per query and counted
+        with ``bincount``, so no per-row Python work is done.
+        """
+        keys: dict[str, int] = {}
+        counts = np.zeros(0, dtype=np.int64)
+        totals = np.zeros(0, dtype=np.float64)
+        for part, mask in self._select(table, where, since, until):
+            remap = np.fromiter((keys.setdefault(key, len(keys)) for key in part.dictionary(by)), dtype=np.int64)
+            codes = part.column(by) if mask is None else part.column(by)[mask]
+            global_codes = remap[codes]
+            size = len(keys)
+            counts = np.pad(counts, (0, size - len(counts))) + np.bincount(global_codes, minlength=size)
+            if value is not None:
+                weights = part.column(value) if mask is None else part.column(value)[mask]
+                totals = np.pad(totals, (0, size - len(totals))) + np.bincount(global_codes, weights=weights, minlength=size)
+        names = list(keys)
+        order = np.argsort(-counts, kind="stable")
+        return [
+            Group(names[i], int(counts[i]), float(totals[i]) if value is not None else 0.0)
+            for i in order if counts[i]
+        ]
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def top_contacts(self, since: Optional[date] = None, until: Optional[date] = None, limit: int = 20) -> list[tuple[str, str, int, float]]:
+        """Most often matched contacts: (contact_id, name, matches, mean score)."""
+        groups = self.group("matches", "contact_id", value="score", since=since, until=until)[:limit]
+        if not groups:
+            return []
+        names = self.scan("matches", ["contact_id", "contact_name"], [("contact_id", "in", {g.key for g in groups})], since, until)
+        name_of = dict(zip(names["contact_id"], names["contact_name"]))
+        return [(g.key, name_of.get(g.key, ""), g.count, g.mean) for g in groups]
+
+    def hit_rate(self, since: Optional[date] = None, until: Optional[date] = None) -> list[tuple[str, int, int, float]]:
+        """Per need type: (need_type, posts, posts with a match, hit rate)."""
+        where = [("error", "==", False)]
+        posts = {g.key: g.count for g in self.group("posts", "need_type", where=where, since=since, until=until)}
+        hits = {g.key: g.count for g in self.group("posts", "need_type", where=where + [("matches", ">", 0)], since=since, until=until)}
+        return [(need_type, count, hits.get(need_type, 0), hits.get(need_type, 0) / count) for need_type, count in posts.items()]
+
+    def unmatched_keywords(self, since: Optional[date] = None, until: Optional[date] = None, limit: int = 20) -> list[Group]:
+        """Keywords of needs that got no match, most frequent first."""
+        return self.group("keywords", "keyword", where=[("matches", "==", 0)], since=since, until=until)[:limit]
+
+
+def _day(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Columnar archive and reports over past monitor results.")
+    parser.add_argument("--archive", default=str(DEFAULT_ARCHIVE_DIR), help="Archive directory (default HISTORY_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Append result files not archived yet")
+    ingest.add_argument("results", nargs="*", default=["output/matches_*"], help="Result files (globs)")
+    ingest.add_argument("--cards", help="Pipeline card store for match stages and outcomes")
+
+    compact = commands.add_parser("compact", help="Merge each day's parts into one")
+    compact.add_argument("--cards", help="Refresh match stages and outcomes from this card store")
+
+    for name in ("top-contacts", "hit-rate", "unmatched-keywords"):
+        report = commands.add_parser(name)
+        report.add_argument("--since", type=_day, help="First day (YYYY-MM-DD)")
+        report.add_argument("--until", type=_day, help="Last day (YYYY-MM-DD)")
+        report.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    archive = HistoryArchive(args.archive)
+    started = datetime.now()
+    if args.command in ("ingest", "compact"):
+        cards = CardStore(args.cards) if args.cards else None
+        try:
+            if args.command == "ingest":
+                paths = sorted(path for pattern in args.results for path in glob.glob(pattern))
+                result = archive.ingest(paths, cards)
+                print(f"📦 {result.posts:,} posts and {result.matches:,} matches from {result.files} files "
+                      f"({result.parts} parts)")
+            else:
+                print(f"🗜️  Merged {archive.compact(cards):,} parts")
+        finally:
+            if cards is not None:
+                cards.close()
+    elif args.command == "top-contacts":
+        for contact_id, name, count, mean in archive.top_contacts(args.since, args.until, args.limit):
+            print(f"   {count:>7,}  {mean:.2f}  {name} ({contact_id})")
+    elif args.command == "hit-rate":
+        for need_type, posts, hits, rate in archive.hit_rate(args.since, args.until):
+            print(f"   {need_type or '(none)':<14} {posts:>8,} posts  {hits:>8,} matched  {rate:6.1%}")
+    else:
+        for group in archive.unmatched_keywords(args.since, args.until, args.limit):
+            print(f"   {group.count:>7,}  {group.key}")
+    print(f"✅ Done in {(datetime.now() - started).total_seconds():.2f}s")
+
+
+if __name__ == "__main__":
+    main()
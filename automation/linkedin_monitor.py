@@ -3,119 +3,113 @@
 LinkedIn Network Monitor - Automated post scanning and contact matching
 
 This script uses Perplexity API to search for LinkedIn posts containing
-"I need X" requests, then processes them through the agent to find matches.
+"I need X" requests, then processes them through the matching pipeline to find
+matches. Only the matching core is imported: no ADK, no Google auth.
 """
 
+import asyncio
 import os
 import json
 import sys
 from datetime import datetime
 from pathlib import Path
-import requests
 
 # Add parent directory to path for app imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.agent import app
-from app.models import LinkedInPost, Contact
+from app.agent import get_pipeline
+from app.metrics import METRICS
+from app.models import MessageDraft, PipelineCard
+from automation.card_store import CardStore, card_id
+from automation.response_cache import ResponseCache
+from automation.result_sink import ResultSink
+from automation.seen_index import SeenPostIndex, normalize_post_url
+from automation.worker_pool import DEFAULT_BATCH_SIZE, DEFAULT_QUEUE_SIZE, ProcessingPool
 
 # Perplexity API configuration
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
-PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_API_URL = os.getenv("PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions")
+PERPLEXITY_TIMEOUT = float(os.getenv("PERPLEXITY_TIMEOUT", "60"))
 
+# Search concurrency / rate limits for a run
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "8"))
+SEARCH_RATE_PER_SEC = float(os.getenv("SEARCH_RATE_PER_SEC", "2"))
 
-def search_linkedin_posts(search_query: str) -> list[dict]:
-    """
-    Use Perplexity API to search for recent LinkedIn posts.
-    
-    Args:
-        search_query: Search query for LinkedIn posts
-        
-    Returns:
-        List of post data dictionaries
-    """
-    if not PERPLEXITY_API_KEY:
-        print("❌ PERPLEXITY_API_KEY not found in environment")
-        return []
-    
-    headers = {
-        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "model": "llama-3.1-sonar-small-128k-online",
-        "messages": [
-            {
-                "role": "system",
-                "content": "You are a LinkedIn post search assistant. Extract recent LinkedIn posts that match the search criteria. Return results as JSON array with fields: author_name, author_profile_url, post_text, post_url, posted_date."
-            },
-            {
-                "role": "user",
-                "content": f"Search for recent LinkedIn posts containing: {search_query}. Find posts from the last 7 days. Return as JSON array."
-            }
-        ],
-        "temperature": 0.2,
-        "return_citations": True
-    }
-    
-    try:
-        response = requests.post(PERPLEXITY_API_URL, json=payload, headers=headers)
-        response.raise_for_status()
-        
-        result = response.json()
-        content = result["choices"][0]["message"]["content"]
-        
-        # Try to parse JSON from response
-        try:
-            posts = json.loads(content)
-            if isinstance(posts, list):
-                return posts
-        except json.JSONDecodeError:
-            # If not pure JSON, try to extract JSON from markdown code blocks
-            import re
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)```', content)
-            if json_match:
-                posts = json.loads(json_match.group(1))
-                if isinstance(posts, list):
-                    return posts
-        
-        print(f"⚠️  Could not parse LinkedIn posts from response")
-        return []
-        
-    except Exception as e:
-        print(f"❌ Error searching LinkedIn posts: {e}")
-        return []
+# Search response cache: off | cache | record | replay
+SEARCH_CACHE_MODE = os.getenv("SEARCH_CACHE_MODE", "cache")
+SEARCH_CACHE_DIR = Path(os.getenv("SEARCH_CACHE_DIR", "state/search_cache"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+
+# Streaming results output: one JSONL record per processed post
+RESULTS_DIR = Path(os.getenv("RESULTS_DIR", "output"))
+RESULTS_COMPRESSION = os.getenv("RESULTS_COMPRESSION") or None  # gzip | zstd
+RESULTS_MAX_BYTES = int(os.getenv("RESULTS_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULTS_MAX_AGE = float(os.getenv("RESULTS_MAX_AGE", "3600"))
+
+# Cross-run index of already processed posts
+SEEN_INDEX_PATH = Path(os.getenv("SEEN_INDEX_PATH", "state/seen_posts.sqlite"))
+
+# Outreach pipeline cards and the follow-up schedule
+CARD_STORE_PATH = Path(os.getenv("CARD_STORE_PATH", "state/pipeline_cards.sqlite"))
+FOLLOW_UPS_SHOWN = 10
+
+# Matcher worker processes (0 = process posts inline in the search loop)
+MONITOR_WORKERS = int(os.getenv("MONITOR_WORKERS", "0"))
+MONITOR_QUEUE_SIZE = int(os.getenv("MONITOR_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE)))
+MONITOR_BATCH_SIZE = int(os.getenv("MONITOR_BATCH_SIZE", str(DEFAULT_BATCH_SIZE)))
+
+# Matcher daemon to call instead of matching in-process (python -m app.daemon):
+# http://host:port or unix://path/to/socket
+MATCHER_URL = os.getenv("MATCHER_URL")
+_MATCHER_CLIENT = None
+
+# Columnar archive each run's results are appended to (python automation/history_archive.py)
+HISTORY_DIR = os.getenv("HISTORY_DIR")
+
+# Per-run metrics snapshot: json | prometheus
+METRICS_FORMAT = os.getenv("METRICS_FORMAT", "json")
+METRICS_DIR = Path(os.getenv("METRICS_DIR", str(RESULTS_DIR)))
+
+
+def matcher_client():
+    """The MATCHER_URL daemon client, created on first use (one per process)."""
+    global _MATCHER_CLIENT
+    if _MATCHER_CLIENT is None:
+        from app.daemon import MatcherClient
+        _MATCHER_CLIENT = MatcherClient(MATCHER_URL)
+    return _MATCHER_CLIENT
 
 
 def process_post(post_data: dict) -> dict:
     """
-    Process a LinkedIn post through the agent to find matching contacts.
+    Process a LinkedIn post through the matching pipeline to find matching contacts.
     
     Args:
         post_data: Dictionary with post information
         
     Returns:
-        Dictionary with matches and agent results
+        Dictionary with the post, extracted need, matches and intro drafts
     """
     try:
-        # Create LinkedInPost object
-        post = LinkedInPost(
-            author_name=post_data.get("author_name", "Unknown"),
-            author_profile_url=post_data.get("author_profile_url", ""),
-            post_text=post_data.get("post_text", ""),
-            post_url=post_data.get("post_url", ""),
-            posted_date=post_data.get("posted_date", datetime.now().isoformat())
-        )
+        post = {
+            "author_name": post_data.get("author_name", "Unknown"),
+            "author_profile_url": post_data.get("author_profile_url", ""),
+            "post_text": post_data.get("post_text", ""),
+            "post_url": post_data.get("post_url", ""),
+            "posted_date": post_data.get("posted_date", datetime.now().isoformat())
+        }
         
-        # Use the agent to process the post
-        # The agent will extract the bounty, match contacts, and rank them
-        query = f"Process this LinkedIn post and find matching contacts: {post.post_text}"
+        # Extract the need, rank contacts and draft intros (no LLM round trip),
+        # in-process or on the warm matcher daemon
+        if MATCHER_URL:
+            with METRICS.stage("matcher_call"):
+                matched = matcher_client().process(post["post_text"], post["author_name"])
+        else:
+            matched = get_pipeline().process_payload(post["post_text"], post["author_name"])
         
-        # In a real implementation, you'd call the agent here
-        # For now, return the post data
         return {
-            "post": post.model_dump(),
+            "post": post,
+            **matched,
             "processed": True,
             "timestamp": datetime.now().isoformat()
         }
@@ -125,35 +119,197 @@ def process_post(post_data: dict) -> dict:
         return {"error": str(e), "post_data": post_data}
 
 
-def save_results(results: list[dict], output_dir: Path = Path("output")):
+def result_cards(result: dict) -> list[PipelineCard]:
+    """
+    Pipeline cards for the matches of one processed post.
+    
+    Args:
+        result: Output of process_post
+        
+    Returns:
+        One card per match, "drafted" with its intro drafts when it has them
+    """
+    need_id = result.get("need_id")
+    if not need_id:
+        return []
+    drafts = {entry["contact_id"]: entry for entry in result.get("intro_drafts", [])}
+    cards = []
+    for match in result.get("matches", []):
+        contact_id = match["contact"]["id"]
+        draft = drafts.get(contact_id)
+        cards.append(PipelineCard(
+            id=card_id(need_id, contact_id),
+            need_spec_id=need_id,
+            contact_id=contact_id,
+            stage="drafted" if draft else "candidates",
+            rank_score=match["match_score"],
+            rank_justification=match["why_good_match"],
+            drafts=[
+                MessageDraft(channel="linkedin_dm", body=draft[direction], char_count=len(draft[direction]))
+                for direction in ("to_poster", "to_contact")
+            ] if draft else [],
+        ))
+    return cards
+
+
+def write_result(
+    sink: ResultSink,
+    result: dict,
+    cards: CardStore | None = None,
+    seen_index: SeenPostIndex | None = None,
+) -> None:
     """
-    Save processing results to JSON file.
+    Append one processed post to the results (only ever called from one thread).
     
     Args:
-        results: List of processing results
-        output_dir: Directory to save results
+        sink: Results writer
+        result: Output of process_post
+        cards: Optional pipeline store; new matches are added as cards
+        seen_index: Optional cross-run index; the post is recorded once its
+            result is saved, so failed posts are retried by the next run
+    """
+    if "error" in result:
+        METRICS.incr("posts_failed")
+    with METRICS.stage("save"):
+        sink.write(result)
+        if cards is not None:
+            METRICS.incr("cards_added", cards.add(result_cards(result)))
+        if seen_index is not None and "error" not in result:
+            seen_index.add(result["post"])
+    METRICS.incr("posts_processed")
+
+
+def report_follow_ups(cards: CardStore, run_name: str = "linkedin_monitor") -> int:
     """
-    output_dir.mkdir(exist_ok=True)
+    Print what changed in the outreach pipeline since the last run and which follow-ups are due.
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = output_dir / f"matches_{timestamp}.json"
+    Args:
+        cards: Pipeline store
+        run_name: Cursor name for "since the last run"
+        
+    Returns:
+        Number of due follow-up actions
+    """
+    changed, version = cards.changes_since_last_run(run_name)
+    counts = cards.stage_counts()
+    print(f"\n🗂️  Pipeline: {len(changed)} cards changed since the last run; "
+          + ", ".join(f"{stage} {count}" for stage, count in sorted(counts.items())))
     
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2)
+    # One indexed range query; a scheduler heap only pays off in a long-lived process
+    due = cards.due_actions()
+    if due:
+        print(f"📅 {len(due)} follow-ups due:")
+        for action in due[:FOLLOW_UPS_SHOWN]:
+            card = action.card
+            print(f"   {card.next_action_date:%Y-%m-%d}  {card.contact_id} ({card.need_spec_id}): "
+                  f"{card.stage} -> {action.action}")
+    cards.mark_run(run_name, version)
+    return len(due)
+
+
+async def run_searches(
+    search_queries: list[str],
+    sink: ResultSink,
+    seen_index: SeenPostIndex,
+    pool: ProcessingPool | None = None,
+    cards: CardStore | None = None,
+) -> int:
+    """
+    Run every search query concurrently and process posts as they arrive.
     
-    print(f"✅ Results saved to {output_file}")
-    return output_file
+    Args:
+        search_queries: Search queries to monitor
+        sink: Results writer; each processed post is appended as it finishes
+        seen_index: Cross-run index; known posts are skipped, and inline-processed
+            posts are recorded once saved (the pool's writer records its own)
+        pool: Optional matcher worker pool; new posts are handed to it instead
+            of being processed inline (it writes to the sink itself)
+        cards: Optional pipeline store for the matches of inline-processed posts
+        
+    Returns:
+        Number of posts processed inline or handed to the pool
+
+    Raises:
+        ReplayMiss: in replay mode, when a search response was never recorded
+    """
+    processed = 0
+    skipped = 0
+    
+    # Replays never reach the API, so they need no key
+    if not PERPLEXITY_API_KEY and SEARCH_CACHE_MODE != "replay":
+        print("❌ PERPLEXITY_API_KEY not found in environment")
+        return processed
+    
+    from automation.search_client import AsyncSearchClient
+    
+    cache = ResponseCache(SEARCH_CACHE_DIR, SEARCH_CACHE_MODE, ttl_seconds=SEARCH_CACHE_TTL)
+    
+    print(f"\n🔎 Searching {len(search_queries)} queries (max {SEARCH_MAX_CONCURRENCY} in flight)")
+    
+    # Posts handed over this run; they are only recorded in the index once saved
+    handed: set[str] = set()
+    
+    async with AsyncSearchClient(
+        PERPLEXITY_API_KEY,
+        PERPLEXITY_API_URL,
+        max_concurrency=SEARCH_MAX_CONCURRENCY,
+        rate_per_sec=SEARCH_RATE_PER_SEC,
+        timeout=PERPLEXITY_TIMEOUT,
+        cache=cache,
+    ) as client:
+        async for query, post_data in client.stream_posts(search_queries):
+            METRICS.incr("posts_seen")
+            url_key = normalize_post_url(post_data.get("post_url", ""))
+            if (url_key and url_key in handed) or seen_index.seen(post_data):
+                METRICS.incr("posts_skipped")
+                skipped += 1
+                continue
+            handed.add(url_key)
+            processed += 1
+            if pool is not None:
+                # Blocks (without stalling the searches) while the workers are saturated
+                await pool.submit_async(post_data)
+                continue
+            write_result(sink, process_post(post_data), cards, seen_index)
+            print(f"\n📝 Processed post {processed} (from: {query})")
+    
+    print(f"\n⏭️  Skipped {skipped} already-seen posts")
+    if cache.mode != "off":
+        print(f"🗄️  Search cache ({cache.mode}): {cache.hits} hits, {cache.misses} misses")
+    return processed
+
+
+def write_run_metrics() -> Path:
+    """
+    Write this run's metrics snapshot and print where the time went.
+    
+    Returns:
+        Path of the snapshot file
+    """
+    snapshot = METRICS.snapshot()
+    print(f"\n⏱️  Stage timings ({snapshot['elapsed_s']}s run):")
+    for stage, timing in sorted(snapshot["stages"].items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"   {stage:<8} {timing['count']:>6}x  total {timing['total_ms']:>10.1f}ms  "
+              f"p50 {timing['p50_ms']:>8.2f}ms  p99 {timing['p99_ms']:>8.2f}ms  cpu {timing['cpu_ms']:>9.1f}ms")
+    
+    suffix = ".prom" if METRICS_FORMAT == "prometheus" else ".json"
+    path = METRICS_DIR / f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+    return METRICS.write(path, METRICS_FORMAT)
 
 
 def main():
     """
     Main automation workflow:
     1. Search for LinkedIn posts with "I need" requests
-    2. Process each post through the agent
-    3. Save results for notification/follow-up
+    2. Process each post through the matching pipeline
+    3. Stream results to disk for notification/follow-up
+    4. Add new matches to the pipeline store and list due follow-ups
     """
     print("🔍 LinkedIn Network Monitor - Starting...")
     print(f"⏰ Run time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    METRICS.reset()
+    if MATCHER_URL:
+        print(f"🔌 Matching on the daemon at {MATCHER_URL}")
     
     # Search queries to monitor
     search_queries = [
@@ -162,26 +318,44 @@ def main():
         '"looking to connect with" OR "seeking recommendations" site:linkedin.com/posts'
     ]
     
-    all_results = []
+    with CardStore(CARD_STORE_PATH) as cards, SeenPostIndex(SEEN_INDEX_PATH) as seen_index, ResultSink(
+        RESULTS_DIR,
+        compression=RESULTS_COMPRESSION,
+        max_bytes=RESULTS_MAX_BYTES,
+        max_age_seconds=RESULTS_MAX_AGE,
+    ) as sink:
+        if MONITOR_WORKERS > 0:
+            print(f"🧵 Matching with {MONITOR_WORKERS} worker processes")
+            with ProcessingPool(
+                process_post,
+                lambda result: write_result(sink, result, cards, seen_index),
+                workers=MONITOR_WORKERS,
+                initializer=None if MATCHER_URL else get_pipeline,
+                queue_size=MONITOR_QUEUE_SIZE,
+                batch_size=MONITOR_BATCH_SIZE,
+            ) as pool:
+                asyncio.run(run_searches(search_queries, sink, seen_index, pool, cards))
+            processed = pool.results_handled
+        else:
+            processed = asyncio.run(run_searches(search_queries, sink, seen_index, cards=cards))
+        report_follow_ups(cards)
     
-    for query in search_queries:
-        print(f"\n🔎 Searching: {query}")
-        posts = search_linkedin_posts(query)
-        print(f"📊 Found {len(posts)} posts")
-        
-        for i, post_data in enumerate(posts, 1):
-            print(f"\n📝 Processing post {i}/{len(posts)}...")
-            result = process_post(post_data)
-            all_results.append(result)
-    
-    # Save all results
-    if all_results:
-        output_file = save_results(all_results)
-        print(f"\n✨ Processed {len(all_results)} total posts")
-        print(f"📁 Results: {output_file}")
+    if processed:
+        print(f"\n✨ Processed {processed} total posts")
+        for output_file in sink.files:
+            print(f"📁 Results: {output_file}")
     else:
         print("\n⚠️  No posts found to process")
     
+    if HISTORY_DIR and sink.files:
+        # numpy is only needed here, so it is imported on use
+        from automation.history_archive import HistoryArchive
+        archived = HistoryArchive(HISTORY_DIR).ingest(sink.files)
+        print(f"📦 Archived {archived.posts} posts and {archived.matches} matches to {HISTORY_DIR}")
+    
+    metrics_file = write_run_metrics()
+    print(f"📊 Metrics: {metrics_file}")
+    
     print("\n✅ LinkedIn monitoring completed successfully!")
 
 
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Standing-need index: match new or re-tagged contacts against open needs.
+
+Matching normally runs from a new post to every contact. This index runs it
+the other way: open needs are stored as standing queries (keywords, NeedSpec
+constraints, their current top matches and the stage of their pipeline
+cards), and each added or updated contact is percolated through them.
+
+The scoring rules are the ones ``find_matching_contacts`` uses:
+
+- a keyword matches a tag when ``keyword in tag or tag in keyword``
+  (lowercased), and every matching tag occurrence is one hit
+- relevance is 0.25 per hit, capped at 1.0, and must exceed 0.2
+- the score blends relevance and relationship strength 0.7 / 0.3
+- geography, keywords_avoid and target_persona are applied like
+  ``app.constraint_index``
+
+A contact newly qualifies for a need when it beats the need's current n-th
+best rounded score, or the need has fewer than n matches. Ties go to the
+incumbent, as they would for a contact appended to the network.
+
+Keywords are indexed by every substring, so the needs a tag can hit are found
+with dictionary lookups over the tag's own substrings. The cost of adding a
+contact depends on its tags and on the needs it actually hits, not on how
+many needs are open.
+
+Needs stop being matched once one of their cards is ``closed_won``. Contacts
+that already have a card for a need are never reported for it again.
+"""
+
+import argparse
+import glob
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Sequence
+
+# Add parent directory to path for app imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.constraint_index import contact_allowed
+from app.contact_index import MIN_RELEVANCE, RELATIONSHIP_WEIGHT, RELEVANCE_PER_HIT, RELEVANCE_WEIGHT
+from app.contact_store import ContactStore
+from app.metrics import METRICS, MetricsRegistry
+from app.models import Contact, NeedSpec, PipelineCard, RankingResponse
+from app.pipeline import ConnectorPipeline, need_from_payload
+from automation.card_store import CardStore, card_id
+from automation.result_sink import read_results
+
+
+DEFAULT_TOP_N = 3
+
+
+class NeedMatch(NamedTuple):
+    """A contact that newly qualifies for an open need."""
+    need_id: str
+    contact_id: str
+    contact_name: str
+    score: float
+    relevance: float
+    matching_tags: list[str]
+
+    def card(self) -> PipelineCard:
+        """A ``candidates`` card for this match."""
+        return PipelineCard(
+            id=card_id(self.need_id, self.contact_id),
+            need_spec_id=self.need_id,
+            contact_id=self.contact_id,
+            stage="candidates",
+            rank_score=self.score,
+            rank_justification=f"{self.contact_name} has expertise in {', '.join(list(dict.fromkeys(self.matching_tags))[:3])}",
+        )
+
+
+class StandingNeed:
+    """One open need and its current top matches."""
+
+    __slots__ = ("need", "keywords", "keyword_counts", "top_n", "top", "known")
+
+    def __init__(self, need: NeedSpec, top_n: int):
+        self.need = need
+        self.keywords = [keyword.lower() for keyword in need.keywords_must]
+        self.keyword_counts = Counter(self.keywords)
+        self.top_n = top_n
+        # Current top matches as (rounded score, contact id), best first
+        self.top: list[tuple[float, str]] = []
+        # Contacts already matched or carded for this need
+        self.known: set[str] = set()
+
+    def qualifies(self, rounded: float) -> bool:
+        return len(self.top) < self.top_n or rounded > self.top[-1][0]
+
+    def admit(self, rounded: float, contact_id: str) -> None:
+        self.top = [entry for entry in self.top if entry[1] != contact_id]
+        self.top.append((rounded, contact_id))
+        self.top.sort(key=lambda entry: -entry[0])  # stable: incumbents keep ties
+        del self.top[self.top_n:]
+        self.known.add(contact_id)
+
+
+def _substrings(text: str) -> set[str]:
+    return {text[i:j] for i in range(len(text)) for j in range(i + 1, len(text) + 1)}
+
+
+class NeedIndex:
+    """Percolates contacts through open needs."""
+
+    def __init__(self, top_n: int = DEFAULT_TOP_N, metrics: MetricsRegistry = METRICS):
+        self.top_n = top_n
+        self.metrics = metrics
+        self.needs: dict[str, StandingNeed] = {}
+        self.closed: set[str] = set()
+        # Needs whose top matches lost a member; re-rank them to restore the cutoff
+        self.stale: set[str] = set()
+        # keyword -> open needs using it
+        self._keyword_needs: dict[str, set[str]] = defaultdict(set)
+        # substring -> indexed keywords containing it
+        self._substring_keywords: dict[str, set[str]] = defaultdict(set)
+        # tag -> indexed keywords it matches (cleared when a new keyword is indexed)
+        self._tag_keywords: dict[str, list[str]] = {}
+        # contact id -> needs it is currently a top match of
+        self._contact_needs: dict[str, set[str]] = defaultdict(set)
+        # need id -> contacts with a card for it (kept for needs added later)
+        self._carded: dict[str, set[str]] = defaultdict(set)
+        self._card_version = 0
+
+    def __len__(self) -> int:
+        return len(self.needs)
+
+    def __contains__(self, need_id: str) -> bool:
+        return need_id in self.needs
+
+    # ------------------------------------------------------------------
+    # Needs
+    # ------------------------------------------------------------------
+
+    def add(self, need: NeedSpec, matches: Iterable[tuple[str, float]] = ()) -> bool:
+        """
+        Store an open need with its current matches.
+
+        Args:
+            need: The need (keywords and constraints)
+            matches: (contact id, match score) of its current top matches
+
+        Returns:
+            False if the need is closed or has no keywords
+        """
+        if need.id in self.closed or not need.keywords_must:
+            return False
+        self.remove(need.id)
+        standing = StandingNeed(need, self.top_n)
+        standing.known.update(self._carded.get(need.id, ()))
+        for contact_id, score in matches:
+            standing.admit(round(score, 2), contact_id)
+            self._contact_needs[contact_id].add(need.id)
+        self.needs[need.id] = standing
+
+        for keyword in standing.keyword_counts:
+            if keyword not in self._keyword_needs:
+                for substring in _substrings(keyword):
+                    self._substring_keywords[substring].add(keyword)
+                self._tag_keywords.clear()
+            self._keyword_needs[keyword].add(need.id)
+        return True
+
+    def add_ranking(self, need: NeedSpec, ranking: RankingResponse) -> bool:
+        """Store a need with the matches ``ConnectorPipeline.rank`` found for it."""
+        return self.add(need, [(ranked.contact.id, ranked.rank_score) for ranked in ranking.ranked_contacts])
+
+    def remove(self, need_id: str) -> Optional[StandingNeed]:
+        """Stop matching a need."""
+        standing = self.needs.pop(need_id, None)
+        if standing is None:
+            return None
+        for keyword in standing.keyword_counts:
+            need_ids = self._keyword_needs.get(keyword)
+            if need_ids is not None:
+                need_ids.discard(need_id)
+        for _, contact_id in standing.top:
+            self._contact_needs[contact_id].discard(need_id)
+        self.stale.discard(need_id)
+        return standing
+
+    def refresh(self, pipeline: ConnectorPipeline) -> int:
+        """
+        Re-rank the stale needs over the pipeline's network to restore their cutoffs.
+
+        Returns:
+            Number of needs re-ranked
+        """
+        stale = [need_id for need_id in self.stale if need_id in self.needs]
+        for need_id in stale:
+            standing = self.needs[need_id]
+            self.add_ranking(standing.need, pipeline.rank(standing.need, self.top_n))
+            self.needs[need_id].known.update(standing.known)
+        self.stale.clear()
+        return len(stale)
+
+    def close(self, need_id: str) -> None:
+        """Remove a need for good (e.g. the intro was made)."""
+        self.closed.add(need_id)
+        self.remove(need_id)
+
+    def sync_cards(self, store: CardStore) -> int:
+        """
+        Apply card changes since the last sync: carded contacts become known,
+        and needs with a ``closed_won`` card are closed.
+
+        Returns:
+            Number of changed cards read
+        """
+        cards = store.changes(self._card_version)
+        for card in cards:
+            if card.stage == "closed_won":
+                self.close(card.need_spec_id)
+            else:
+                self._carded[card.need_spec_id].add(card.contact_id)
+                if card.need_spec_id in self.needs:
+                    self.needs[card.need_spec_id].known.add(card.contact_id)
+        self._card_version = store.version
+        return len(cards)
+
+    def load_results(self, paths: Iterable[str | Path]) -> int:
+        """
+        Add the needs of linkedin monitor result files (later records win).
+
+        Returns:
+            Number of needs added
+        """
+        added = 0
+        for path in paths:
+            for result in read_results(path):
+                if not result.get("need_id") or not result.get("need"):
+                    continue
+                need = need_from_payload(result["need"]).model_copy(update={"id": result["need_id"]})
+                matches = [(match["contact"]["id"], match["match_score"]) for match in result.get("matches", [])]
+                added += self.add(need, matches)
+        return added
+
+    # ------------------------------------------------------------------
+    # Contacts
+    # ------------------------------------------------------------------
+
+    def _keywords_for_tag(self, tag: str) -> list[str]:
+        keywords = self._tag_keywords.get(tag)
+        if keywords is None:
+            # Keywords containing the tag, plus keywords the tag contains
+            found = set(self._substring_keywords.get(tag, ()))
+            found.update(substring for substring in _substrings(tag) if substring in self._keyword_needs)
+            keywords = self._tag_keywords[tag] = sorted(found)
+        return keywords
+
+    def match_contact(self, contact: Contact) -> list[NeedMatch]:
+        """
+        Percolate one new or updated contact through the open needs.
+
+        Args:
+            contact: The contact as it is now
+
+        Returns:
+            Every open need the contact newly makes the top matches of, best
+            score first. The needs' top matches are updated accordingly.
+        """
+        with self.metrics.stage("percolate"):
+            hits: dict[str, int] = defaultdict(int)
+            for tag in contact.tags:
+                for keyword in self._keywords_for_tag(tag.lower()):
+                    for need_id in self._keyword_needs.get(keyword, ()):
+                        hits[need_id] += self.needs[need_id].keyword_counts[keyword]
+
+            matches = []
+            for need_id in list(self._contact_needs.get(contact.id, ())):
+                if need_id not in hits:
+                    self._drop(need_id, contact.id)
+            for need_id, count in hits.items():
+                standing = self.needs[need_id]
+                relevance = min(RELEVANCE_PER_HIT * count, 1.0)
+                score = (RELEVANCE_WEIGHT * relevance) + (RELATIONSHIP_WEIGHT * contact.relationship_strength)
+                rounded = round(score, 2)
+                if contact.id in standing.known:
+                    # Already matched or carded: only keep its top entry current
+                    if need_id in self._contact_needs.get(contact.id, ()):
+                        if relevance > MIN_RELEVANCE and contact_allowed(standing.need, contact):
+                            standing.admit(rounded, contact.id)
+                        else:
+                            self._drop(need_id, contact.id)
+                    continue
+                # Cheapest test first: most hit needs already have better matches
+                if relevance <= MIN_RELEVANCE or not standing.qualifies(rounded):
+                    continue
+                if not contact_allowed(standing.need, contact):
+                    continue
+                for _, displaced in standing.top[standing.top_n - 1:]:
+                    self._contact_needs[displaced].discard(need_id)
+                standing.admit(rounded, contact.id)
+                self._contact_needs[contact.id].add(need_id)
+                matches.append(NeedMatch(need_id, contact.id, contact.name, score, relevance, [
+                    tag for keyword in standing.keywords for tag in contact.tags
+                    if keyword in tag.lower() or tag.lower() in keyword
+                ]))
+
+        self.metrics.incr("needs_percolated", len(hits))
+        self.metrics.incr("need_matches", len(matches))
+        matches.sort(key=lambda match: -match.score)
+        return matches
+
+    def match_contacts(self, contacts: Iterable[Contact]) -> list[NeedMatch]:
+        """Percolate a batch of contacts, in order."""
+        return [match for contact in contacts for match in self.match_contact(contact)]
+
+    def _drop(self, need_id: str, contact_id: str) -> None:
+        standing = self.needs[need_id]
+        standing.top = [entry for entry in standing.top if entry[1] != contact_id]
+        self._contact_needs[contact_id].discard(need_id)
+        self.stale.add(need_id)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Match new or updated contacts against open needs.")
+    parser.add_argument("contacts", help="New or updated contacts (JSON array, JSONL or snapshot)")
+    parser.add_argument("--results", nargs="+", default=["output/matches_*.jsonl*"],
+                        help="Monitor result files (globs) holding the open needs")
+    parser.add_argument("--cards", default="state/pipeline_cards.sqlite", help="Pipeline card store")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N, help="Matches kept per need")
+    parser.add_argument("--add-cards", action="store_true", help="Add a candidates card per new match")
+    args = parser.parse_args(argv)
+
+    paths = sorted(path for pattern in args.results for path in glob.glob(pattern))
+    index = NeedIndex(args.top_n)
+    index.load_results(paths)
+    with CardStore(args.cards) as cards:
+        index.sync_cards(cards)
+        print(f"🧭 {len(index):,} open needs from {len(paths)} result files")
+
+        contacts = ContactStore.open(args.contacts)
+        matches = index.match_contacts(contacts[pos] for pos in range(len(contacts)))
+        for match in matches:
+            print(f"   {match.contact_id} -> {match.need_id} ({match.score:.2f}): {', '.join(match.matching_tags)}")
+        if args.add_cards:
+            print(f"🗂️  Added {cards.add(match.card() for match in matches)} cards")
+    print(f"✅ {len(matches):,} new matches for {len(contacts):,} contacts")
+
+
+if __name__ == "__main__":
+    main()
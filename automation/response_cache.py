@@ -0,0 +1,142 @@
+"""
+Content-addressed on-disk cache for search API responses.
+
+Entries are keyed by the SHA-256 of the API URL plus the canonical JSON of
+the request payload (query, model, prompts, temperature), so identical
+searches hit the same file. Modes:
+
+- ``off``:    no caching
+- ``cache``:  read-through cache with a TTL and size-based LRU eviction
+- ``record``: always call the API and store every response (no expiry), so
+              the directory becomes a cassette of the run
+- ``replay``: serve responses only from the cassette and never touch the
+              network; a miss raises ``ReplayMiss``
+
+Record then replay re-executes a run deterministically and offline.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+
+CACHE_MODES = ("off", "cache", "record", "replay")
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ReplayMiss(LookupError):
+    """A replayed run requested a response that was never recorded."""
+
+
+class ResponseCache:
+    """Disk-backed response cache / record-replay store."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        mode: str = "cache",
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {CACHE_MODES}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (size, last access) for eviction; only the cache mode evicts
+        self._entries: dict[str, tuple[int, float]] = {}
+        self._total_bytes = 0
+        if mode != "off":
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for path in self.directory.glob("*/*.json"):
+                stat = path.stat()
+                self._entries[path.stem] = (stat.st_size, stat.st_mtime)
+                self._total_bytes += stat.st_size
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("cache", "replay")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("cache", "record")
+
+    @staticmethod
+    def key(api_url: str, payload: dict) -> str:
+        """Content address of a request."""
+        canonical = json.dumps({"url": api_url, "payload": payload}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Look up a stored response.
+
+        Returns:
+            The response body, or None on a miss / expired entry
+
+        Raises:
+            ReplayMiss: in replay mode, when the response was never recorded
+        """
+        if not self.reads:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            entry = None
+
+        if entry is not None and self.mode == "cache" and time.time() - entry["stored_at"] > self.ttl_seconds:
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise ReplayMiss(f"No recorded response for request {key}")
+            return None
+
+        self.hits += 1
+        if self.mode == "cache":
+            now = time.time()
+            os.utime(path, (now, now))
+            self._entries[key] = (self._entries.get(key, (path.stat().st_size, now))[0], now)
+        return entry["response"]
+
+    def put(self, key: str, response: dict) -> None:
+        """Store a response atomically, evicting least recently used entries if needed."""
+        if not self.writes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = json.dumps({"stored_at": time.time(), "response": response}, separators=(",", ":"))
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        size = len(data.encode("utf-8"))
+        previous = self._entries.get(key)
+        self._total_bytes += size - (previous[0] if previous else 0)
+        self._entries[key] = (size, time.time())
+        if self.mode == "cache" and self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under ``max_bytes``."""
+        for key, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._path(key).unlink(missing_ok=True)
+            del self._entries[key]
+            self._total_bytes -= size
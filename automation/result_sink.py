@@ -0,0 +1,194 @@
+"""
+Streaming results writer for the LinkedIn monitor.
+
+Each processed post is appended as one compact JSON line as soon as it
+finishes, and flushed so a crash loses at most the record being written and
+notifiers can tail the file while the run is still going. Memory stays flat
+no matter how many posts a run processes.
+
+Optional gzip or zstd framing is flushed per record (gzip sync flush, zstd
+block flush), so compressed files are readable up to the last record while
+still open. Files rotate by size and/or age. Files are always created new,
+never appended to: if a name is taken (two runs started in the same second),
+the next sequence number is used.
+"""
+
+import gzip
+import json
+import os
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+
+COMPRESSIONS = (None, "gzip", "zstd")
+SUFFIXES = {None: ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 3600.0
+
+
+class ResultSink:
+    """
+    Append-only, rotating JSONL sink.
+
+    Use as a context manager so the last file is always closed cleanly::
+
+        with ResultSink(Path("output"), compression="gzip") as sink:
+            sink.write(result)
+    """
+
+    def __init__(
+        self,
+        output_dir: Union[str, Path] = Path("output"),
+        prefix: str = "matches",
+        compression: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        fsync: bool = False,
+    ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}; expected one of {COMPRESSIONS}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError as e:
+                raise ImportError("zstd compression requires the 'zstandard' package") from e
+
+        self.output_dir = Path(output_dir)
+        self.prefix = prefix
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.fsync = fsync
+
+        self.files: list[Path] = []
+        self.records_written = 0
+        self._raw = None
+        self._stream = None
+        self._opened_at = 0.0
+        self._sequence = 0
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def current_file(self) -> Optional[Path]:
+        return self.files[-1] if self._stream is not None else None
+
+    def _open(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        while True:
+            self._sequence += 1
+            path = self.output_dir / f"{self.prefix}_{timestamp}_{self._sequence:03d}{SUFFIXES[self.compression]}"
+            try:
+                self._raw = open(path, "xb")
+                break
+            except FileExistsError:
+                continue
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        elif self.compression == "zstd":
+            import zstandard
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        self._opened_at = time.monotonic()
+        self.files.append(path)
+
+    def _should_rotate(self) -> bool:
+        if self._raw.tell() >= self.max_bytes:
+            return True
+        return time.monotonic() - self._opened_at >= self.max_age_seconds
+
+    def _flush(self) -> None:
+        if self.compression == "zstd":
+            import zstandard
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        elif self.compression == "gzip":
+            self._stream.flush()  # zlib sync flush: everything so far is decodable
+        self._raw.flush()
+        if self.fsync:
+            os.fsync(self._raw.fileno())
+
+    def write(self, record: dict) -> None:
+        """Append one record and flush it to disk."""
+        if self._stream is not None and self._should_rotate():
+            self._close_file()
+        if self._stream is None:
+            self._open()
+
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        self._stream.write(line.encode("utf-8"))
+        self._flush()
+        self.records_written += 1
+
+    def _close_file(self) -> None:
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        self._stream = self._raw = None
+
+    def close(self) -> None:
+        """Finish the current file (writes the compression trailer)."""
+        if self._stream is not None:
+            self._close_file()
+
+
+class _GzipMembers:
+    """
+    Decoder for concatenated gzip members.
+
+    Raw zlib streams (not GzipFile), so a missing trailer on the last member
+    is not an error.
+    """
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(wbits=31)
+
+    def decompress(self, data: bytes) -> bytes:
+        out = b""
+        while data:
+            if self._decompressor.eof:
+                self._decompressor = zlib.decompressobj(wbits=31)
+            out += self._decompressor.decompress(data)
+            data = self._decompressor.unused_data if self._decompressor.eof else b""
+        return out
+
+
+def read_results(path: Union[str, Path]) -> Iterator[dict]:
+    """
+    Stream the records of one results file (plain, gzip or zstd by suffix).
+
+    Files still being written (no compression trailer yet) are read up to
+    their last complete record. Gzip files may hold several members.
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        decode = _GzipMembers().decompress
+    elif path.suffix == ".zst":
+        import zstandard
+        decode = zstandard.ZstdDecompressor().decompressobj().decompress
+    else:
+        decode = bytes
+
+    pending = b""
+    with open(path, "rb") as raw:
+        while True:
+            chunk = raw.read(1 << 16)
+            if not chunk:
+                break
+            *lines, pending = (pending + decode(chunk)).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+    if pending.strip():
+        try:
+            yield json.loads(pending)
+        except json.JSONDecodeError:
+            return  # torn last record
@@ -0,0 +1,274 @@
+"""
+Async Perplexity search client for the LinkedIn monitor.
+
+One pooled aiohttp session is shared by every query. Concurrency is bounded
+by a semaphore, request rate by a token bucket, and 429 / 5xx responses are
+retried with full-jitter exponential backoff (honouring ``Retry-After``).
+Posts are yielded as each query completes, so downstream processing starts
+before the slowest query returns.
+
+The API URL is a constructor argument, so the client runs unchanged against
+a local stub server. An optional ``ResponseCache`` is consulted before the
+rate limiter and the network, and is also how runs are recorded and replayed.
+Network calls and response parsing are timed as the ``search`` and ``parse``
+stages of the run metrics.
+"""
+
+import asyncio
+import json
+import random
+import re
+from typing import AsyncIterator, Iterable, Optional
+
+import aiohttp
+
+from app.metrics import METRICS, MetricsRegistry
+from automation.response_cache import ReplayMiss, ResponseCache
+
+
+PERPLEXITY_MODEL = "llama-3.1-sonar-small-128k-online"
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_RATE_PER_SEC = 2.0
+DEFAULT_BURST = 4
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_TIMEOUT = 60.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def build_search_payload(search_query: str, model: str = PERPLEXITY_MODEL) -> dict:
+    """
+    Build the Perplexity chat-completions payload for a LinkedIn post search.
+
+    Args:
+        search_query: Search query for LinkedIn posts
+        model: Perplexity model name
+
+    Returns:
+        Request payload dictionary
+    """
+    return {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are a LinkedIn post search assistant. Extract recent LinkedIn posts that match the search criteria. Return results as JSON array with fields: author_name, author_profile_url, post_text, post_url, posted_date."
+            },
+            {
+                "role": "user",
+                "content": f"Search for recent LinkedIn posts containing: {search_query}. Find posts from the last 7 days. Return as JSON array."
+            }
+        ],
+        "temperature": 0.2,
+        "return_citations": True
+    }
+
+
+def parse_search_response(result: dict) -> Optional[list[dict]]:
+    """
+    Extract the list of posts from a Perplexity response body.
+
+    Args:
+        result: Decoded JSON response
+
+    Returns:
+        List of post dictionaries, or None if no JSON array could be parsed
+    """
+    content = result["choices"][0]["message"]["content"]
+
+    # Try to parse JSON from response
+    try:
+        posts = json.loads(content)
+        if isinstance(posts, list):
+            return posts
+    except json.JSONDecodeError:
+        # If not pure JSON, try to extract JSON from markdown code blocks
+        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)```', content)
+        if json_match:
+            posts = json.loads(json_match.group(1))
+            if isinstance(posts, list):
+                return posts
+
+    return None
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, at most ``capacity`` banked."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncSearchClient:
+    """
+    Pooled, rate-limited, retrying LinkedIn post search client.
+
+    Use as an async context manager so the HTTP session is opened once and
+    closed when the run finishes::
+
+        async with AsyncSearchClient(api_key, api_url) as client:
+            async for query, post in client.stream_posts(queries):
+                ...
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str,
+        model: str = PERPLEXITY_MODEL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        rate_per_sec: float = DEFAULT_RATE_PER_SEC,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: Optional[ResponseCache] = None,
+        metrics: MetricsRegistry = METRICS,
+    ):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = cache
+        self.metrics = metrics
+
+    async def __aenter__(self) -> "AsyncSearchClient":
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._session.close()
+        self._session = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After if given."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _post(self, payload: dict) -> dict:
+        """POST one payload (or serve it from the cache), retrying 429/5xx and transport errors."""
+        if self.cache is not None:
+            key = self.cache.key(self.api_url, payload)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.incr("search_cache_hits")
+                return cached
+            result = await self._post_network(payload)
+            self.cache.put(key, result)
+            return result
+        return await self._post_network(payload)
+
+    async def _post_network(self, payload: dict) -> dict:
+        with self.metrics.stage("search"):
+            return await self._post_with_retries(payload)
+
+    async def _post_with_retries(self, payload: dict) -> dict:
+        attempt = 0
+        while True:
+            self.metrics.incr("search_requests")
+            await self._bucket.acquire()
+            try:
+                async with self._semaphore:
+                    async with self._session.post(self.api_url, json=payload) as response:
+                        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                            delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                        else:
+                            response.raise_for_status()
+                            return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            attempt += 1
+            self.metrics.incr("search_retries")
+            await asyncio.sleep(delay)
+
+    async def search(self, search_query: str) -> list[dict]:
+        """
+        Search for recent LinkedIn posts matching one query.
+
+        Args:
+            search_query: Search query for LinkedIn posts
+
+        Returns:
+            List of post data dictionaries (empty on failure)
+        """
+        try:
+            result = await self._post(build_search_payload(search_query, self.model))
+            with self.metrics.stage("parse"):
+                posts = parse_search_response(result)
+            if posts is not None:
+                self.metrics.incr("posts_found", len(posts))
+                return posts
+            self.metrics.incr("parse_failures")
+            print(f"⚠️  Could not parse LinkedIn posts from response")
+            return []
+        except ReplayMiss:
+            raise
+        except Exception as e:
+            self.metrics.incr("search_errors")
+            print(f"❌ Error searching LinkedIn posts: {e}")
+            return []
+
+    async def stream_posts(self, queries: Iterable[str]) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Run every query concurrently and yield posts as each query finishes.
+
+        Args:
+            queries: Search queries (query packs) for this run
+
+        Returns:
+            Async iterator of (query, post_data) pairs in completion order
+        """
+        async def run(query: str) -> tuple[str, list[dict]]:
+            return query, await self.search(query)
+
+        tasks = [asyncio.ensure_future(run(query)) for query in queries]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                query, posts = await finished
+                for post in posts:
+                    yield query, post
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,228 @@
+"""
+Persistent cross-run index of already processed LinkedIn posts.
+
+Monitor runs use overlapping 7-day search windows, so most posts come back
+run after run. This index remembers every processed post in a local SQLite
+file, keyed by normalized ``post_url`` plus a MinHash fingerprint of the post
+text. Reposts and lightly edited copies under a new URL are caught as near
+duplicates with MinHash locality-sensitive hashing: each signature is split
+into bands and only posts sharing a band bucket are compared, so lookups hit
+an index rather than scanning every stored post.
+"""
+
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+NUM_PERM = 32
+LSH_BANDS = 8
+LSH_ROWS = NUM_PERM // LSH_BANDS
+DEFAULT_MIN_SIMILARITY = 0.7  # estimated Jaccard similarity of word shingles
+SHINGLE_SIZE = 2
+# Texts with fewer tokens than this are too short for a meaningful fingerprint
+MIN_FINGERPRINT_TOKENS = 8
+
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+
+TRACKING_PARAMS = ("utm_", "trk", "trackingid", "ref", "rcm")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_post_url(url: str) -> str:
+    """
+    Normalize a post URL so the same post always maps to one key.
+
+    Lowercases scheme and host, drops ``www.``, fragments, tracking query
+    parameters and trailing slashes.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit(((parts.scheme or "https").lower(), host, parts.path.rstrip("/"), query, ""))
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def minhash(text: str) -> Optional[tuple[int, ...]]:
+    """
+    MinHash signature over word shingles of the lowercased text.
+
+    Returns:
+        ``NUM_PERM`` minimum hash values, or None if the text is too short
+    """
+    tokens = TOKEN_RE.findall((text or "").lower())
+    if len(tokens) < MIN_FINGERPRINT_TOKENS:
+        return None
+
+    shingles = {
+        _hash64(" ".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+    return tuple(
+        min((a * shingle + b) % MERSENNE_PRIME for shingle in shingles)
+        for a, b in PERMUTATIONS
+    )
+
+
+def _signed(value: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class SeenPostIndex:
+    """
+    SQLite-backed seen-post index.
+
+    Writes are batched and committed every ``commit_every`` additions and on
+    ``close()``; use it as a context manager so a run always flushes.
+
+    Check posts with ``seen`` before processing them and ``add`` them only
+    once their result is saved, so a post that fails (or a run that crashes)
+    is retried by the next run. Safe to share between the search loop and a
+    result writer thread.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+        commit_every: int = 100,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.min_similarity = min_similarity
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS seen_posts (
+                url_key TEXT PRIMARY KEY,
+                signature BLOB,
+                first_seen TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS minhash_bands (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                url_key TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_minhash_bands ON minhash_bands (band, bucket);
+        """)
+
+    def __enter__(self) -> "SeenPostIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM seen_posts").fetchone()[0]
+
+    @staticmethod
+    def _buckets(signature: tuple[int, ...]) -> list[tuple[int, int]]:
+        return [
+            (band, _signed(_hash64(array("Q", signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]).tobytes())))
+            for band in range(LSH_BANDS)
+        ]
+
+    def _near_duplicate(self, signature: tuple[int, ...]) -> bool:
+        checked = set()
+        for band, bucket in self._buckets(signature):
+            rows = self._db.execute(
+                "SELECT p.url_key, p.signature FROM minhash_bands b "
+                "JOIN seen_posts p ON p.url_key = b.url_key "
+                "WHERE b.band = ? AND b.bucket = ?",
+                (band, bucket),
+            )
+            for url_key, blob in rows:
+                if url_key in checked:
+                    continue
+                checked.add(url_key)
+                other = array("Q", blob)
+                same = sum(1 for x, y in zip(signature, other) if x == y)
+                if same / NUM_PERM >= self.min_similarity:
+                    return True
+        return False
+
+    def _keys(self, post_data: dict) -> tuple[str, Optional[tuple[int, ...]]]:
+        url_key = normalize_post_url(post_data.get("post_url", ""))
+        return url_key, minhash(post_data.get("post_text", ""))
+
+    def _seen(self, url_key: str, signature: Optional[tuple[int, ...]]) -> bool:
+        if url_key and self._db.execute(
+            "SELECT 1 FROM seen_posts WHERE url_key = ?", (url_key,)
+        ).fetchone():
+            return True
+        return signature is not None and self._near_duplicate(signature)
+
+    def _add(self, url_key: str, signature: Optional[tuple[int, ...]]) -> None:
+        if not url_key and signature is None:
+            return
+        blob = None if signature is None else array("Q", signature).tobytes()
+        # Posts without a URL are keyed by their fingerprint alone
+        url_key = url_key or f"minhash:{hashlib.blake2b(blob, digest_size=8).hexdigest()}"
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO seen_posts (url_key, signature, first_seen) VALUES (?, ?, ?)",
+            (url_key, blob, datetime.now().isoformat()),
+        )
+        if cursor.rowcount and signature is not None:
+            self._db.executemany(
+                "INSERT INTO minhash_bands (band, bucket, url_key) VALUES (?, ?, ?)",
+                [(band, bucket, url_key) for band, bucket in self._buckets(signature)],
+            )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._commit()
+
+    def seen(self, post_data: dict) -> bool:
+        """Return True if the post (or a near-duplicate of its text) was already recorded."""
+        keys = self._keys(post_data)
+        with self._lock:
+            return self._seen(*keys)
+
+    def add(self, post_data: dict) -> None:
+        """Record a post as processed (once its result has been saved)."""
+        keys = self._keys(post_data)
+        with self._lock:
+            self._add(*keys)
+
+    def flush(self) -> None:
+        """Commit pending additions."""
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        """Commit and close the index file."""
+        with self._lock:
+            self._commit()
+            self._db.close()
@@ -0,0 +1,232 @@
+"""
+Process pool for the CPU-bound part of the LinkedIn monitor.
+
+    search producers -> [bounded input queue] -> N matcher processes
+                     -> [bounded output queue] -> one writer thread
+
+Posts travel in small batches to keep IPC overhead per post low. Both queues
+are bounded, so a slow writer backs up the matchers, and busy matchers back
+up the producers instead of piling posts up in memory.
+
+Each matcher loads the contact index once. With the ``fork`` start method the
+parent builds it before starting the workers and they share its pages
+copy-on-write (``gc.freeze`` keeps the collector from touching them). With
+``spawn`` every worker runs the initializer itself, and a ``CONTACTS_FILE``
+snapshot is memory-mapped, so its page cache is still shared.
+
+Worker metrics are sent back on shutdown and merged into ``METRICS``.
+
+Items of a batch that fails, or that a dying worker was holding, never reach
+``on_result``. If every worker has exited, ``submit`` and ``close`` raise
+``WorkerPoolError`` instead of waiting on a queue nobody reads.
+"""
+
+import asyncio
+import gc
+import multiprocessing
+import os
+import queue
+import threading
+import traceback
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.metrics import METRICS
+
+
+DEFAULT_QUEUE_SIZE = 256  # posts waiting per queue
+DEFAULT_BATCH_SIZE = 16
+DRAIN_POLL_SECONDS = 0.5
+
+_RESULTS = "results"
+_FAILED = "failed"
+_DONE = "done"
+
+
+class WorkerPoolError(RuntimeError):
+    """Every matcher worker has exited; queued items can no longer be processed."""
+
+
+def _worker(process: Callable, initializer: Optional[Callable], in_queue, out_queue) -> None:
+    """Matcher process: initialize once, then process batches until a None sentinel."""
+    METRICS.reset()  # a forked child starts with a copy of the parent's numbers
+    if initializer is not None:
+        initializer()
+    while True:
+        batch = in_queue.get()
+        if batch is None:
+            break
+        try:
+            out_queue.put((_RESULTS, [process(item) for item in batch]))
+        except Exception:
+            out_queue.put((_FAILED, (len(batch), traceback.format_exc())))
+    out_queue.put((_DONE, METRICS.export_state()))
+
+
+class ProcessingPool:
+    """
+    Matcher worker processes between two bounded queues, with a single writer.
+
+    ``process`` runs in the workers and must be a picklable top-level
+    function; ``on_result`` runs in the parent's writer thread, one result at
+    a time, so it can own a non thread-safe output such as a ``ResultSink``::
+
+        with ProcessingPool(process_post, sink.write, workers=8, initializer=get_pipeline) as pool:
+            for post in posts:
+                pool.submit(post)
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any], Any],
+        on_result: Callable[[Any], None],
+        workers: Optional[int] = None,
+        initializer: Optional[Callable[[], Any]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        start_method: Optional[str] = None,
+    ):
+        self.process = process
+        self.on_result = on_result
+        self.workers = workers or os.cpu_count() or 1
+        self.initializer = initializer
+        self.batch_size = max(1, batch_size)
+        self.queue_batches = max(1, queue_size // self.batch_size)
+        self._context = multiprocessing.get_context(start_method)
+
+        self.results_handled = 0
+        self.failed_items = 0
+        self.lost_workers = 0
+        self._pending: List[Any] = []
+        self._procs: List[multiprocessing.Process] = []
+        self._writer: Optional[threading.Thread] = None
+        self._writer_error: Optional[BaseException] = None
+        self._closed = False
+
+    def __enter__(self) -> "ProcessingPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start the matcher processes and the writer thread."""
+        initializer = self.initializer
+        if self._context.get_start_method() == "fork" and initializer is not None:
+            # Build the index once here; children inherit it copy-on-write
+            initializer()
+            initializer = None
+            gc.freeze()
+
+        self._in = self._context.Queue(self.queue_batches)
+        self._out = self._context.Queue(self.queue_batches)
+        for _ in range(self.workers):
+            proc = self._context.Process(
+                target=_worker, args=(self.process, initializer, self._in, self._out), daemon=True,
+            )
+            proc.start()
+            self._procs.append(proc)
+        gc.unfreeze()
+
+        self._writer = threading.Thread(target=self._drain, name="result-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def pids(self) -> List[int]:
+        """Process ids of the matcher workers."""
+        return [proc.pid for proc in self._procs]
+
+    def depths(self) -> Tuple[int, int]:
+        """Batches waiting in the input and output queues (0, 0 where the platform cannot tell)."""
+        try:
+            return self._in.qsize(), self._out.qsize()
+        except NotImplementedError:  # macOS
+            return 0, 0
+
+    # ------------------------------------------------------------------ input
+
+    def _workers_gone(self) -> bool:
+        return not any(proc.is_alive() for proc in self._procs)
+
+    def _put(self, batch: Optional[List[Any]]) -> None:
+        """Put a batch (or a stop sentinel) on the input queue, waiting while it is full."""
+        while True:
+            try:
+                self._in.put(batch, timeout=DRAIN_POLL_SECONDS)
+                return
+            except queue.Full:
+                if self._workers_gone():
+                    raise WorkerPoolError("All matcher workers have exited") from None
+
+    def submit(self, item: Any) -> None:
+        """Queue one item; blocks while the input queue is full (raises if the workers are gone)."""
+        self._pending.append(item)
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    async def submit_async(self, item: Any) -> None:
+        """Queue one item from a coroutine without blocking the event loop."""
+        self._pending.append(item)
+        if len(self._pending) >= self.batch_size:
+            batch, self._pending = self._pending, []
+            try:
+                self._in.put_nowait(batch)
+            except queue.Full:
+                await asyncio.get_running_loop().run_in_executor(None, self._put, batch)
+
+    def _flush(self) -> None:
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self._put(batch)
+
+    # ------------------------------------------------------------------ output
+
+    def _drain(self) -> None:
+        """Writer thread: hand every result to ``on_result`` until all workers are done."""
+        done = 0
+        while done < len(self._procs):
+            try:
+                kind, payload = self._out.get(timeout=DRAIN_POLL_SECONDS)
+            except queue.Empty:
+                if self._workers_gone():
+                    # Workers that never reported back died (killed, crashed)
+                    self.lost_workers = len(self._procs) - done
+                    break
+                continue
+
+            if kind == _RESULTS:
+                for result in payload:
+                    if self._writer_error is not None:
+                        break  # keep draining so workers never block on a full queue
+                    try:
+                        self.on_result(result)
+                        self.results_handled += 1
+                    except BaseException as e:
+                        self._writer_error = e
+            elif kind == _FAILED:
+                count, error = payload
+                self.failed_items += count
+                METRICS.incr("worker_batch_failures")
+                print(f"❌ Worker failed on a batch of {count} posts:\n{error}")
+            else:
+                METRICS.merge_state(payload)
+                done += 1
+
+    def close(self) -> None:
+        """Flush pending items, stop the workers and wait for every result to be written."""
+        if self._closed or self._writer is None:
+            return
+        self._closed = True
+        try:
+            self._flush()
+            for _ in self._procs:
+                self._put(None)
+        finally:
+            self._writer.join()
+            for proc in self._procs:
+                proc.join()
+        if self._writer_error is not None:
+            raise self._writer_error
+        if self.lost_workers:
+            METRICS.incr("worker_exits", self.lost_workers)
+            raise WorkerPoolError(f"{self.lost_workers} matcher workers exited before finishing their items")
@@ -0,0 +1 @@
+"""Benchmarks for the connector agent tools (see benchmarks/README.md)."""
@@ -0,0 +1,442 @@
+"""
+End-to-end load harness for the LinkedIn monitor.
+
+Starts a stand-in for ``PERPLEXITY_API_URL`` in its own process and pushes
+the monitor's real path through it: ``run_searches`` with the async search
+client, the seen-post index, ``process_post`` (inline or in the matcher
+``ProcessingPool``), the result sink and the card store. Each load level is
+a run with that many search queries; levels go up until throughput stops
+growing.
+
+The fake server answers chat-completions requests with fresh synthetic posts
+after a configurable latency, and can fail a share of requests with 500s or
+throttle them with 429 + ``Retry-After``, either at random or above a
+request rate. ``--post-chars`` pads posts to a given size. Every post is
+stamped with the time it was served (``posted_date``), so the time until its
+result is saved is measured per post.
+
+While a level runs, a sampler records the post backlog (accepted by the
+seen index but not yet saved), the worker pool's queue depths and the RSS
+of the monitor and its workers.
+
+Usage:
+    python -m benchmarks.load --levels 4,16,64 --workers 0,2
+    python -m benchmarks.load --latency-ms 800 --throttle-rate 0.1 --error-rate 0.02 --rate 20
+    python -m benchmarks.load --server-only --port 8765   # just the fake API
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.synthetic import FILLERS, LOCATIONS, generate_posts, generate_store
+
+
+DEFAULT_LEVELS = "4,16,64"
+SAMPLE_SECONDS = 0.25
+# A level scales if its throughput beats the previous level's by this factor
+SCALING_GAIN = 1.1
+
+
+# ============================================================================
+# FAKE PERPLEXITY SERVER
+# ============================================================================
+
+def served_posts(rng: random.Random, request_no: int, count: int, post_chars: int) -> List[dict]:
+    """
+    Posts for one response: synthetic posts made unique (so the seen index
+    does not drop them as near-duplicates) and padded to ``post_chars``.
+    """
+    posts = []
+    stamp = datetime.now().isoformat(timespec="microseconds")
+    for i, post in enumerate(generate_posts(count, seed=rng.getrandbits(32))):
+        words = [post["post_text"]] + [f"ref{rng.getrandbits(32):08x}" for _ in range(12)]
+        text = " ".join(words)
+        while len(text) < post_chars:
+            text += " " + rng.choice(FILLERS).format(location=rng.choice(LOCATIONS)) + f" ref{rng.getrandbits(32):08x}"
+        posts.append({
+            "author_name": post["author_name"],
+            "author_profile_url": f"https://linkedin.com/in/load-{request_no}-{i}",
+            "post_text": text,
+            "post_url": f"https://linkedin.com/posts/load-{request_no}-{i}",
+            "posted_date": stamp,
+        })
+    return posts
+
+
+def _serve(config: dict, conn) -> None:
+    """Server process: run the fake API until terminated, reporting the bound port first."""
+    from aiohttp import web
+
+    rng = random.Random(config["seed"])
+    stats = {"requests": 0, "ok": 0, "throttled": 0, "errors": 0, "posts": 0, "bytes": 0}
+    recent = deque()
+
+    async def chat(request: "web.Request") -> "web.Response":
+        await request.read()
+        stats["requests"] += 1
+        request_no = stats["requests"]
+        now = time.monotonic()
+        while recent and now - recent[0] > 1.0:
+            recent.popleft()
+        over_rate = config["server_rps"] and len(recent) >= config["server_rps"]
+        if over_rate or rng.random() < config["throttle_rate"]:
+            stats["throttled"] += 1
+            return web.json_response(
+                {"error": "rate limited"}, status=429, headers={"Retry-After": str(config["retry_after"])}
+            )
+        recent.append(now)
+
+        latency = config["latency_ms"] + rng.uniform(-config["jitter_ms"], config["jitter_ms"])
+        await asyncio.sleep(max(0.0, latency) / 1000)
+        if rng.random() < config["error_rate"]:
+            stats["errors"] += 1
+            return web.json_response({"error": "upstream failure"}, status=500)
+
+        posts = served_posts(rng, request_no, config["posts_per_response"], config["post_chars"])
+        body = json.dumps({"choices": [{"message": {"role": "assistant", "content": json.dumps(posts)}}]})
+        stats["ok"] += 1
+        stats["posts"] += len(posts)
+        stats["bytes"] += len(body)
+        return web.Response(text=body, content_type="application/json")
+
+    async def get_stats(request: "web.Request") -> "web.Response":
+        return web.json_response(stats)
+
+    async def main() -> None:
+        app = web.Application()
+        app.router.add_post("/chat/completions", chat)
+        app.router.add_get("/stats", get_stats)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, config["host"], config["port"])
+        await site.start()
+        conn.send(runner.addresses[0][1])
+        conn.close()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+class FakePerplexityServer:
+    """The fake API in a child process, so its event loop never competes with the monitor's."""
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        jitter_ms: float = 100.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        server_rps: int = 0,
+        retry_after: float = 0.5,
+        posts_per_response: int = 20,
+        post_chars: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+    ):
+        self.config = {
+            "latency_ms": latency_ms, "jitter_ms": jitter_ms, "error_rate": error_rate,
+            "throttle_rate": throttle_rate, "server_rps": server_rps, "retry_after": retry_after,
+            "posts_per_response": posts_per_response, "post_chars": post_chars,
+            "host": host, "port": port, "seed": seed,
+        }
+        self.port: Optional[int] = None
+        self._process = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.config['host']}:{self.port}/chat/completions"
+
+    def start(self) -> "FakePerplexityServer":
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self._process = context.Process(target=_serve, args=(self.config, sender), daemon=True)
+        self._process.start()
+        sender.close()
+        self.port = receiver.recv()
+        return self
+
+    def stats(self) -> dict:
+        with urllib.request.urlopen(f"http://{self.config['host']}:{self.port}/stats") as response:
+            return json.loads(response.read())
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self) -> "FakePerplexityServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+# ============================================================================
+# SAMPLING
+# ============================================================================
+
+def _rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Resident memory of a process in MB (from /proc; None where unavailable)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _TimedSink:
+    """Result sink wrapper recording each post's time from being served to being saved."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.latencies_ms: List[float] = []
+
+    def write(self, result: dict) -> None:
+        self.sink.write(result)
+        served = result.get("post", {}).get("posted_date")
+        if served:
+            self.latencies_ms.append((time.time() - datetime.fromisoformat(served).timestamp()) * 1000)
+
+    @property
+    def files(self):
+        return self.sink.files
+
+
+class Sampler:
+    """Background thread sampling backlog, pool queue depths and memory every ``interval`` seconds."""
+
+    def __init__(self, level: int, workers: int, interval: float = SAMPLE_SECONDS):
+        self.level = level
+        self.workers = workers
+        self.interval = interval
+        self.pool = None
+        self.samples: List[dict] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-sampler", daemon=True)
+        self._started = time.perf_counter()
+
+    def sample(self) -> dict:
+        from app.metrics import METRICS
+
+        counters = METRICS.snapshot()["counters"]
+        accepted = counters.get("posts_seen", 0) - counters.get("posts_skipped", 0)
+        pids = [None] + (self.pool.pids if self.pool is not None else [])
+        rss = [_rss_mb(pid) for pid in pids]
+        input_depth, output_depth = self.pool.depths() if self.pool is not None else (0, 0)
+        return {
+            "t": round(time.perf_counter() - self._started, 3),
+            "level": self.level,
+            "workers": self.workers,
+            "search_requests": counters.get("search_requests", 0),
+            "posts_found": counters.get("posts_found", 0),
+            "posts_processed": counters.get("posts_processed", 0),
+            "backlog": accepted - counters.get("posts_processed", 0),
+            "input_batches": input_depth,
+            "output_batches": output_depth,
+            "rss_mb": round(sum(value for value in rss if value is not None), 1) if any(rss) else None,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.samples.append(self.sample())
+
+    def __enter__(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.samples.append(self.sample())
+
+
+# ============================================================================
+# LOAD LEVELS
+# ============================================================================
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_level(server: FakePerplexityServer, queries: int, workers: int, batch_size: int, state_dir: Path, verbose: bool = False) -> dict:
+    """
+    One monitor run with ``queries`` search queries against the fake server.
+
+    Returns:
+        Level report: throughput, latency percentiles, server outcomes, peak
+        backlog / queue depths / memory and the timeline samples
+    """
+    import automation.linkedin_monitor as monitor
+    from app.agent import get_pipeline
+    from app.metrics import METRICS
+    from automation.card_store import CardStore
+    from automation.result_sink import ResultSink
+    from automation.seen_index import SeenPostIndex
+    from automation.worker_pool import ProcessingPool
+
+    run_dir = state_dir / f"level_{queries}_workers_{workers}"
+    search_queries = [f"load test level {queries} query {i}" for i in range(queries)]
+
+    METRICS.reset()
+    server_before = server.stats()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output, CardStore(run_dir / "pipeline_cards.sqlite") as cards, SeenPostIndex(run_dir / "seen_posts.sqlite") as seen, \
+            ResultSink(run_dir / "output") as results, Sampler(queries, workers) as sampler:
+        sink = _TimedSink(results)
+        started = time.perf_counter()
+        if workers > 0:
+            with ProcessingPool(
+                monitor.process_post,
+                lambda result: monitor.write_result(sink, result, cards, seen),
+                workers=workers,
+                initializer=get_pipeline,
+                batch_size=batch_size,
+            ) as pool:
+                sampler.pool = pool
+                asyncio.run(monitor.run_searches(search_queries, sink, seen, pool, cards))
+            sampler.pool = None
+        else:
+            asyncio.run(monitor.run_searches(search_queries, sink, seen, cards=cards))
+        elapsed = time.perf_counter() - started
+    server_after = server.stats()
+
+    snapshot = METRICS.snapshot()
+    counters = snapshot["counters"]
+    search = snapshot["stages"].get("search", {})
+    processed = int(counters.get("posts_processed", 0))
+    rss = [sample["rss_mb"] for sample in sampler.samples if sample["rss_mb"] is not None]
+    return {
+        "queries": queries,
+        "workers": workers,
+        "posts": processed,
+        "skipped": int(counters.get("posts_skipped", 0)),
+        "failed": int(counters.get("posts_failed", 0)),
+        "elapsed_s": round(elapsed, 3),
+        "posts_per_s": round(processed / elapsed, 1) if elapsed else 0.0,
+        "latency_p50_ms": round(_percentile(sink.latencies_ms, 0.50), 1),
+        "latency_p95_ms": round(_percentile(sink.latencies_ms, 0.95), 1),
+        "latency_p99_ms": round(_percentile(sink.latencies_ms, 0.99), 1),
+        "search_p99_ms": search.get("p99_ms", 0.0),
+        "requests": server_after["requests"] - server_before["requests"],
+        "throttled": server_after["throttled"] - server_before["throttled"],
+        "server_errors": server_after["errors"] - server_before["errors"],
+        "search_errors": int(counters.get("search_errors", 0)),
+        "max_backlog": max((sample["backlog"] for sample in sampler.samples), default=0),
+        "max_input_batches": max((sample["input_batches"] for sample in sampler.samples), default=0),
+        "peak_rss_mb": max(rss) if rss else None,
+        "timeline": sampler.samples,
+    }
+
+
+def saturation(levels: List[dict]) -> Optional[dict]:
+    """The first level whose throughput did not grow by ``SCALING_GAIN`` over the previous one."""
+    for previous, level in zip(levels, levels[1:]):
+        if level["posts_per_s"] < previous["posts_per_s"] * SCALING_GAIN:
+            return previous
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the monitor end to end against a fake Perplexity API.")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="Search queries per run, one run per level")
+    parser.add_argument("--workers", default="0", help="Matcher worker counts to try (0 = inline)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Posts per worker batch")
+    parser.add_argument("--contacts", type=int, default=10_000, help="Synthetic network size")
+    parser.add_argument("--rate", type=float, help="Search requests per second (default SEARCH_RATE_PER_SEC)")
+    parser.add_argument("--concurrency", type=int, help="Searches in flight (default SEARCH_MAX_CONCURRENCY)")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake API response time")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Uniform +/- jitter on the response time")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--server-rps", type=int, default=0, help="Answer 429 above this many requests per second (0 = no limit)")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--posts-per-response", type=int, default=20)
+    parser.add_argument("--post-chars", type=int, default=0, help="Pad every post to at least this many characters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report (levels with their timelines) as JSON here")
+    parser.add_argument("--server-only", action="store_true", help="Only run the fake API until interrupted")
+    parser.add_argument("--port", type=int, default=0, help="Fake API port (default: any free port)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the monitor's own output")
+    args = parser.parse_args(argv)
+
+    server = FakePerplexityServer(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, server_rps=args.server_rps, retry_after=args.retry_after,
+        posts_per_response=args.posts_per_response, post_chars=args.post_chars, port=args.port, seed=args.seed,
+    )
+    if args.server_only:
+        with server:
+            print(f"✅ Fake Perplexity API on {server.url} (Ctrl-C to stop)")
+            with contextlib.suppress(KeyboardInterrupt):
+                while True:
+                    time.sleep(3600)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp, server:
+        snapshot = Path(tmp) / "contacts.snapshot"
+        generate_store(args.contacts, args.seed).save_snapshot(snapshot)
+        # Set before the monitor (and app.agent) are imported
+        os.environ.update({
+            "CONTACTS_FILE": str(snapshot),
+            "PERPLEXITY_API_KEY": os.getenv("PERPLEXITY_API_KEY", "load-test"),
+            "PERPLEXITY_API_URL": server.url,
+            "SEARCH_CACHE_MODE": "off",
+        })
+        if args.rate is not None:
+            os.environ["SEARCH_RATE_PER_SEC"] = str(args.rate)
+        if args.concurrency is not None:
+            os.environ["SEARCH_MAX_CONCURRENCY"] = str(args.concurrency)
+        import automation.linkedin_monitor as monitor
+        from app.agent import get_pipeline
+        get_pipeline()
+
+        print(f"📏 {args.contacts:,} contacts, {args.posts_per_response} posts per response, "
+              f"API {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms, {monitor.SEARCH_RATE_PER_SEC:g} req/s, "
+              f"{monitor.SEARCH_MAX_CONCURRENCY} in flight, {os.cpu_count()} CPUs")
+        print(f"   {'queries':>7} {'workers':>7} {'posts':>7} {'posts/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'429':>5} {'5xx':>5} {'backlog':>8} {'queue':>6} {'rss MB':>7}")
+        report = []
+        for workers in (int(count) for count in args.workers.split(",")):
+            levels = []
+            for queries in (int(count) for count in args.levels.split(",")):
+                level = run_level(server, queries, workers, args.batch_size, Path(tmp), args.verbose)
+                levels.append(level)
+                rss = f"{level['peak_rss_mb']:>7.0f}" if level["peak_rss_mb"] is not None else f"{'-':>7}"
+                print(f"   {queries:>7} {workers:>7} {level['posts']:>7,} {level['posts_per_s']:>9,.1f} "
+                      f"{level['latency_p50_ms']:>8.0f} {level['latency_p95_ms']:>8.0f} {level['latency_p99_ms']:>8.0f} "
+                      f"{level['throttled']:>5} {level['server_errors']:>5} {level['max_backlog']:>8.0f} "
+                      f"{level['max_input_batches']:>6} {rss}")
+            saturated = saturation(levels)
+            if saturated is not None:
+                print(f"📈 {workers} workers: throughput stops scaling after {saturated['queries']} queries/run "
+                      f"({saturated['posts_per_s']:,.1f} posts/s)")
+            report.extend(levels)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps({"args": vars(args), "levels": report}, indent=2))
+        print(f"📁 Report: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
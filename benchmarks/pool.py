@@ -0,0 +1,76 @@
+"""
+Scaling benchmark for the monitor's matcher worker pool.
+
+Saves a synthetic network as a snapshot, then pushes the same posts through
+``ProcessingPool`` with each worker count and reports posts per second and
+speedup over one worker. With ``fork`` the index is built before timing
+starts; ``spawn`` workers build theirs inside the timed window.
+
+Usage:
+    python -m benchmarks.pool --contacts 100000 --posts 5000 --workers 1,2,4,8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.synthetic import generate_posts, generate_store
+
+
+def run_pool(posts: List[dict], workers: int, batch_size: int, start_method: Optional[str]) -> float:
+    """Process ``posts`` with ``workers`` matcher processes; returns seconds spent."""
+    from app.agent import get_pipeline
+    from automation.linkedin_monitor import process_post
+    from automation.worker_pool import ProcessingPool
+
+    results = []
+    pool = ProcessingPool(
+        process_post, results.append, workers=workers, initializer=get_pipeline,
+        batch_size=batch_size, start_method=start_method,
+    )
+    pool.start()  # the index is built before the clock starts (fork) or in the workers (spawn)
+    started = time.perf_counter()
+    for post in posts:
+        pool.submit(post)
+    pool.close()
+    elapsed = time.perf_counter() - started
+    assert len(results) == len(posts)
+    return elapsed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure matcher pool scaling.")
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--start-method", choices=("fork", "spawn", "forkserver"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = Path(tmp) / "contacts.snapshot"
+        generate_store(args.contacts, args.seed).save_snapshot(snapshot)
+        # Workers (and the parent, for fork) load the network from the snapshot
+        os.environ["CONTACTS_FILE"] = str(snapshot)
+        posts = [
+            dict(post, post_url=f"https://linkedin.com/posts/bench-{i}")
+            for i, post in enumerate(generate_posts(args.posts, args.seed))
+        ]
+
+        print(f"📏 {args.contacts:,} contacts, {args.posts:,} posts, {os.cpu_count()} CPUs")
+        baseline = None
+        for workers in (int(count) for count in args.workers.split(",")):
+            elapsed = run_pool(posts, workers, args.batch_size, args.start_method)
+            if workers == 1:
+                baseline = elapsed
+            speedup = f"  {baseline / elapsed:.2f}x" if baseline else ""
+            print(f"   {workers:>3} workers  {len(posts) / elapsed:>9,.0f} posts/s{speedup}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
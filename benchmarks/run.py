@@ -0,0 +1,274 @@
+"""
+Micro-benchmarks for the four connector agent tools.
+
+For each network size a seeded synthetic network and post set are generated,
+the contact index is built, and every tool is timed call by call:
+
+- ``throughput_per_s``: calls per second of tool time
+- ``p50_us`` / ``p99_us``: per-call latency percentiles in microseconds
+  (best of ``--repeat`` timing passes, to damp scheduler noise)
+- ``peak_kib``: tracemalloc peak over a separate (slower) sample of calls
+
+Results are written as JSON. Passing ``--baseline`` compares against an
+earlier result file and exits non-zero when any metric regressed by more
+than ``--threshold``.
+
+Usage:
+    python -m benchmarks.run --sizes 100,10000,100000 --output benchmarks/baselines/main.json
+    python -m benchmarks.run --sizes 100,10000,100000 --baseline benchmarks/baselines/main.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app import agent
+from app.contact_index import ContactIndex
+from app.need_extractor import NEED_EXTRACTOR
+from app.pipeline import ConnectorPipeline
+from benchmarks.synthetic import generate_posts, generate_store
+
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+DEFAULT_POSTS = 1000
+DEFAULT_MEMORY_SAMPLE = 100
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 3
+WARMUP_CALLS = 20
+TOOL_NAMES = (
+    "extract_need_from_post",
+    "find_matching_contacts",
+    "generate_intro_message",
+    "create_opportunity_summary",
+)
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# metric -> +1 if larger is worse, -1 if smaller is worse
+REGRESSION_METRICS = {"p50_us": 1, "p99_us": 1, "throughput_per_s": -1, "peak_kib": 1}
+
+
+# ============================================================================
+# TOOLS UNDER TEST
+# ============================================================================
+
+def make_tools(pipeline: ConnectorPipeline) -> Dict[str, Callable]:
+    """The agent tools from app/agent.py, served from ``pipeline``."""
+    agent.set_pipeline(pipeline)
+    return {name: getattr(agent, name) for name in TOOL_NAMES}
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _timing_pass(fn: Callable, calls: List[tuple]) -> List[float]:
+    latencies = []
+    for args in calls:
+        started = time.perf_counter_ns()
+        fn(*args)
+        latencies.append((time.perf_counter_ns() - started) / 1000)
+    latencies.sort()
+    return latencies
+
+
+def measure(fn: Callable, calls: List[tuple], memory_sample: int, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Time ``fn`` over every argument tuple, then trace memory over a sample.
+
+    The timing pass runs ``repeat`` times and the pass with the lowest median
+    is kept.
+
+    Returns:
+        Metrics dictionary for one tool
+    """
+    if not calls:
+        return {"calls": 0}
+
+    for args in calls[:WARMUP_CALLS]:
+        fn(*args)
+
+    latencies = min(
+        (_timing_pass(fn, calls) for _ in range(max(repeat, 1))),
+        key=lambda run: percentile(run, 0.50),
+    )
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    floor = tracemalloc.get_traced_memory()[0]
+    for args in calls[:memory_sample]:
+        fn(*args)
+    peak = tracemalloc.get_traced_memory()[1] - floor
+    tracemalloc.stop()
+
+    total_s = sum(latencies) / 1e6
+    return {
+        "calls": len(latencies),
+        "throughput_per_s": round(len(latencies) / total_s, 1) if total_s else 0.0,
+        "p50_us": round(percentile(latencies, 0.50), 1),
+        "p99_us": round(percentile(latencies, 0.99), 1),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def bench_size(size: int, seed: int, posts: List[dict], memory_sample: int, repeat: int = DEFAULT_REPEAT) -> dict:
+    """Build a network of ``size`` contacts and benchmark every tool against it."""
+    started = time.perf_counter()
+    store = generate_store(size, seed)
+    generate_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = ContactIndex(store)
+    index.precompute(NEED_EXTRACTOR.keywords)
+    index_build_s = time.perf_counter() - started
+
+    tools = make_tools(ConnectorPipeline(index))
+
+    # Each tool is fed the outputs of the previous one, like an agent run
+    extract_calls = [(post["post_text"], post["author_name"]) for post in posts]
+    need_jsons = [tools["extract_need_from_post"](*args) for args in extract_calls]
+    find_calls = [(need_json,) for need_json in need_jsons]
+    match_jsons = [tools["find_matching_contacts"](need_json) for need_json in need_jsons]
+    with_matches = [(match_json,) for match_json in match_jsons if json.loads(match_json)["matches"]]
+
+    calls = {
+        "extract_need_from_post": extract_calls,
+        "find_matching_contacts": find_calls,
+        "generate_intro_message": with_matches,
+        "create_opportunity_summary": with_matches,
+    }
+    results = {
+        "setup": {
+            "contacts": len(store),
+            "tags": len(store.tag_vocab),
+            "generate_s": round(generate_s, 3),
+            "index_build_s": round(index_build_s, 3),
+        },
+        "tools": {},
+    }
+    for name in TOOL_NAMES:
+        results["tools"][name] = measure(tools[name], calls[name], memory_sample, repeat)
+    agent.set_pipeline(None)
+    store.close()
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], seed: int, n_posts: int, memory_sample: int, repeat: int = DEFAULT_REPEAT) -> dict:
+    """Run the whole suite and return the result document."""
+    posts = generate_posts(n_posts, seed)
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "posts": n_posts,
+            "memory_sample": memory_sample,
+            "repeat": repeat,
+        },
+        "sizes": {},
+    }
+    for size in sizes:
+        print(f"📏 {size:,} contacts...")
+        result = bench_size(size, seed, posts, memory_sample, repeat)
+        report["sizes"][str(size)] = result
+        for name, metrics in result["tools"].items():
+            if metrics["calls"]:
+                print(f"   {name:<28} {metrics['throughput_per_s']:>10,.0f}/s  "
+                      f"p50 {metrics['p50_us']:>9,.1f}µs  p99 {metrics['p99_us']:>9,.1f}µs  "
+                      f"peak {metrics['peak_kib']:>8,.1f}KiB")
+    return report
+
+
+# ============================================================================
+# BASELINE COMPARISON
+# ============================================================================
+
+def compare(report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compare a result document against a baseline.
+
+    Only sizes and tools present in both are compared.
+
+    Returns:
+        One description per regressed metric (empty if none regressed)
+    """
+    regressions = []
+    for size, result in report["sizes"].items():
+        base_result = baseline.get("sizes", {}).get(size)
+        if base_result is None:
+            continue
+        for name, metrics in result["tools"].items():
+            base_metrics = base_result["tools"].get(name, {})
+            for metric, direction in REGRESSION_METRICS.items():
+                current, base = metrics.get(metric), base_metrics.get(metric)
+                if not current or not base:
+                    continue
+                change = (current - base) / base * direction
+                if change > threshold:
+                    regressions.append(
+                        f"{name} @ {int(size):,} contacts: {metric} {base:,} -> {current:,} ({change:+.0%} worse)"
+                    )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the connector agent tools.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated network sizes (up to 1000000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--posts", type=int, default=DEFAULT_POSTS, help="Posts per size")
+    parser.add_argument("--memory-sample", type=int, default=DEFAULT_MEMORY_SAMPLE,
+                        help="Calls per tool traced for peak memory")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing passes per tool (best kept)")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/bench_<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change counted as a regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run(sizes, args.seed, args.posts, args.memory_sample, args.repeat)
+
+    output = args.output or RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"💾 Results saved to {output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
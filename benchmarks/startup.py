@@ -0,0 +1,101 @@
+"""
+Startup budget check.
+
+Imports each entry module in a fresh interpreter, several times, and checks
+the median import time against its budget. It also fails if heavy or cloud
+modules (ADK, Google auth, numpy/scipy, HTTP clients) are loaded where they
+should not be: cron jobs and worker processes import these modules before
+doing any work, so every millisecond here is paid per process.
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 9 --scale 1.5   # slower machine
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_RUNS = 5
+
+# module -> (import budget in ms, modules that must not be imported)
+STARTUP_BUDGETS = {
+    "app": (20, ("pydantic", "google", "numpy", "scipy")),
+    "app.pipeline": (300, ("google", "numpy", "scipy", "aiohttp", "requests")),
+    "app.agent": (300, ("google", "numpy", "scipy", "aiohttp", "requests")),
+    "automation.linkedin_monitor": (350, ("google", "numpy", "scipy", "aiohttp", "requests")),
+}
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed, "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def measure_import(module: str, runs: int = DEFAULT_RUNS) -> dict:
+    """
+    Import ``module`` in ``runs`` fresh interpreters.
+
+    Returns:
+        {"median_ms", "min_ms", "modules"} where modules are the top-level
+        packages loaded by the import
+    """
+    timings, modules = [], set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            capture_output=True, text=True, check=True, cwd=REPO_ROOT,
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        timings.append(probe["ms"])
+        modules.update(probe["modules"])
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "modules": modules}
+
+
+def check(runs: int = DEFAULT_RUNS, scale: float = 1.0) -> List[str]:
+    """
+    Measure every entry module against its budget.
+
+    Returns:
+        One description per violated budget (empty if all pass)
+    """
+    failures = []
+    for module, (budget_ms, forbidden) in STARTUP_BUDGETS.items():
+        result = measure_import(module, runs)
+        budget_ms *= scale
+        loaded = sorted(set(forbidden) & result["modules"])
+        status = "✅" if result["median_ms"] <= budget_ms and not loaded else "❌"
+        print(f"{status} {module:<30} {result['median_ms']:>7.1f}ms (budget {budget_ms:.0f}ms)"
+              + (f"  loads {', '.join(loaded)}" if loaded else ""))
+        if result["median_ms"] > budget_ms:
+            failures.append(f"{module}: {result['median_ms']:.1f}ms > {budget_ms:.0f}ms budget")
+        if loaded:
+            failures.append(f"{module}: imports {', '.join(loaded)} at startup")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check import-time budgets of the entry modules.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Fresh interpreters per module")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow machines)")
+    args = parser.parse_args(argv)
+
+    failures = check(args.runs, args.scale)
+    if failures:
+        print(f"❌ {len(failures)} startup budget violation(s):")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+    print("✅ All startup budgets met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
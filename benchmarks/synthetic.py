@@ -0,0 +1,197 @@
+"""
+Seeded synthetic contact networks and LinkedIn posts.
+
+Contacts use the ``data/contacts.example.json`` schema (skills, industry,
+interests, relationship, ...) and go through ``contact_from_record`` like a
+real import. Tags follow a skewed distribution: a few industries and skills
+are very common, and a long tail of niche tags grows with the network size.
+Posts mix need triggers, need types and lexicon keywords with filler text,
+and some express no need at all.
+
+The same ``seed`` and size always produce the same data.
+"""
+import random
+from typing import Iterator, List
+
+from app.contact_store import ContactStore, contact_from_record
+from app.models import Contact
+
+
+# industry -> (weight, skills, interests); skills are listed most common first
+INDUSTRIES = {
+    "Technology": (8, [
+        "React", "TypeScript", "Python", "Node.js", "Product Design", "UX/UI",
+        "GraphQL", "Rust", "Web Performance", "Frontend Architecture",
+    ], ["startup mentorship", "open source", "web performance", "developer tools"]),
+    "Artificial Intelligence": (5, [
+        "Python", "Machine Learning", "Data Science", "TensorFlow", "MLOps",
+        "PyTorch", "NLP", "Computer Vision",
+    ], ["AI ethics", "research collaboration", "teaching"]),
+    "Packaging": (4, [
+        "Packaging", "Sustainable Packaging", "Bioplastics", "Materials Science",
+        "Compostable Materials", "Food Packaging", "Polymer Engineering", "Certification",
+    ], ["sustainability", "circular economy", "supply chain"]),
+    "Manufacturing": (3, [
+        "Supply Chain", "Materials", "Process Engineering", "Sourcing", "Quality Assurance",
+        "Lean Manufacturing", "Supplier Management",
+    ], ["sustainability", "automation", "partnerships"]),
+    "Marketing & Advertising": (3, [
+        "Marketing Strategy", "Content Marketing", "SEO", "Growth Hacking", "Brand Development",
+    ], ["startup marketing", "content strategy", "community building"]),
+    "Venture Capital": (2, [
+        "Investment", "Due Diligence", "Fundraising", "Startups", "Board Advisory",
+    ], ["climate tech", "founder coaching", "partnerships"]),
+    "Cloud Infrastructure": (2, [
+        "DevOps", "Kubernetes", "AWS", "CI/CD", "Infrastructure as Code",
+    ], ["cloud native", "open source tools", "platform engineering"]),
+    "Design & Creative": (1, [
+        "Graphic Design", "Illustration", "Branding", "Figma", "Adobe Creative Suite",
+    ], ["podcast branding", "illustration", "creator economy"]),
+}
+
+ROLES = ["Engineer", "Senior Engineer", "Director", "VP", "Founder & CEO", "Consultant", "Head of Product", "Partner"]
+FIRST_NAMES = ["Jane", "Michael", "Sarah", "David", "Emily", "Carlos", "Priya", "Wei", "Fatima", "Liam", "Aisha", "Noah"]
+LAST_NAMES = ["Smith", "Chen", "Johnson", "Kim", "Martinez", "Patel", "Nguyen", "Okafor", "Rossi", "Müller", "Garcia", "Wong"]
+LOCATIONS = ["San Francisco, CA", "New York, NY", "Austin, TX", "Seattle, WA", "Portland, OR", "Denver, CO", "Boston, MA", "London, UK"]
+RELATIONSHIPS = [
+    ("close colleague", 2), ("former colleague", 4), ("former classmate", 3), ("close friend", 1),
+    ("client", 2), ("professional acquaintance", 6), ("met at a conference", 3),
+]
+
+# Post building blocks
+NEED_OPENERS = [
+    "We're {trigger} {ask} {topic}.",
+    "Our team is {trigger} {ask} {topic}.",
+    "Quick ask: {trigger} {ask} {topic}!",
+    "Anyone in my network? {trigger} {ask} {topic}.",
+]
+TRIGGERS = ["looking for", "in need of", "seeking"]
+ASKS = [
+    "a supplier of", "a vendor for", "an engineer who knows", "investors for", "funding for",
+    "a partner in", "advice on", "help with", "to hire someone for",
+]
+TOPICS = [
+    "compostable packaging", "bioplastic films", "sustainable materials", "food packaging certification",
+    "certified bio-plastic resins", "packaging design", "recycled materials", "React performance",
+    "a Kubernetes migration", "our seed round", "ML infrastructure", "brand strategy",
+]
+NO_NEED_POSTS = [
+    "Excited to share that we just shipped our new {topic} line!",
+    "Great panel today about {topic}. Thanks to everyone who joined.",
+    "Reflecting on five years of working on {topic}.",
+]
+FILLERS = [
+    "We're a small team based in {location}.",
+    "DM me if you know someone.",
+    "Happy to share more details.",
+    "Timeline is the next quarter.",
+    "Would love warm intros.",
+    "Thanks in advance, network!",
+    "#sustainability #startups",
+]
+
+TAIL_TAGS_PER_CONTACT = 20  # one niche tag exists per this many contacts
+
+
+def _weighted(rng: random.Random, items: List, weights: List[float]):
+    return rng.choices(items, weights=weights, k=1)[0]
+
+
+def _zipf_sample(rng: random.Random, items: List[str], k: int) -> List[str]:
+    """Pick ``k`` distinct items, earlier items much more likely than later ones."""
+    weights = [1.0 / (rank + 1) ** 1.1 for rank in range(len(items))]
+    picked: List[str] = []
+    while len(picked) < min(k, len(items)):
+        item = _weighted(rng, items, weights)
+        if item not in picked:
+            picked.append(item)
+    return picked
+
+
+def generate_contact_records(n: int, seed: int = 0) -> Iterator[dict]:
+    """
+    Yield ``n`` contact records in the example-file schema.
+
+    Args:
+        n: Number of contacts
+        seed: Random seed; equal seeds give equal networks
+
+    Returns:
+        Iterator of record dictionaries
+    """
+    rng = random.Random(seed)
+    industries = list(INDUSTRIES)
+    industry_weights = [INDUSTRIES[name][0] for name in industries]
+    relationships = [phrase for phrase, _ in RELATIONSHIPS]
+    relationship_weights = [weight for _, weight in RELATIONSHIPS]
+    tail_tags = max(10, n // TAIL_TAGS_PER_CONTACT)
+
+    for i in range(n):
+        industry = _weighted(rng, industries, industry_weights)
+        _, skills, interests = INDUSTRIES[industry]
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        handle = f"{first}{last}{i}".lower()
+
+        record_skills = _zipf_sample(rng, skills, rng.randint(2, 6))
+        if rng.random() < 0.3:
+            record_skills.append(f"niche-skill-{int(rng.paretovariate(1.2) * 7) % tail_tags}")
+
+        yield {
+            "name": f"{first} {last}",
+            "email": f"{handle}@example.com",
+            "linkedin_url": f"https://linkedin.com/in/{handle}",
+            "skills": record_skills,
+            "industry": industry,
+            "current_company": f"{last} {rng.choice(['Labs', 'Inc.', 'Partners', 'Co'])}",
+            "current_role": rng.choice(ROLES),
+            "location": rng.choice(LOCATIONS),
+            "relationship": _weighted(rng, relationships, relationship_weights),
+            "last_interaction": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "notes": "Open to intros." if rng.random() < 0.5 else "Busy, but responsive to good opportunities.",
+            "interests": _zipf_sample(rng, interests, rng.randint(0, 2)),
+        }
+
+
+def generate_contacts(n: int, seed: int = 0) -> Iterator[Contact]:
+    """Yield ``n`` synthetic ``Contact`` objects."""
+    for record in generate_contact_records(n, seed):
+        yield contact_from_record(record)
+
+
+def generate_store(n: int, seed: int = 0) -> ContactStore:
+    """Build a columnar store of ``n`` synthetic contacts without holding them all as objects."""
+    return ContactStore.from_contacts(generate_contacts(n, seed))
+
+
+def generate_posts(n: int, seed: int = 0, need_ratio: float = 0.85) -> List[dict]:
+    """
+    Generate ``n`` LinkedIn posts.
+
+    Args:
+        n: Number of posts
+        seed: Random seed; equal seeds give equal posts
+        need_ratio: Fraction of posts that express a need
+
+    Returns:
+        List of post dicts with ``post_text`` and ``author_name``
+    """
+    rng = random.Random(seed)
+    posts = []
+    for _ in range(n):
+        topic = rng.choice(TOPICS)
+        if rng.random() < need_ratio:
+            sentences = [rng.choice(NEED_OPENERS).format(
+                trigger=rng.choice(TRIGGERS), ask=rng.choice(ASKS), topic=topic,
+            )]
+            if rng.random() < 0.4:
+                sentences.append(f"Also {rng.choice(TRIGGERS)} {rng.choice(ASKS)} {rng.choice(TOPICS)}.")
+        else:
+            sentences = [rng.choice(NO_NEED_POSTS).format(topic=topic)]
+        for _ in range(rng.randint(0, 4)):
+            sentences.append(rng.choice(FILLERS).format(location=rng.choice(LOCATIONS)))
+
+        posts.append({
+            "post_text": " ".join(sentences),
+            "author_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        })
+    return posts
@@ -0,0 +1,124 @@
+"""
+Multi-tenant benchmark for the sharded matcher.
+
+Partitions one large synthetic tenant and several small ones, then:
+
+1. checks that scatter-gather rankings equal those of a single index over
+   each tenant's whole network
+2. measures the large tenant's throughput with each worker count
+3. measures small-tenant latency while the large tenant's requests keep
+   every worker busy, next to the same requests on idle workers
+
+Usage:
+    python -m benchmarks.tenants --large 200000 --small 2000 --tenants 4 --workers 1,2,4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import wait
+from typing import List, Optional, Tuple
+
+from app.contact_index import ContactIndex
+from app.contact_store import ContactStore
+from app.need_extractor import NEED_EXTRACTOR
+from app.pipeline import ConnectorPipeline, build_need_spec
+from app.tenant_shards import ShardedMatcher, partition_tenant
+from benchmarks.synthetic import generate_contacts, generate_posts
+
+LARGE_TENANT = "large"
+
+
+def _needs(posts: List[dict], tenant: str) -> list:
+    needs = []
+    for post in posts:
+        detected_type, keywords = NEED_EXTRACTOR.scan(post["post_text"])
+        need = build_need_spec(post["post_text"], post["author_name"], detected_type, keywords)
+        needs.append(need.model_copy(update={"user_id": tenant}))
+    return needs
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def check_rankings(matcher: ShardedMatcher, tenant: str, size: int, seed: int, needs: list) -> int:
+    """Compare every sharded ranking with a single-index one; returns the mismatches."""
+    single = ConnectorPipeline(ContactIndex(ContactStore.from_contacts(generate_contacts(size, seed))))
+    mismatches = 0
+    for need in needs:
+        expected = [(r.contact.id, round(r.rank_score, 6)) for r in single.rank(need, 5).ranked_contacts]
+        actual = [(r.contact.id, round(r.rank_score, 6)) for r in matcher.rank(need, 5).ranked_contacts]
+        mismatches += expected != actual
+    return mismatches
+
+
+def small_latencies(matcher: ShardedMatcher, small_needs: list, flood: list) -> Tuple[List[float], float]:
+    """
+    Latency (ms) of each small-tenant request, issued one at a time while ``flood`` is queued.
+
+    Returns:
+        (latencies, seconds until the flood was done)
+    """
+    started = time.perf_counter()
+    pending = [matcher.submit(need) for need in flood]
+    latencies = []
+    for need in small_needs:
+        sent = time.perf_counter()
+        matcher.rank(need)
+        latencies.append((time.perf_counter() - sent) * 1000)
+    wait(pending)
+    return latencies, time.perf_counter() - started
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure sharded multi-tenant matching.")
+    parser.add_argument("--large", type=int, default=200_000, help="Contacts of the large tenant")
+    parser.add_argument("--small", type=int, default=2000, help="Contacts of each small tenant")
+    parser.add_argument("--tenants", type=int, default=4, help="Number of small tenants")
+    parser.add_argument("--shard-size", type=int, default=25_000)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        partition_tenant(LARGE_TENANT, generate_contacts(args.large, args.seed), root, args.shard_size)
+        small = [f"small-{i}" for i in range(args.tenants)]
+        for i, tenant in enumerate(small, 1):
+            partition_tenant(tenant, generate_contacts(args.small, args.seed + i), root, args.shard_size)
+        print(f"📏 {args.large:,} + {args.tenants} x {args.small:,} contacts, shards of {args.shard_size:,}, "
+              f"{os.cpu_count()} CPUs (partitioned in {time.perf_counter() - started:.1f}s)")
+
+        posts = [post for post in generate_posts(args.posts, args.seed) if NEED_EXTRACTOR.scan(post["post_text"])[1]]
+        large_needs = _needs(posts, LARGE_TENANT)
+        # Interleaved, so the first ``len(small)`` needs cover every small tenant
+        per_tenant = [_needs(posts[i::len(small)][:10], tenant) for i, tenant in enumerate(small)]
+        small_needs = [need for needs in zip(*per_tenant) for need in needs]
+
+        for workers in (int(count) for count in args.workers.split(",")):
+            with ShardedMatcher(root, workers=workers) as matcher:
+                # Warm every worker's shard indexes before timing
+                wait([matcher.submit(need) for need in large_needs[:workers * 2] + small_needs[:len(small)]])
+
+                if workers == 1:
+                    mismatches = check_rankings(matcher, LARGE_TENANT, args.large, args.seed, large_needs[:50])
+                    print(f"   rankings vs one index: {'identical' if not mismatches else f'{mismatches} differ'}")
+
+                started = time.perf_counter()
+                wait([matcher.submit(need) for need in large_needs])
+                throughput = len(large_needs) / (time.perf_counter() - started)
+
+                idle, _ = small_latencies(matcher, small_needs, [])
+                busy, backlog = small_latencies(matcher, small_needs, large_needs)
+            print(f"   {workers:>3} workers  large {throughput:>8,.0f} needs/s  "
+                  f"small p50/p99 idle {_percentile(idle, 0.5):.1f}/{_percentile(idle, 0.99):.1f}ms, "
+                  f"behind a {backlog:.1f}s large backlog {_percentile(busy, 0.5):.1f}/{_percentile(busy, 0.99):.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
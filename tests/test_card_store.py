@@ -0,0 +1,77 @@
+"""Pipeline card store: versions, stage transitions and due-date ordering."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import PipelineCard
+from automation.card_store import CardStore, FollowUpScheduler, card_id
+
+START = datetime(2026, 3, 2, 9, 0)
+
+
+def _card(contact_id: str, stage: str = "drafted", need_id: str = "need_1") -> PipelineCard:
+    return PipelineCard(
+        id=card_id(need_id, contact_id), need_spec_id=need_id, contact_id=contact_id,
+        stage=stage, rank_score=0.8, rank_justification="",
+    )
+
+
+@pytest.fixture
+def cards(tmp_path):
+    with CardStore(tmp_path / "cards.sqlite") as store:
+        yield store
+
+
+def test_versions_track_changes_and_add_never_overwrites(cards):
+    assert cards.add([_card("c1"), _card("c2")]) == 2
+    after_add = cards.version
+    # A second add of the same card id is a conflict: the stored card wins
+    assert cards.add([_card("c1", stage="sent")]) == 0
+    assert cards.get(card_id("need_1", "c1")).stage == "drafted"
+    assert cards.changes(after_add) == []
+
+    cards.upsert([_card("c2", stage="candidates")])
+    assert [card.contact_id for card in cards.changes(after_add)] == ["c2"]
+
+    cards.mark_run("monitor")
+    cards.transition([card_id("need_1", "c1")], "sent", at=START)
+    changed, version = cards.changes_since_last_run("monitor")
+    assert [card.contact_id for card in changed] == ["c1"]
+    cards.mark_run("monitor", version)
+    assert cards.changes_since_last_run("monitor")[0] == []
+
+
+def test_transitions_schedule_follow_ups_and_closing_clears_them(cards):
+    cards.add([_card("c1"), _card("c2")])
+    ids = [card_id("need_1", "c1"), card_id("need_1", "c2")]
+
+    assert cards.transition(ids, "sent", at=START) == 2
+    assert cards.get(ids[0]).next_action_date == START + timedelta(days=3)
+    cards.transition(ids[:1], "follow_up_2", at=START)
+    assert cards.get(ids[0]).next_action_date == START + timedelta(days=7)
+
+    cards.transition(ids[:1], "closed_won", at=START, next_action_date=START, outcome="intro made")
+    closed = cards.get(ids[0])
+    assert (closed.stage, closed.next_action_date, closed.outcome) == ("closed_won", None, "intro made")
+    assert cards.stage_counts() == {"closed_won": 1, "sent": 1}
+
+    with pytest.raises(ValueError):
+        cards.transition(ids, "shipped")
+
+
+def test_due_actions_are_ordered_by_date(cards):
+    cards.add([_card(f"c{i}") for i in range(6)])
+    scheduler = FollowUpScheduler(cards)
+    for i, stage in enumerate(["sent", "follow_up_1", "follow_up_2", "sent", "warm_intro"]):
+        cards.transition([card_id("need_1", f"c{i}")], stage, at=START,
+                         next_action_date=START + timedelta(days=5 - i))
+    # Rescheduling supersedes the earlier entry; closing drops the card
+    cards.transition([card_id("need_1", "c4")], "warm_intro", at=START, next_action_date=START + timedelta(days=30))
+    cards.transition([card_id("need_1", "c3")], "closed_lost", at=START)
+
+    now = START + timedelta(days=10)
+    due = [(action.card.contact_id, action.action) for action in cards.due_actions(now)]
+    assert due == [("c2", "closed_lost"), ("c1", "follow_up_2"), ("c0", "follow_up_1")]
+    assert [(action.card.contact_id, action.action) for action in scheduler.due(now)] == due
+    assert scheduler.next_due_date() == START + timedelta(days=3)
+    assert [action.card.contact_id for action in cards.due_actions(now, limit=1)] == ["c2"]
@@ -0,0 +1,62 @@
+"""Constraint pre-filter: avoided keywords and agreement with contact_allowed."""
+import random
+import subprocess
+import sys
+
+from app.constraint_index import ConstraintIndex, contact_allowed
+from app.contact_index import ContactIndex
+from app.models import Contact, NeedSpec
+from benchmarks.synthetic import generate_store
+
+
+def _need(keywords_avoid: list, persona: dict = None) -> NeedSpec:
+    return NeedSpec(
+        id="need_test", raw_input="", objective_type="intro", target_persona=persona or {},
+        keywords_must=["python"], keywords_avoid=keywords_avoid,
+    )
+
+
+def _allowed(index: ConstraintIndex, need: NeedSpec) -> set:
+    mask = index.mask(need)
+    return {pos for pos in range(index.size) if mask is None or mask >> pos & 1}
+
+
+def test_avoided_keyword_matches_whole_words():
+    contacts = [
+        Contact(id=tag, name=tag, tags=[tag])
+        for tag in ["AI", "AI Ethics", "Retail", "Sustainability", "Fundraising"]
+    ]
+    index = ConstraintIndex(ContactIndex(contacts))
+    need = _need(["ai"])
+    assert {contacts[pos].id for pos in _allowed(index, need)} == {"Retail", "Sustainability", "Fundraising"}
+    assert [contact_allowed(need, contact) for contact in contacts] == [False, False, True, True, True]
+
+
+def test_persona_value_matches_whole_words():
+    contacts = [
+        Contact(id=tag, name=tag, tags=[tag])
+        for tag in ["AI", "AI Ethics", "Retail", "Fundraising"]
+    ]
+    index = ConstraintIndex(ContactIndex(contacts))
+    need = _need([], {"industry": "ai"})
+    assert {contacts[pos].id for pos in _allowed(index, need)} == {"AI", "AI Ethics"}
+    assert [contact_allowed(need, contact) for contact in contacts] == [True, True, False, False]
+
+
+def test_mask_agrees_with_contact_allowed():
+    store = generate_store(400, seed=3)
+    index = ConstraintIndex(ContactIndex(store))
+    rng = random.Random(3)
+    tags = sorted({tag for pos in range(len(store)) for tag in store.tags(pos)})
+    for _ in range(50):
+        need = _need(
+            rng.sample(tags, 2) + [rng.choice(tags).split()[0][:3]],
+            {"industry": rng.choice(tags)} if rng.random() < 0.5 else None,
+        )
+        expected = {pos for pos in range(len(store)) if contact_allowed(need, store[pos])}
+        assert _allowed(index, need) == expected
+
+
+def test_constraint_index_does_not_load_lead_resolver():
+    code = "import sys, app.constraint_index; print('app.lead_resolver' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip() == "False"
@@ -0,0 +1,20 @@
+"""Keyword -> tag containment cache bounds."""
+from app import contact_index
+from app.contact_index import ContactIndex
+from app.contact_store import EditableContactStore
+from app.models import Contact
+
+
+def test_keyword_cache_is_bounded_and_keeps_lexicon(monkeypatch):
+    monkeypatch.setattr(contact_index, "KEYWORD_CACHE_SIZE", 8)
+    index = ContactIndex(EditableContactStore.from_contacts([Contact(id="c1", name="Ann", tags=["Packaging", "Python"])]))
+    index.precompute(["packaging"])
+    for i in range(100):
+        assert index.tags_for_keyword(f"keyword{i}") == []
+    assert len(index._keyword_tags) == 8
+    assert index.tags_for_keyword("packaging") == [0]
+    assert index.tags_for_keyword("keyword99") == []
+    # Tags added later reach both the lexicon and the LRU lists
+    index.upsert(Contact(id="c2", name="Bo", tags=["Sustainable Packaging", "keyword99"]))
+    assert index.tags_for_keyword("packaging") == [0, 2]
+    assert index.tags_for_keyword("keyword99") == [3]
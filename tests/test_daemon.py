@@ -0,0 +1,90 @@
+"""Matcher daemon request handling."""
+import http.client
+import json
+import threading
+
+import pytest
+
+from app.contact_store import EditableContactStore
+from app.daemon import ENDPOINTS, MatcherService, build_pipeline, make_server
+from app.pipeline import ConnectorPipeline
+from benchmarks.synthetic import generate_contacts
+
+
+@pytest.fixture(scope="module")
+def daemon():
+    server = make_server(MatcherService(), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _post(port: int, endpoint: str, payload) -> int:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        connection.request("POST", f"/{endpoint}", json.dumps(payload), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("endpoint, payload", [
+    ("match", {"need": "notadict"}),
+    ("match", {"need": {"keywords": ["packaging"]}, "top_n": "3"}),
+    ("match_batch", {"needs": ["notadict"]}),
+    ("extract", {"post_text": None}),
+    ("process", {"post_text": None}),
+    ("process", {}),
+    ("draft", {"matches": {"contact": {}}}),
+    ("draft", {"matches": [{"contact": {}}]}),
+    ("draft", {"matches": [], "channel": "fax"}),
+])
+def test_malformed_payload_is_a_bad_request(daemon, endpoint, payload):
+    assert _post(daemon, endpoint, payload) == 400
+
+
+def test_well_formed_payload_succeeds(daemon):
+    assert _post(daemon, "match", {"need": {"keywords": ["packaging"]}, "top_n": 2}) == 200
+
+
+def test_invalid_content_length_is_a_bad_request(daemon):
+    for length in ("abc", "-1"):
+        connection = http.client.HTTPConnection("127.0.0.1", daemon, timeout=10)
+        try:
+            connection.putrequest("POST", "/match")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 400
+        finally:
+            connection.close()
+
+
+def test_pipeline_errors_are_not_bad_requests(daemon, monkeypatch):
+    def fail(self, need, top_n=3):
+        raise KeyError("internal")
+
+    monkeypatch.setattr(ConnectorPipeline, "rank", fail)
+    assert _post(daemon, "match", {"need": {"keywords": ["packaging"]}}) == 500
+
+
+def test_handlers_use_the_pipeline_they_are_given():
+    contacts = list(generate_contacts(20, seed=3))
+    pipeline = build_pipeline(EditableContactStore.from_contacts(contacts))
+    ids = {contact.id for contact in contacts}
+    need = {"keywords": contacts[0].tags[:1]}
+
+    matched = json.loads(ENDPOINTS["match"](pipeline, {"need": need, "top_n": 3}))
+    batch = json.loads(ENDPOINTS["match_batch"](pipeline, {"needs": [need], "top_n": 3}))
+    drafts = json.loads(ENDPOINTS["draft"](pipeline, {"matches": matched["matches"]}))
+    processed = json.loads(ENDPOINTS["process"](pipeline, {"post_text": "Looking for help with " + need["keywords"][0]}))
+
+    assert matched["matches"] and {match["contact"]["id"] for match in matched["matches"]} <= ids
+    assert batch == [matched]
+    assert [draft["contact_id"] for draft in drafts] == [match["contact"]["id"] for match in matched["matches"]]
+    assert {match["contact"]["id"] for match in processed["matches"]} <= ids
@@ -0,0 +1,66 @@
+"""Intro drafts: channel length limits, and notes shortened before anything else."""
+import pytest
+
+from app.drafts import CHANNEL_LIMITS, DRAFT_TEMPLATES, ELLIPSIS, SUBJECT_LIMIT, DraftEngine, compile_template
+from app.models import Contact, RankedContact
+
+
+def _ranked(notes: str = "Met at the packaging summit.", company: str = "GreenPack Solutions") -> RankedContact:
+    contact = Contact(id="c1", name="Sarah Chen", title="Head of Packaging", company=company, notes=notes)
+    return RankedContact(
+        contact=contact,
+        rank_score=0.9,
+        rank_justification="",
+        relevance_score=1.0,
+        relationship_score=contact.relationship_strength,
+        matching_expertise=["bioplastics", "packaging"],
+    )
+
+
+def _closing(channel: str) -> str:
+    """Last line of the to-poster template: text after the notes that must survive."""
+    return DRAFT_TEMPLATES[channel][0][1].rsplit("\n", 1)[-1]
+
+
+@pytest.mark.parametrize("channel", sorted(CHANNEL_LIMITS))
+def test_every_draft_fits_its_channel(channel):
+    engine = DraftEngine()
+    oversized = [_ranked(notes="x" * 20000), _ranked(notes="y" * 20000, company="Z" * 20000)]
+    for drafts in engine.render_batch(oversized, "P" * 5000, channels=(channel,)):
+        for draft in drafts:
+            assert draft.char_count == len(draft.body) <= CHANNEL_LIMITS[channel]
+            assert draft.subject is None or len(draft.subject) <= SUBJECT_LIMIT
+
+
+@pytest.mark.parametrize("channel", sorted(CHANNEL_LIMITS))
+def test_notes_are_truncated_first(channel):
+    engine = DraftEngine()
+    notes = "Met at the packaging summit. " * 500
+    draft = engine.render_batch([_ranked(notes=notes)], "Dana", channels=(channel,))[0][0]
+
+    assert len(draft.body) <= CHANNEL_LIMITS[channel]
+    assert draft.body.endswith(_closing(channel))  # the rest of the template is intact
+    assert "Sarah Chen" in draft.body and "GreenPack Solutions" in draft.body
+    before, after = draft.body.split(ELLIPSIS)
+    kept = before[before.index("Met at"):]
+    assert notes.startswith(kept) and len(kept) > CHANNEL_LIMITS[channel] // 2
+    assert len(draft.body) >= CHANNEL_LIMITS[channel] - 1  # only as much as needed (less a trailing space)
+    assert engine.truncated == 1
+
+
+def test_too_long_without_notes_is_cut_at_the_limit():
+    draft = DraftEngine().render_batch([_ranked(notes="", company="Z" * 5000)], channels=("linkedin_dm",))[0][0]
+    assert len(draft.body) == CHANNEL_LIMITS["linkedin_dm"]
+    assert draft.body.endswith(ELLIPSIS)
+
+
+def test_short_drafts_are_untouched():
+    engine = DraftEngine()
+    for drafts in engine.render_batch([_ranked()], "Dana", channels=sorted(CHANNEL_LIMITS)):
+        assert all(ELLIPSIS not in draft.body for draft in drafts)
+    assert engine.truncated == 0
+
+
+def test_unknown_template_field_is_rejected():
+    with pytest.raises(ValueError):
+        compile_template("Hi {email}", 100)
@@ -0,0 +1,141 @@
+"""
+Randomized equivalence checks for the matcher's fast paths.
+
+Each fast path must rank exactly like the plain one: an index kept current
+by incremental reloads like one rebuilt cold, a sharded tenant like a
+single index over the same network, and batch ranking like scalar ranking.
+"""
+import json
+import random
+
+import pytest
+
+from app.contact_index import ContactIndex
+from app.contact_store import EditableContactStore, contact_from_record
+from app.daemon import MatcherService
+from app.pipeline import ConnectorPipeline
+from app.tenant_shards import ShardedMatcher, partition_tenant
+from benchmarks.synthetic import (
+    LOCATIONS,
+    RELATIONSHIPS,
+    generate_contact_records,
+    generate_contacts,
+    generate_posts,
+    generate_store,
+)
+
+AVOIDED = ["Python", "ai", "Supply Chain", "Marketing", "Founder", "Labs"]
+INDUSTRIES = ["Packaging", "Technology", "Manufacturing", "sustainability"]
+
+
+def _needs(pipeline: ConnectorPipeline, count: int, seed: int) -> list:
+    """Needs from synthetic posts, about half of them with constraints."""
+    rng = random.Random(seed)
+    needs = []
+    for post in generate_posts(count, seed):
+        need = pipeline.extract(post["post_text"], post["author_name"])
+        roll = rng.random()
+        if roll < 0.15:
+            need = need.model_copy(update={"geography": rng.sample(LOCATIONS, 2)})
+        elif roll < 0.3:
+            need = need.model_copy(update={"keywords_avoid": rng.sample(AVOIDED, 2)})
+        elif roll < 0.45:
+            need = need.model_copy(update={"target_persona": {**need.target_persona, "industry": rng.choice(INDUSTRIES)}})
+        elif roll < 0.5:
+            need = need.model_copy(update={
+                "geography": [rng.choice(LOCATIONS)],
+                "keywords_avoid": [rng.choice(AVOIDED)],
+                "target_persona": {**need.target_persona, "company_type": rng.choice(INDUSTRIES)},
+            })
+        needs.append(need)
+    return needs
+
+
+def _ranking(response) -> list:
+    return [(ranked.contact.id, round(ranked.rank_score, 6)) for ranked in response.ranked_contacts]
+
+
+def _edited(record: dict, rng: random.Random, donor: dict) -> dict:
+    record = dict(record)
+    field = rng.choice(["skills", "relationship", "location", "industry", "current_role"])
+    if field == "relationship":
+        record["relationship"] = rng.choice(RELATIONSHIPS)[0]
+    elif field == "location":
+        record["location"] = rng.choice(LOCATIONS)
+    else:
+        record[field] = donor[field]
+    return record
+
+
+def test_incremental_reload_matches_cold_rebuild(tmp_path):
+    rng = random.Random(7)
+    records = {contact_from_record(record).id: record for record in generate_contact_records(300, seed=0)}
+    donors = list(generate_contact_records(200, seed=5))
+    additions = generate_contact_records(1000, seed=1)
+    path = tmp_path / "contacts.jsonl"
+
+    def write() -> None:
+        path.write_text("".join(json.dumps(record) + "\n" for record in records.values()), encoding="utf-8")
+
+    write()
+    service = MatcherService(str(path))
+    needs = _needs(service.pipeline, 40, seed=2)
+
+    for _ in range(20):
+        for _ in range(50):
+            roll, ids = rng.random(), list(records)
+            if roll < 0.4:
+                contact_id = rng.choice(ids)
+                records[contact_id] = _edited(records[contact_id], rng, rng.choice(donors))
+            elif roll < 0.7:
+                record = next(additions)
+                records[contact_from_record(record).id] = record
+            else:
+                del records[rng.choice(ids)]
+        write()
+        service.reload()
+
+        pipeline = service.pipeline
+        store = pipeline.index.contacts
+        assert set(store.positions) == set(records)
+        cold = ConnectorPipeline(ContactIndex(store))
+        for need in needs:
+            assert pipeline.candidate_filter(need) == cold.candidate_filter(need)
+            assert _ranking(pipeline.rank(need, 5)) == _ranking(cold.rank(need, 5))
+
+
+def test_sharded_matches_single_index(tmp_path):
+    single = ConnectorPipeline(ContactIndex(generate_store(700, seed=4)))
+    partition_tenant("acme", generate_contacts(700, seed=4), tmp_path, shard_size=64)
+    needs = [need.model_copy(update={"user_id": "acme"}) for need in _needs(single, 60, seed=6)]
+    with ShardedMatcher(tmp_path, workers=2) as matcher:
+        for top_n in (1, 5, 12):
+            futures = [matcher.submit(need, top_n) for need in needs]
+            for need, future in zip(needs, futures):
+                assert _ranking(future.result(timeout=60)) == _ranking(single.rank(need, top_n))
+
+
+def test_batch_matches_scalar_across_edits():
+    pytest.importorskip("scipy")
+    rng = random.Random(11)
+    store = EditableContactStore.from_contacts(generate_contacts(500, seed=8))
+    pipeline = ConnectorPipeline(ContactIndex(store))
+    needs = _needs(pipeline, 60, seed=9)
+    extra = generate_contacts(300, seed=10)
+    donors = list(generate_contacts(100, seed=12))
+
+    for _ in range(6):
+        for top_n in (1, 3, 10):
+            batch = pipeline.rank_batch(needs, top_n)
+            assert [_ranking(response) for response in batch] == [_ranking(pipeline.rank(need, top_n)) for need in needs]
+
+        ids = list(store.positions)
+        edits = [
+            store[store.positions[contact_id]].model_copy(update={
+                "tags": rng.choice(donors).tags,
+                "relationship_strength": rng.choice([0.3, 0.5, 0.7, 0.9]),
+            })
+            for contact_id in rng.sample(ids, 30)
+        ]
+        pipeline.upsert_contacts(edits + [next(extra) for _ in range(30)])
+        pipeline.delete_contacts(rng.sample(ids, 30))
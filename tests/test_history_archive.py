@@ -0,0 +1,94 @@
+"""History archive: incremental ingest, predicate pushdown and compaction."""
+import json
+
+import pytest
+
+from automation.history_archive import HistoryArchive
+
+
+def _result(i: int, day: str, need_type: str = "hire", matches: int = 3, text: str = "") -> dict:
+    return {
+        "timestamp": f"{day}T10:{i % 60:02d}:00",
+        "need_id": f"need_{i}",
+        "need": {"need_type": need_type, "keywords": ["packaging", "bioplastics"], "context": text},
+        "post": {"author_name": f"Author {i}", "post_url": f"https://linkedin.com/posts/{i}"},
+        "matches": [
+            {"contact": {"id": f"c{rank}", "name": f"Contact {rank}"}, "match_score": round(0.9 - rank / 200, 3), "relevance": 0.5}
+            for rank in range(matches)
+        ],
+    }
+
+
+def _write(path, results, mode: str = "w") -> None:
+    with open(path, mode, encoding="utf-8") as handle:
+        for result in results:
+            handle.write(json.dumps(result) + "\n")
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return HistoryArchive(tmp_path / "history")
+
+
+def _posts(archive: HistoryArchive) -> list:
+    return sorted(archive.scan("posts", ["need_id"])["need_id"].tolist())
+
+
+def test_ingest_is_idempotent_and_takes_only_appended_records(archive, tmp_path):
+    path = tmp_path / "matches_20260301_000.jsonl"
+    _write(path, [_result(i, "2026-03-01") for i in range(5)])
+    assert archive.ingest([path]).posts == 5
+    assert archive.ingest([path]) == (0, 0, 0, 0)
+
+    _write(path, [_result(i, "2026-03-01") for i in range(5, 8)], mode="a")
+    result = archive.ingest([path])
+    assert (result.files, result.posts, result.matches) == (1, 3, 9)
+    assert _posts(archive) == sorted(f"need_{i}" for i in range(8))
+
+
+def test_replaced_file_with_fewer_records_is_read_again(archive, tmp_path):
+    path = tmp_path / "matches_20260301_000.jsonl"
+    _write(path, [_result(i, "2026-03-01") for i in range(4)])
+    archive.ingest([path])
+    # Fewer records, but a larger file: only the record count gives the replacement away
+    _write(path, [_result(i, "2026-03-02", text="x" * 2000) for i in range(10, 12)])
+    assert archive.ingest([path]).posts == 2
+    assert "need_10" in _posts(archive)
+
+
+def test_result_with_many_matches(archive, tmp_path):
+    path = tmp_path / "matches_20260301_000.jsonl"
+    _write(path, [_result(0, "2026-03-01", matches=150)])
+    assert archive.ingest([path]).matches == 150
+    assert archive.scan("matches", ["rank"])["rank"].max() == 150
+
+
+def test_predicates_are_pushed_down_to_parts(archive, tmp_path):
+    path = tmp_path / "matches_20260301_000.jsonl"
+    _write(path, [_result(i, "2026-03-01", "hire", matches=2) for i in range(4)]
+           + [_result(i, "2026-03-02", "investment", matches=6) for i in range(4, 8)])
+    archive.ingest([path])
+
+    where = [("need_type", "==", "investment"), ("rank", ">=", 5)]
+    # The hire day's part has no "investment" in its dictionary and ranks only up to 2
+    assert len(list(archive._select("matches", where, None, None))) == 1
+    found = archive.scan("matches", ["need_id", "rank"], where)
+    assert sorted(zip(found["need_id"].tolist(), found["rank"].tolist())) == [
+        (f"need_{i}", rank) for i in range(4, 8) for rank in (5, 6)
+    ]
+    assert archive.scan("posts", ["need_id"], [("need_type", "in", {"hire"})])["need_id"].size == 4
+
+
+def test_compact_merges_parts_without_changing_rows(archive, tmp_path):
+    for n in range(3):
+        path = tmp_path / f"matches_20260301_00{n}.jsonl"
+        _write(path, [_result(10 * n + i, "2026-03-01") for i in range(3)])
+        archive.ingest([path])
+    before = {table: archive.scan(table, ["need_id"])["need_id"].tolist() for table in ("posts", "matches", "keywords")}
+    partition = archive.partitions("matches")[0]
+    assert len(archive._parts(partition)) == 3
+
+    assert archive.compact() == 9
+    assert len(archive._parts(partition)) == 1
+    for table, values in before.items():
+        assert sorted(archive.scan(table, ["need_id"])["need_id"].tolist()) == sorted(values)
@@ -0,0 +1,72 @@
+"""Lead resolution: known, duplicate and new leads, URL conflicts and oversized blocks."""
+import pytest
+
+from app.lead_resolver import URL_CONFLICT_CAP, LeadResolver
+from app.metrics import MetricsRegistry
+from app.models import Contact, PersonLead
+
+CONTACTS = [
+    Contact(id="c1", name="Sarah Chen", company="GreenPack Solutions", location="Austin, TX",
+            profile_url="https://www.linkedin.com/in/sarahchen"),
+    Contact(id="c2", name="Samantha Reyes", company="Loop Packaging", location="Denver, CO"),
+    Contact(id="c3", name="Priya Nair", company="Acme", location="Boston, MA",
+            profile_url="https://linkedin.com/in/priya-nair"),
+]
+
+
+@pytest.fixture
+def resolver():
+    return LeadResolver(CONTACTS, MetricsRegistry())
+
+
+def test_known_contact_despite_affixes_and_suffixes(resolver):
+    resolved = resolver.resolve(PersonLead(name="Dr. Sarah Chen, PhD", company="GreenPack Solutions, Inc."))
+    assert (resolved.status, resolved.match_id) == ("known", "c1")
+
+
+def test_country_subdomain_profile_url_is_the_same_profile(resolver):
+    lead = PersonLead(name="S. Chen", profile_url="https://uk.linkedin.com/in/sarahchen/?trk=people")
+    resolved = resolver.resolve(lead)
+    assert (resolved.status, resolved.match_id, resolved.score) == ("known", "c1", 1.0)
+
+
+def test_likely_contact_match_is_a_duplicate(resolver):
+    # Same last name, compatible first name, nothing else to confirm it
+    resolved = resolver.resolve(PersonLead(name="Sam Reyes"))
+    assert (resolved.status, resolved.match_id) == ("duplicate", "c2")
+    assert 0.65 <= resolved.score < 0.8
+
+
+def test_repeated_lead_is_a_duplicate_of_the_first(resolver):
+    first = resolver.resolve(PersonLead(name="Marcus Webb", company="Northwind"), "linkedin", "d1")
+    second = resolver.resolve(PersonLead(name="Marcus Webb", company="Northwind LLC"), "jobs", "d2")
+    assert first.status == "new"
+    assert (second.status, second.match_id, second.dump_id) == ("duplicate", first.match_id, "d2")
+
+
+def test_different_profile_urls_cap_the_score(resolver):
+    lead = PersonLead(name="Priya Nair", company="Acme", location="Boston",
+                      profile_url="https://linkedin.com/in/priya-nair-2")
+    resolved = resolver.resolve(lead)
+    assert resolved.status == "new"
+    assert resolved.score == URL_CONFLICT_CAP
+
+
+def test_oversized_blocks_are_skipped():
+    contacts = [Contact(id=f"s{i}", name="John Smith", company=f"Company {i}") for i in range(3)]
+    lead = PersonLead(name="John Smith")
+
+    small = LeadResolver(contacts, MetricsRegistry(), max_block_size=2)
+    resolved = small.resolve(lead)
+    assert (resolved.status, resolved.score) == ("new", 0.0)
+    assert small.contacts.comparisons == 0
+
+    assert LeadResolver(contacts, MetricsRegistry()).resolve(lead).status == "known"
+
+
+def test_profile_url_blocks_are_never_skipped():
+    contacts = [Contact(id=f"s{i}", name="John Smith", profile_url="https://linkedin.com/in/jsmith") for i in range(3)]
+    resolved = LeadResolver(contacts, MetricsRegistry(), max_block_size=2).resolve(
+        PersonLead(name="John Smith", profile_url="linkedin.com/in/jsmith")
+    )
+    assert (resolved.status, resolved.match_id) == ("known", "s0")
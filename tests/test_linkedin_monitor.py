@@ -0,0 +1,150 @@
+"""Monitor search: replay without an API key, rate limiting and retries against a local server."""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+from app.metrics import MetricsRegistry
+from automation import linkedin_monitor as monitor
+from automation import search_client
+from automation.response_cache import ReplayMiss, ResponseCache
+from automation.result_sink import ResultSink, read_results
+from automation.search_client import AsyncSearchClient, TokenBucket, build_search_payload
+from automation.seen_index import SeenPostIndex
+
+QUERY = "hiring packaging engineer"
+POSTS = [{"author_name": "Dana", "post_text": "Looking for a packaging engineer", "post_url": "https://linkedin.com/posts/1"}]
+
+
+def _body(posts: list) -> dict:
+    return {"choices": [{"message": {"content": json.dumps(posts)}}]}
+
+
+@asynccontextmanager
+async def serve(responses: list):
+    """Local API answering each POST with the next (status, headers) from ``responses``, then 200."""
+    requests = []
+
+    async def chat(request: web.Request) -> web.Response:
+        await request.read()
+        requests.append(asyncio.get_running_loop().time())
+        if len(requests) <= len(responses):
+            status, headers = responses[len(requests) - 1]
+            return web.json_response({"error": "retry"}, status=status, headers=headers)
+        return web.json_response(_body(POSTS))
+
+    app = web.Application()
+    app.router.add_post("/chat/completions", chat)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    try:
+        yield f"http://127.0.0.1:{runner.addresses[0][1]}/chat/completions", requests
+    finally:
+        await runner.cleanup()
+
+
+async def _search(responses: list, **options) -> tuple:
+    metrics = MetricsRegistry()
+    async with serve(responses) as (url, requests):
+        async with AsyncSearchClient("test-key", url, metrics=metrics, **options) as client:
+            posts = await client.search(QUERY)
+    return posts, requests, metrics.counters
+
+
+# ============================================================================
+# REPLAY THROUGH run_searches
+# ============================================================================
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitor, "PERPLEXITY_API_KEY", None)
+    monkeypatch.setattr(monitor, "PERPLEXITY_API_URL", "http://127.0.0.1:9/chat/completions")
+    monkeypatch.setattr(monitor, "SEARCH_CACHE_MODE", "replay")
+    monkeypatch.setattr(monitor, "SEARCH_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(monitor, "process_post", lambda post: {"post": post, "processed": True})
+    return ResponseCache(tmp_path / "cache", "record")
+
+
+def _run(tmp_path, queries: list) -> tuple:
+    with ResultSink(tmp_path / "output") as sink, SeenPostIndex(tmp_path / "seen.sqlite") as seen:
+        processed = asyncio.run(monitor.run_searches(queries, sink, seen))
+    return processed, [record for path in sink.files for record in read_results(path)]
+
+
+def test_replay_serves_recorded_search_without_api_key(tmp_path, replay):
+    replay.put(replay.key(monitor.PERPLEXITY_API_URL, build_search_payload(QUERY)), _body(POSTS))
+
+    processed, records = _run(tmp_path, [QUERY])
+
+    assert processed == 1
+    assert [record["post"] for record in records] == POSTS
+
+
+def test_replay_miss_propagates(tmp_path, replay):
+    with pytest.raises(ReplayMiss):
+        _run(tmp_path, [QUERY])
+
+
+# ============================================================================
+# RATE LIMITING AND RETRIES
+# ============================================================================
+
+def test_token_bucket_spends_burst_then_holds_rate():
+    async def acquire_all(bucket: TokenBucket, n: int) -> list:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        times = []
+        for _ in range(n):
+            await bucket.acquire()
+            times.append(loop.time() - start)
+        return times
+
+    times = asyncio.run(acquire_all(TokenBucket(rate=20, capacity=3), 7))
+
+    assert times[2] < 0.03  # the burst is free
+    assert times[-1] >= (7 - 3) / 20 - 0.01
+    gaps = [later - earlier for earlier, later in zip(times[3:], times[4:])]
+    assert min(gaps) >= 1 / 20 - 0.01
+
+
+def test_429_waits_for_retry_after(monkeypatch):
+    monkeypatch.setattr(search_client.random, "uniform", lambda low, high: pytest.fail("jitter used despite Retry-After"))
+
+    posts, requests, counters = asyncio.run(_search([(429, {"Retry-After": "0.3"})], backoff_base=0.01))
+
+    assert posts == POSTS
+    assert len(requests) == 2
+    assert requests[1] - requests[0] >= 0.29
+    assert counters["search_retries"] == 1
+
+
+def test_retries_use_full_jitter_exponential_backoff(monkeypatch):
+    ceilings = []
+
+    def uniform(low, high):
+        ceilings.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(search_client.random, "uniform", uniform)
+
+    posts, requests, counters = asyncio.run(
+        _search([(503, {}), (500, {}), (429, {})], backoff_base=0.5, backoff_max=1.5)
+    )
+
+    assert posts == POSTS
+    assert ceilings == [(0, 0.5), (0, 1.0), (0, 1.5)]
+    assert counters["search_retries"] == 3
+
+
+def test_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(search_client.random, "uniform", lambda low, high: 0.0)
+
+    posts, requests, counters = asyncio.run(_search([(503, {})] * 5, max_retries=2))
+
+    assert posts == []
+    assert len(requests) == 3
+    assert counters["search_errors"] == 1
@@ -0,0 +1,66 @@
+"""Standing-need percolation against full re-ranking, and card-based skips."""
+from app.contact_index import ContactIndex
+from app.contact_store import EditableContactStore
+from app.metrics import MetricsRegistry
+from app.models import Contact, PipelineCard
+from app.pipeline import ConnectorPipeline, build_need_spec
+from automation.card_store import CardStore, card_id
+from automation.need_index import NeedIndex
+from benchmarks.synthetic import generate_contacts, generate_posts
+
+TOP_N = 3
+
+
+def test_match_contact_agrees_with_full_ranking():
+    store = EditableContactStore.from_contacts(generate_contacts(200, seed=0))
+    pipeline = ConnectorPipeline(ContactIndex(store), metrics=MetricsRegistry())
+    needs = [pipeline.extract(post["post_text"], post["author_name"]) for post in generate_posts(60, seed=1)]
+    index = NeedIndex(TOP_N, metrics=MetricsRegistry())
+    for need in needs:
+        index.add_ranking(need, pipeline.rank(need, TOP_N))
+
+    def top(need) -> set:
+        return {ranked.contact.id for ranked in pipeline.rank(need, TOP_N).ranked_contacts}
+
+    reported = 0
+    for contact in generate_contacts(150, seed=2):
+        before = {need.id: top(need) for need in needs if need.id in index}
+        pipeline.upsert_contacts([contact])
+        # Needs the new contact now makes the top matches of, by a full re-rank
+        expected = {need.id for need in needs if need.id in before and contact.id in top(need) - before[need.id]}
+        matches = index.match_contact(contact)
+        assert {match.need_id for match in matches} == expected
+        reported += len(matches)
+    assert reported
+
+
+def _need(text: str):
+    return build_need_spec(text, "Dana", "hire", ["packaging"])
+
+
+def _contact(contact_id: str) -> Contact:
+    return Contact(id=contact_id, name=contact_id, tags=["Sustainable Packaging"], relationship_strength=0.8)
+
+
+def _card(need_id: str, contact_id: str, stage: str) -> PipelineCard:
+    return PipelineCard(
+        id=card_id(need_id, contact_id), need_spec_id=need_id, contact_id=contact_id,
+        stage=stage, rank_score=0.9, rank_justification="",
+    )
+
+
+def test_closed_won_needs_and_carded_contacts_are_skipped(tmp_path):
+    won, carded, open_ = _need("won"), _need("carded"), _need("open")
+    index = NeedIndex(TOP_N, metrics=MetricsRegistry())
+    for need in (won, carded, open_):
+        index.add(need)
+
+    with CardStore(tmp_path / "cards.sqlite") as cards:
+        cards.upsert([_card(won.id, "someone", "closed_won"), _card(carded.id, "c1", "sent")])
+        index.sync_cards(cards)
+
+    assert won.id not in index
+    assert {match.need_id for match in index.match_contact(_contact("c1"))} == {open_.id}
+    assert {match.need_id for match in index.match_contact(_contact("c2"))} == {carded.id, open_.id}
+    # A closed need stays closed when its result file is loaded again
+    assert not index.add(won)
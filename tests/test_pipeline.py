@@ -0,0 +1,27 @@
+"""Pipeline payload conversions."""
+from app.contact_index import ContactIndex
+from app.need_extractor import CONTEXT_CHARS
+from app.pipeline import ConnectorPipeline, need_from_payload, need_to_payload
+from benchmarks.synthetic import generate_store
+
+LONG_POST = ("We're hiring a packaging engineer with compostable materials experience. " * 8).strip()
+
+
+def test_need_id_survives_payload_round_trip():
+    assert len(LONG_POST) > CONTEXT_CHARS
+    need = ConnectorPipeline(ContactIndex(generate_store(20))).extract(LONG_POST, "Dana")
+    assert need_from_payload(need_to_payload(need)).id == need.id
+
+
+def test_long_post_text_survives_payload_round_trip():
+    need = ConnectorPipeline(ContactIndex(generate_store(20))).extract(LONG_POST, "Dana")
+    payload = need_to_payload(need)
+    assert len(payload["context"]) == CONTEXT_CHARS
+    assert need_from_payload(payload).raw_input == LONG_POST
+
+
+def test_match_without_matching_tags_claims_no_expertise():
+    pipeline = ConnectorPipeline(ContactIndex(generate_store(20)))
+    [ranked] = pipeline._ranked([(0, 0.5, 0.5, [])])
+    assert ranked.matching_expertise == []
+    assert ranked.rank_justification.endswith("has a semantically similar profile")
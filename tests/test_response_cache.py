@@ -0,0 +1,125 @@
+"""Response cache: modes, key normalization, and record then replay of a monitor run."""
+import asyncio
+import json
+import time
+
+import pytest
+from aiohttp import web
+
+from automation import linkedin_monitor as monitor
+from automation.response_cache import ReplayMiss, ResponseCache
+from automation.result_sink import ResultSink, read_results
+from automation.search_client import build_search_payload
+from automation.seen_index import SeenPostIndex
+
+URL = "https://api.example.com/chat/completions"
+RESPONSE = {"choices": [{"message": {"content": "[]"}}]}
+
+
+def test_key_ignores_dict_order_but_not_content():
+    payload = build_search_payload("hiring packaging engineer")
+    reordered = json.loads(json.dumps(dict(reversed(list(payload.items())))))
+
+    assert ResponseCache.key(URL, payload) == ResponseCache.key(URL, reordered)
+    assert ResponseCache.key(URL, payload) != ResponseCache.key(URL, build_search_payload("hiring designer"))
+    assert ResponseCache.key(URL, payload) != ResponseCache.key(URL + "?v=2", payload)
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ResponseCache(tmp_path, "sometimes")
+
+
+def test_off_neither_reads_nor_writes(tmp_path):
+    cache = ResponseCache(tmp_path / "cache", "off")
+    cache.put("ab" * 32, RESPONSE)
+    assert cache.get("ab" * 32) is None
+    assert not (tmp_path / "cache").exists()
+
+
+def test_cache_mode_reads_through_and_expires(tmp_path):
+    cache = ResponseCache(tmp_path, "cache", ttl_seconds=60)
+    key = cache.key(URL, {"q": 1})
+    assert cache.get(key) is None
+    cache.put(key, RESPONSE)
+    assert cache.get(key) == RESPONSE
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get(key) is None
+
+
+def test_cache_mode_evicts_least_recently_used(tmp_path):
+    keys = [ResponseCache.key(URL, {"q": i}) for i in range(3)]
+    probe = ResponseCache(tmp_path / "probe", "cache")
+    probe.put(keys[0], RESPONSE)
+    entry_bytes = probe._total_bytes
+
+    cache = ResponseCache(tmp_path / "cache", "cache", max_bytes=2 * entry_bytes + 8)  # room for two entries, not three
+    for key in keys[:2]:
+        cache.put(key, RESPONSE)
+        time.sleep(0.01)
+    assert cache.get(keys[0]) == RESPONSE  # now more recent than keys[1]
+    time.sleep(0.01)
+    cache.put(keys[2], RESPONSE)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == cache.get(keys[2]) == RESPONSE
+
+
+def test_record_writes_without_reading_and_replay_reads_without_writing(tmp_path):
+    key = ResponseCache.key(URL, {"q": 1})
+    record = ResponseCache(tmp_path, "record", ttl_seconds=0)
+    record.put(key, RESPONSE)
+    assert record.get(key) is None  # record always goes to the API
+
+    replay = ResponseCache(tmp_path, "replay", ttl_seconds=0)
+    assert replay.get(key) == RESPONSE  # no expiry in replay
+    replay.put(ResponseCache.key(URL, {"q": 2}), RESPONSE)
+    with pytest.raises(ReplayMiss):
+        replay.get(ResponseCache.key(URL, {"q": 2}))
+    assert replay.misses == 1
+
+
+def test_record_then_replay_without_api_key(tmp_path, monkeypatch, capsys):
+    posts = [{"author_name": "Dana", "post_text": "Looking for a packaging engineer", "post_url": "https://linkedin.com/posts/1"}]
+    requests = []
+
+    async def chat(request: web.Request) -> web.Response:
+        requests.append(await request.json())
+        return web.json_response({"choices": [{"message": {"content": json.dumps(posts)}}]})
+
+    async def run(queries: list, mode: str, api_key) -> list:
+        monkeypatch.setattr(monitor, "SEARCH_CACHE_MODE", mode)
+        monkeypatch.setattr(monitor, "PERPLEXITY_API_KEY", api_key)
+        with ResultSink(tmp_path / mode) as sink, SeenPostIndex(tmp_path / f"{mode}.sqlite") as seen:
+            await monitor.run_searches(queries, sink, seen)
+        return [record["post"] for path in sink.files for record in read_results(path)]
+
+    async def main() -> tuple:
+        app = web.Application()
+        app.router.add_post("/chat/completions", chat)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        monkeypatch.setattr(monitor, "PERPLEXITY_API_URL", f"http://127.0.0.1:{runner.addresses[0][1]}/chat/completions")
+        try:
+            recorded = await run(["hiring packaging engineer"], "record", "test-key")
+            sent = len(requests)
+            replayed = await run(["hiring packaging engineer"], "replay", None)
+            with pytest.raises(ReplayMiss):
+                await run(["hiring designer"], "replay", None)
+            return recorded, sent, replayed
+        finally:
+            await runner.cleanup()
+
+    monkeypatch.setattr(monitor, "SEARCH_CACHE_DIR", tmp_path / "cassette")
+    monkeypatch.setattr(monitor, "process_post", lambda post: {"post": post, "processed": True})
+
+    recorded, sent, replayed = asyncio.run(main())
+
+    assert sent == 1
+    assert recorded == replayed == posts
+    assert len(requests) == 1  # neither the replay nor the miss reached the network
+    assert "Search cache (replay): 1 hits, 0 misses" in capsys.readouterr().out
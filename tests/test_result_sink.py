@@ -0,0 +1,85 @@
+"""Result sink: rotation, torn records, gzip members and name collisions."""
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+import automation.result_sink as result_sink
+from automation.result_sink import ResultSink, read_results
+
+
+def _records(n: int, start: int = 0) -> list:
+    return [{"need_id": f"need_{i}", "matches": [{"contact": {"id": f"c{i}"}, "match_score": 0.5}]} for i in range(start, start + n)]
+
+
+def _read_all(sink: ResultSink) -> list:
+    return [record for path in sink.files for record in read_results(path)]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_rotation_by_size_keeps_every_record_in_order(tmp_path, compression):
+    records = _records(40)
+    with ResultSink(tmp_path, compression=compression, max_bytes=300) as sink:
+        for record in records:
+            sink.write(record)
+
+    assert len(sink.files) > 1
+    assert len(set(sink.files)) == len(sink.files)
+    assert [path.name.split("_")[-1].split(".")[0] for path in sink.files][:3] == ["001", "002", "003"]
+    assert _read_all(sink) == records
+    assert sink.records_written == 40
+
+
+def test_rotation_by_age(tmp_path):
+    with ResultSink(tmp_path, max_age_seconds=0) as sink:
+        for record in _records(3):
+            sink.write(record)
+    assert len(sink.files) == 3
+    assert _read_all(sink) == _records(3)
+
+
+def test_torn_last_record_is_dropped(tmp_path):
+    with ResultSink(tmp_path) as sink:
+        for record in _records(3):
+            sink.write(record)
+    with open(sink.files[0], "ab") as handle:
+        handle.write(b'{"need_id": "need_3", "matc')
+
+    assert list(read_results(sink.files[0])) == _records(3)
+
+
+def test_open_gzip_file_is_readable_up_to_last_record(tmp_path):
+    sink = ResultSink(tmp_path, compression="gzip")
+    for record in _records(5):
+        sink.write(record)
+    # No trailer yet: the sync flush after each record must be enough.
+    assert list(read_results(sink.current_file)) == _records(5)
+    sink.close()
+    assert list(read_results(sink.files[0])) == _records(5)
+
+
+def test_gzip_reads_every_member(tmp_path):
+    path = tmp_path / "matches_20250101_000000_001.jsonl.gz"
+    for chunk in (_records(2), _records(3, start=2)):
+        with gzip.open(path, "ab") as handle:
+            handle.write("".join(json.dumps(r) + "\n" for r in chunk).encode("utf-8"))
+
+    assert list(read_results(path)) == _records(5)
+
+
+def test_sinks_started_in_the_same_second_never_share_a_file(tmp_path, monkeypatch):
+    class FrozenDatetime:
+        @staticmethod
+        def now():
+            return datetime(2025, 1, 1, 12, 0, 0)
+
+    monkeypatch.setattr(result_sink, "datetime", FrozenDatetime)
+    for compression in (None, "gzip"):
+        with ResultSink(tmp_path / str(compression), compression=compression) as first:
+            first.write(_records(1)[0])
+        with ResultSink(tmp_path / str(compression), compression=compression) as second:
+            second.write(_records(1, start=1)[0])
+
+        assert first.files != second.files
+        assert _read_all(first) + _read_all(second) == _records(2)
@@ -0,0 +1,61 @@
+"""Post router: model failures, semantic-mode no_need, and the order settled posts are released in."""
+import pytest
+
+from app.contact_index import ContactIndex
+from app.metrics import MetricsRegistry
+from app.pipeline import ConnectorPipeline
+from app.router import PostRouter
+from benchmarks.synthetic import generate_posts, generate_store
+
+
+class _FailingModel:
+    def generate(self, prompt, schema):
+        raise RuntimeError("503")
+
+
+def _router(model, batch_size: int = 4) -> PostRouter:
+    return PostRouter(ConnectorPipeline(ContactIndex(generate_store(300, seed=0))), model, batch_size=batch_size,
+                      metrics=MetricsRegistry())
+
+
+def test_model_error_falls_back_to_deterministic_ranking():
+    router = _router(_FailingModel())
+    posts = generate_posts(20, seed=0)
+    routed = list(router.route(posts))
+    assert len(routed) == len(posts)
+    reviewed = [entry for entry in routed if entry.route not in ("no_need", "no_match")]
+    assert reviewed and all(entry.route == "fallback" for entry in reviewed)
+    assert all(entry.ranking.ranked_contacts for entry in reviewed)
+    assert router.metrics.counters["model_errors"] >= router.model_calls > 0
+
+
+def test_settled_posts_are_not_held_without_a_pending_batch():
+    consumed = []
+
+    def posts():
+        for i in range(50):
+            consumed.append(i)
+            yield {"post_text": f"Great week at the offsite, thanks team {i}!", "author_name": "Sam"}
+
+    routed = _router(_FailingModel()).route(posts())
+    for i in range(50):
+        assert next(routed).route == "no_need"
+        assert len(consumed) == i + 1
+
+
+def test_keywordless_ask_is_not_settled_as_no_need_in_semantic_mode():
+    pytest.importorskip("scipy")
+    from app.agent import MY_CONTACTS
+    from app.contact_store import EditableContactStore
+    from app.router import LocalModel
+    from app.semantic_index import SemanticIndex
+
+    store = EditableContactStore.from_contacts(MY_CONTACTS)
+    pipeline = ConnectorPipeline(ContactIndex(store), semantic=SemanticIndex.build(store))
+    router = PostRouter(pipeline, LocalModel(), metrics=MetricsRegistry())
+
+    ask = router.settle({"post_text": "Seeking a compostable cutlery expert", "author_name": "Dana"})
+    assert not ask.need.keywords_must
+    assert ask.route == "model" and ask.ranking.ranked_contacts
+    chatter = router.settle({"post_text": "Great week at the offsite, thanks team!", "author_name": "Sam"})
+    assert chatter.route == "no_need"
@@ -0,0 +1,57 @@
+"""Posts are only recorded as seen once their result has been saved."""
+from automation import linkedin_monitor as monitor
+from automation.seen_index import SeenPostIndex
+
+POST = {
+    "author_name": "Dana",
+    "post_url": "https://www.linkedin.com/posts/dana-123?utm_source=share",
+    "post_text": "I need a compostable packaging supplier for our snack brand in Austin",
+}
+
+
+class _ListSink:
+    def __init__(self, fail: bool = False):
+        self.records = []
+        self.fail = fail
+
+    def write(self, record: dict) -> None:
+        if self.fail:
+            raise OSError("disk full")
+        self.records.append(record)
+
+
+def test_seen_and_add_are_separate(tmp_path):
+    with SeenPostIndex(tmp_path / "seen.sqlite") as index:
+        assert not index.seen(POST)
+        assert not index.seen(POST)  # checking does not record
+        index.add(POST)
+        assert index.seen(POST)
+        assert index.seen(dict(POST, post_url="https://linkedin.com/posts/dana-123/"))
+
+
+def test_processed_post_is_recorded_after_it_is_written(tmp_path):
+    sink = _ListSink()
+    with SeenPostIndex(tmp_path / "seen.sqlite") as index:
+        monitor.write_result(sink, monitor.process_post(POST), seen_index=index)
+        assert sink.records and index.seen(POST)
+
+
+def test_failed_post_is_retried_by_the_next_run(tmp_path, monkeypatch):
+    def broken_pipeline():
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(monitor, "get_pipeline", broken_pipeline)
+    with SeenPostIndex(tmp_path / "seen.sqlite") as index:
+        result = monitor.process_post(POST)
+        assert "error" in result
+        monitor.write_result(_ListSink(), result, seen_index=index)
+        assert not index.seen(POST)
+
+
+def test_unsaved_post_is_not_recorded(tmp_path):
+    with SeenPostIndex(tmp_path / "seen.sqlite") as index:
+        try:
+            monitor.write_result(_ListSink(fail=True), monitor.process_post(POST), seen_index=index)
+        except OSError:
+            pass
+        assert not index.seen(POST)
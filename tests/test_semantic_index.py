@@ -0,0 +1,35 @@
+"""Semantic index builds over networks with contacts that have no text."""
+import pytest
+
+pytest.importorskip("scipy")
+
+from app.agent import MY_CONTACTS
+from app.models import Contact
+from app.semantic_index import SemanticIndex
+
+
+@pytest.mark.parametrize("where", ["first", "last"])
+def test_build_with_contact_without_text(where):
+    empty = Contact(id="empty", name="Nobody")
+    contacts = [empty] + MY_CONTACTS if where == "first" else MY_CONTACTS + [empty]
+
+    index = SemanticIndex.build(contacts)
+
+    hits = index.search("compostable bioplastics packaging", 3)
+    assert hits
+    assert all(contacts[pos].id != "empty" for pos, _ in hits)
+
+
+def test_edited_contact_leaves_semantic_hits():
+    from app.contact_index import ContactIndex
+    from app.contact_store import EditableContactStore
+    from app.pipeline import ConnectorPipeline
+
+    store = EditableContactStore.from_contacts(MY_CONTACTS)
+    pipeline = ConnectorPipeline(ContactIndex(store), semantic=SemanticIndex.build(store))
+    need = pipeline.extract("Looking for an expert in compostable bioplastics packaging", "Dana")
+    assert "c1" in [ranked.contact.id for ranked in pipeline.rank(need, 5).ranked_contacts]
+
+    # Sarah's stale vector still sits at her position; only keywords may match her now
+    pipeline.upsert_contacts([Contact(id="c1", name="Sarah Chen", title="Chef", tags=["gardening"])])
+    assert "c1" not in [ranked.contact.id for ranked in pipeline.rank(need, 5).ranked_contacts]
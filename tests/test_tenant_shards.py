@@ -0,0 +1,28 @@
+"""Sharded matcher: repartitioning a tenant under queued requests."""
+from app.need_extractor import NEED_EXTRACTOR
+from app.pipeline import build_need_spec
+from app.tenant_shards import ShardedMatcher, partition_tenant
+from benchmarks.synthetic import generate_contacts, generate_posts
+
+
+def _needs(count: int, tenant: str) -> list:
+    needs = []
+    for post in generate_posts(count * 4, seed=1):
+        detected_type, keywords = NEED_EXTRACTOR.scan(post["post_text"])
+        if keywords:
+            need = build_need_spec(post["post_text"], post["author_name"], detected_type, keywords)
+            needs.append(need.model_copy(update={"user_id": tenant}))
+    return needs[:count]
+
+
+def test_queued_requests_survive_repartition(tmp_path):
+    partition_tenant("acme", generate_contacts(600, 0), tmp_path, shard_size=50)
+    with ShardedMatcher(tmp_path, workers=1) as matcher:
+        pending = [matcher.submit(need) for need in _needs(3, "acme")]
+        partition_tenant("acme", generate_contacts(600, 1), tmp_path, shard_size=50)
+        for future in pending:
+            assert future.result(timeout=60).ranked_contacts is not None
+        # A third generation drops the first, keeping only the one before it
+        partition_tenant("acme", generate_contacts(600, 2), tmp_path, shard_size=50)
+    generations = {path.name.split("-")[1] for path in (tmp_path / "acme").glob("shard-*.snapshot")}
+    assert generations == {"0002", "0003"}
@@ -0,0 +1,36 @@
+"""Matcher pool failure handling: failed batches and workers that die."""
+import os
+
+import pytest
+
+from automation.worker_pool import ProcessingPool, WorkerPoolError
+
+
+def _double(item: int) -> int:
+    if item == 13:
+        raise ValueError("unlucky")
+    return item * 2
+
+
+def _die(item: int) -> int:
+    os._exit(1)
+
+
+def test_failed_batch_never_reaches_on_result():
+    results = []
+    with ProcessingPool(_double, results.append, workers=2, batch_size=4, queue_size=8) as pool:
+        for item in range(40):
+            pool.submit(item)
+    # The batch holding 13 (items 12-15) is reported as failed, everything else is written
+    assert pool.failed_items == 4
+    assert sorted(results) == [item * 2 for item in range(40) if not 12 <= item <= 15]
+
+
+def test_dead_workers_raise_instead_of_hanging():
+    pool = ProcessingPool(_die, lambda result: None, workers=2, batch_size=1, queue_size=2)
+    pool.start()
+    with pytest.raises(WorkerPoolError):
+        for item in range(1000):
+            pool.submit(item)
+    with pytest.raises(WorkerPoolError):
+        pool.close()